@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.io_scheduler import IOScheduler, get_scheduler
+from app.utils.io_telemetry import ProgressTelemetry
+
+try:
+    import xxhash  # 可选依赖，提供更快的非加密哈希
+except ImportError:
+    xxhash = None
+
+# 每次读取的块大小
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 默认哈希算法：优先 xxh64，未安装时使用 blake2b
+DEFAULT_ALGORITHM = "xxh64" if xxhash else "blake2b"
+
+# 同时在途的哈希任务数上限（实际并发由 I/O 调度器按设备限制）
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+# 小于该大小的文件打包成批次，每个批次一个任务
+SMALL_FILE_SIZE = 1024 * 1024
+SMALL_BATCH_FILES = 256
+SMALL_BATCH_BYTES = 16 * 1024 * 1024
+
+# 自动模式：累计这么多秒的哈希任务后判断瓶颈
+AUTO_SAMPLE_SECONDS = 2.0
+
+# 线程池采样中哈希任务 CPU 时间占实际耗时的比例达到该值时，尝试进程池
+CPU_BOUND_RATIO = 0.5
+
+# 进程池吞吐量至少为线程池的多少倍才保留
+PROCESS_SPEEDUP = 1.1
+
+# 哈希方式：auto 根据实测自动选择，thread 线程池，process 进程池
+HASH_MODES = ("auto", "thread", "process")
+
+# 哈希清单文件名，保存在每个校验过的目录根部
+MANIFEST_NAME = ".lynion_manifest.json"
+MANIFEST_TEMP_NAME = MANIFEST_NAME + ".tmp"
+# 遍历目录时忽略的清单文件（含写入中断留下的临时文件）
+MANIFEST_FILES = (MANIFEST_NAME, MANIFEST_TEMP_NAME)
+MANIFEST_VERSION = 1
+
+
+def new_hasher(algorithm: str):
+    """创建哈希对象"""
+    if algorithm == "xxh64":
+        if not xxhash:
+            raise ValueError("未安装 xxhash，无法使用 xxh64")
+        return xxhash.xxh64()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    return hashlib.new(algorithm)
+
+
+def hash_file(path: str, algorithm: str = DEFAULT_ALGORITHM,
+              chunk_size: int = HASH_CHUNK_SIZE,
+              progress: Optional[Callable[[int], None]] = None) -> str:
+    """分块读取并计算文件哈希
+    :param progress: 每读取一块调用 progress(字节数)
+    """
+    hasher = new_hasher(algorithm)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            hasher.update(view[:size])
+            if progress:
+                progress(size)
+    return hasher.hexdigest()
+
+
+def _hash_batch(root: str, rel_paths: List[str], algorithm: str, chunk_size: int,
+                progress: Optional[Callable[[int], None]] = None):
+    """计算一批文件的哈希（模块级函数，可在进程池中执行）
+
+    返回 ([(相对路径, 哈希或 (错误类型, 错误信息))], CPU 秒数, 实际秒数)。
+    """
+    cpu_started = time.thread_time()
+    wall_started = time.perf_counter()
+    outcomes = []
+    for rel_path in rel_paths:
+        try:
+            path = os.path.join(root, *rel_path.split("/"))
+            outcomes.append((rel_path, hash_file(path, algorithm, chunk_size, progress)))
+        except Exception as e:
+            outcomes.append((rel_path, (type(e).__name__, str(e))))
+    return outcomes, time.thread_time() - cpu_started, time.perf_counter() - wall_started
+
+
+def scan_tree(root: str) -> Dict[str, Tuple[int, int]]:
+    """遍历目录，返回 相对路径 -> (文件大小, 修改时间ns)，忽略哈希清单"""
+    files = {}
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path + "/"))
+                elif entry.is_file(follow_symlinks=False):
+                    # 任意层级的清单文件都不参与比对（子目录可能是单独校验过的备份）
+                    if entry.name in MANIFEST_FILES:
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    files[rel_path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class HashManifest:
+    """目录哈希清单 - 记录每个文件的大小、修改时间和哈希
+
+    再次校验时，大小和修改时间未变的文件直接复用清单中的哈希。
+    """
+    def __init__(self, root: str, algorithm: str):
+        self.root = root
+        self.algorithm = algorithm
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self._previous: Dict[str, Dict] = {}
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> "HashManifest":
+        """读取已有清单，算法不同或格式无效时忽略"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION and data.get("algorithm") == self.algorithm:
+                self._previous = data.get("files", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARNING] 读取哈希清单失败，将重新计算: {self.path}: {str(e)}")
+        return self
+
+    def lookup(self, rel_path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """文件未变化时返回已记录的哈希"""
+        entry = self._previous.get(rel_path)
+        if entry and entry.get("size") == size and entry.get("mtime_ns") == mtime_ns:
+            self.record(rel_path, size, mtime_ns, entry["hash"])
+            return entry["hash"]
+        return None
+
+    def record(self, rel_path: str, size: int, mtime_ns: int, digest: str):
+        with self._lock:
+            self._entries[rel_path] = {"size": size, "mtime_ns": mtime_ns, "hash": digest}
+
+    def save(self, keep_previous: bool = False):
+        """写入本次记录的文件（先写临时文件再替换）
+        :param keep_previous: 保留本次未涉及的旧记录（只处理了部分文件时使用）
+        """
+        entries = dict(self._previous) if keep_previous else {}
+        entries.update(self._entries)
+        data = {
+            "version": MANIFEST_VERSION,
+            "algorithm": self.algorithm,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "files": dict(sorted(entries.items())),
+        }
+        temp_path = os.path.join(self.root, MANIFEST_TEMP_NAME)
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"[WARNING] 写入哈希清单失败: {self.path}: {str(e)}")
+
+
+@dataclass
+class VerificationResult:
+    """校验结果"""
+    source: str
+    backup: str
+    algorithm: str
+    matched: List[str] = field(default_factory=list)
+    mismatched: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    extra: List[str] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    total_files: int = 0
+    total_bytes: int = 0
+    reused_hashes: int = 0
+    hash_mode: str = "thread"  # 实际使用的哈希方式
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not (self.mismatched or self.missing or self.errors)
+
+
+class BackupVerifier:
+    """备份校验引擎 - 对比源目录与备份目录的文件哈希"""
+    def __init__(self, algorithm: Optional[str] = None,
+                 max_workers: int = DEFAULT_WORKERS,
+                 chunk_size: int = HASH_CHUNK_SIZE,
+                 scheduler: Optional[IOScheduler] = None,
+                 hash_mode: str = "auto",
+                 process_workers: Optional[int] = None):
+        if hash_mode not in HASH_MODES:
+            raise ValueError(f"不支持的哈希方式: {hash_mode}")
+        self.algorithm = algorithm or DEFAULT_ALGORITHM
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.scheduler = scheduler or get_scheduler()
+        self.hash_mode = hash_mode
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self._hash_mode = "thread"
+        self._auto_pending = False
+        self._thread_rate = 0.0
+        self._trial: Dict = {}
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_lock = threading.Lock()
+        self._telemetry: Optional[ProgressTelemetry] = None
+
+    def verify(self, source: str, backup: str,
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               use_manifest: bool = True,
+               telemetry: Optional[ProgressTelemetry] = None,
+               save_source_manifest: bool = False) -> VerificationResult:
+        """校验备份目录
+        :param progress_callback: progress_callback(已完成文件数, 总文件数)
+        :param use_manifest: 复用两个目录中哈希清单里未变化文件的哈希，并在结束后更新备份目录的清单
+        :param telemetry: 记录吞吐量、剩余时间和每个文件的结果
+        :param save_source_manifest: 同时写入源目录的清单（源目录通常是存储卡等只读介质，默认不写）
+        """
+        if not os.path.isdir(source):
+            raise ValueError(f"源文件夹不存在: {source}")
+        if not os.path.isdir(backup):
+            raise ValueError(f"备份文件夹不存在: {backup}")
+
+        started = time.monotonic()
+        result = VerificationResult(source, backup, self.algorithm)
+
+        # 两个目录并行扫描（位于同一设备时由调度器排队）
+        source_future = self.scheduler.submit(source, scan_tree, source)
+        backup_future = self.scheduler.submit(backup, scan_tree, backup)
+        source_files = source_future.result()
+        backup_files = backup_future.result()
+
+        result.missing = sorted(set(source_files) - set(backup_files))
+        result.extra = sorted(set(backup_files) - set(source_files))
+
+        pairs = []
+        for rel_path in sorted(set(source_files) & set(backup_files)):
+            if source_files[rel_path][0] != backup_files[rel_path][0]:
+                # 大小不同无需哈希
+                result.mismatched.append(rel_path)
+            else:
+                pairs.append(rel_path)
+
+        result.total_files = len(source_files)
+        result.total_bytes = sum(size for size, _ in source_files.values())
+        done = result.total_files - len(pairs)
+        if progress_callback:
+            progress_callback(done, result.total_files)
+
+        if telemetry:
+            # 每个文件对需要读取源和备份各一次
+            telemetry.start_phase(
+                "verify", sum(source_files[rel][0] for rel in pairs) * 2, len(pairs)
+            )
+        self._telemetry = telemetry
+
+        manifests = None
+        if use_manifest:
+            manifests = (
+                HashManifest(source, self.algorithm).load(),
+                HashManifest(backup, self.algorithm).load(),
+            )
+        trees = (source_files, backup_files)
+        self._hash_mode = "process" if self.hash_mode == "process" else "thread"
+        self._auto_pending = self.hash_mode == "auto"
+        self._thread_rate = 0.0
+        self._trial = {"mode": "thread", "started": time.monotonic(), "bytes": 0, "cpu": 0.0, "wall": 0.0}
+
+        try:
+            self._collect(source, backup, pairs, trees, manifests, result, progress_callback, done)
+        finally:
+            if self._process_pool:
+                self._process_pool.shutdown(cancel_futures=True)
+                self._process_pool = None
+
+        result.mismatched.sort()
+        result.hash_mode = self._hash_mode
+        if manifests:
+            source_manifest, backup_manifest = manifests
+            backup_manifest.save()
+            if save_source_manifest:
+                source_manifest.save()
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _collect(self, source: str, backup: str, pairs: List[str], trees: Tuple[Dict, Dict],
+                 manifests, result: VerificationResult, progress_callback, done: int):
+        """汇总每个文件对的比对结果"""
+        source_files = trees[0]
+        telemetry = self._telemetry
+        for rel_path, outcome in self._hash_pairs(source, backup, pairs, trees, manifests, result):
+            if isinstance(outcome, Exception):
+                result.errors.append((rel_path, str(outcome)))
+            elif outcome:
+                result.matched.append(rel_path)
+            else:
+                result.mismatched.append(rel_path)
+            if telemetry:
+                status = "error" if isinstance(outcome, Exception) else ("ok" if outcome else "mismatch")
+                telemetry.file_done(rel_path, source_files[rel_path][0], status=status)
+            done += 1
+            if progress_callback:
+                progress_callback(done, result.total_files)
+
+    def _hash_pairs(self, source: str, backup: str, pairs: List[str],
+                    trees: Tuple[Dict, Dict], manifests: Optional[Tuple[HashManifest, HashManifest]],
+                    result: VerificationResult):
+        """并发计算文件对的哈希，逐个产出 (相对路径, 是否一致或异常)
+
+        源文件与备份文件分别提交到各自设备的调度队列，两个磁盘各自保持满负荷；
+        小文件按目录打包成一个任务，减少每个文件的调度开销；
+        同时在途的任务数有上限，避免大目录一次性提交全部任务。
+        """
+        max_pending = self.max_workers * 4
+        pending = {}  # future -> (0 源 / 1 备份, 文件列表, 是否已实时上报进度, 哈希方式)
+        digests: Dict[str, List] = {}
+        ready: List[str] = []
+        batches = ([], [])
+        batch_bytes = [0, 0]
+        queue = iter(pairs)
+        roots = (source, backup)
+
+        def submit(index: int, rel_paths: List[str]):
+            root = roots[index]
+            live = self._hash_mode == "thread" and self._telemetry is not None
+            if live:
+                telemetry = self._telemetry
+                progress = lambda count: telemetry.add_bytes(count, root)
+                future = self.scheduler.submit(
+                    root, _hash_batch, root, rel_paths, self.algorithm, self.chunk_size, progress
+                )
+            elif self._hash_mode == "thread":
+                future = self.scheduler.submit(
+                    root, _hash_batch, root, rel_paths, self.algorithm, self.chunk_size
+                )
+            else:
+                future = self.scheduler.submit(root, self._hash_in_process, root, rel_paths)
+            pending[future] = (index, rel_paths, live, self._hash_mode)
+
+        def flush(index: int):
+            if batches[index]:
+                submit(index, batches[index][:])
+                batches[index].clear()
+                batch_bytes[index] = 0
+
+        def submit_next() -> bool:
+            rel_path = next(queue, None)
+            if rel_path is None:
+                flush(0)
+                flush(1)
+                return False
+            digests[rel_path] = []
+            for index, root in enumerate(roots):
+                size, mtime_ns = trees[index][rel_path]
+                manifest = manifests[index] if manifests else None
+                if manifest:
+                    digest = manifest.lookup(rel_path, size, mtime_ns)
+                    if digest:
+                        # 命中清单时不占用设备队列
+                        digests[rel_path].append(digest)
+                        result.reused_hashes += 1
+                        if self._telemetry:
+                            self._telemetry.add_bytes(size)
+                        continue
+                if size >= SMALL_FILE_SIZE:
+                    submit(index, [rel_path])
+                    continue
+                batches[index].append(rel_path)
+                batch_bytes[index] += size
+                if len(batches[index]) >= SMALL_BATCH_FILES or batch_bytes[index] >= SMALL_BATCH_BYTES:
+                    flush(index)
+            if len(digests[rel_path]) == 2:
+                ready.append(rel_path)
+            return True
+
+        def compare(rel_path: str):
+            first, second = digests.pop(rel_path)
+            if isinstance(first, Exception):
+                return first
+            if isinstance(second, Exception):
+                return second
+            return first == second
+
+        while True:
+            while len(pending) < max_pending and submit_next():
+                pass
+            while ready:
+                rel_path = ready.pop()
+                yield rel_path, compare(rel_path)
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, rel_paths, live, mode = pending.pop(future)
+                tree = trees[index]
+                size = sum(tree[rel][0] for rel in rel_paths)
+                try:
+                    outcomes, cpu_seconds, wall_seconds = future.result()
+                except Exception as e:
+                    outcomes, cpu_seconds, wall_seconds = [(rel, e) for rel in rel_paths], 0.0, 0.0
+                self._observe(mode, size, cpu_seconds, wall_seconds)
+
+                manifest = manifests[index] if manifests else None
+                for rel_path, outcome in outcomes:
+                    if isinstance(outcome, tuple):
+                        # 错误以 (类型名, 信息) 返回，便于跨进程传递
+                        outcome = OSError(f"{outcome[0]}: {outcome[1]}")
+                    elif isinstance(outcome, str) and manifest:
+                        size, mtime_ns = tree[rel_path]
+                        manifest.record(rel_path, size, mtime_ns, outcome)
+                    digests[rel_path].append(outcome)
+                    if len(digests[rel_path]) == 2:
+                        yield rel_path, compare(rel_path)
+                if self._telemetry and not live:
+                    self._telemetry.add_bytes(size, roots[index])
+
+    def _observe(self, mode: str, size: int, cpu_seconds: float, wall_seconds: float):
+        """自动模式：根据实测吞吐量选择线程池或进程池
+
+        先用线程池采样；若哈希任务的 CPU 时间占比较高（瓶颈可能在计算而非磁盘），
+        再用进程池采样同样时长，吞吐量明显更高时保留进程池，否则退回线程池。
+        """
+        trial = self._trial
+        if not self._auto_pending or mode != trial["mode"]:
+            return
+        trial["bytes"] += size
+        trial["cpu"] += cpu_seconds
+        trial["wall"] += wall_seconds
+        elapsed = time.monotonic() - trial["started"]
+        if elapsed < AUTO_SAMPLE_SECONDS:
+            return
+
+        rate = trial["bytes"] / elapsed
+        if mode == "thread":
+            ratio = trial["cpu"] / trial["wall"] if trial["wall"] else 0.0
+            if ratio >= CPU_BOUND_RATIO and (os.cpu_count() or 1) > 1:
+                print(f"[DEBUG] 哈希 CPU 占比 {ratio:.0%}，尝试进程池")
+                self._thread_rate = rate
+                self._hash_mode = "process"
+                self._trial = {"mode": "process", "started": time.monotonic(), "bytes": 0, "cpu": 0.0, "wall": 0.0}
+            else:
+                self._auto_pending = False
+            return
+
+        self._auto_pending = False
+        if rate < self._thread_rate * PROCESS_SPEEDUP:
+            self._hash_mode = "thread"
+        print(
+            f"[DEBUG] 线程池 {self._thread_rate / 1024 ** 2:.0f} MB/s，"
+            f"进程池 {rate / 1024 ** 2:.0f} MB/s，使用{'进程池' if self._hash_mode == 'process' else '线程池'}"
+        )
+
+    def _hash_in_process(self, root: str, rel_paths: List[str]):
+        """在进程池中计算（调用线程仍占用设备名额）"""
+        if self._process_pool is None:
+            with self._process_lock:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        return self._process_pool.submit(
+            _hash_batch, root, rel_paths, self.algorithm, self.chunk_size
+        ).result()
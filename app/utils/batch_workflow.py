@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.utils.folder_plan import (
+    FolderPlan, apply_plans, compile_plan, load_workflow_settings, project_root
+)
+from app.utils.project_manager import ProjectManager
+
+# 表格列名与字段的对应关系（剪辑软件、备注为可选列）
+BATCH_COLUMNS = {
+    '项目名称': 'project_name',
+    '日期': 'project_date',
+    '类型': 'project_type',
+    '相机': 'cameras',
+    '磁盘': 'disk_id',
+    '剪辑软件': 'editing_software',
+    '备注': 'notes',
+}
+
+REQUIRED_COLUMNS = ('项目名称', '日期', '类型')
+
+# 多台相机之间的分隔符；型号与标识之间用冒号分隔，如 “A7S3:A, FX3”
+CAMERA_SEPARATORS = re.compile(r"[,，、;；\n]")
+CAMERA_TAG_SEPARATORS = re.compile(r"[:：]")
+
+# 文件夹名称中不允许的字符
+INVALID_NAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+def parse_cameras(value: str) -> Tuple[Tuple[str, str], ...]:
+    """解析相机列：“型号:标识, 型号” -> ((型号, 标识), (型号, ""))"""
+    cameras = []
+    for item in CAMERA_SEPARATORS.split(value or ""):
+        model, _, tag = CAMERA_TAG_SEPARATORS.sub(":", item).partition(":")
+        if model.strip():
+            cameras.append((model.strip(), tag.strip()))
+    return tuple(cameras)
+
+
+def parse_date(value: str) -> Optional[str]:
+    """日期统一为 YYYYMMDD，无法识别时返回 None"""
+    value = (value or "").strip()
+    if re.fullmatch(r"\d{8}", value):
+        return value
+    parsed = pd.to_datetime(value, errors='coerce')
+    return None if pd.isna(parsed) else parsed.strftime("%Y%m%d")
+
+
+def read_batch_sheet(file_path: str) -> pd.DataFrame:
+    """读取批量创建表格（xlsx / xls / csv），所有列按文本读取"""
+    if os.path.splitext(file_path)[1].lower() == ".csv":
+        df = pd.read_csv(file_path, dtype=str, encoding='utf-8-sig')
+    else:
+        df = pd.read_excel(file_path, dtype=str)
+    df = df.dropna(how='all')
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"表格缺少列: {'、'.join(missing)}")
+    df = df.rename(columns=BATCH_COLUMNS).reindex(columns=list(BATCH_COLUMNS.values()))
+    return df.fillna('')
+
+
+class BatchWorkflow:
+    """按表格批量创建工作流文件夹并登记到历史项目
+
+    相同类型、相机和剪辑软件的行共用一个编译后的计划，所有项目的文件夹并行创建；
+    创建成功的项目通过一次 executemany 事务写入 projects 表。
+    每行的错误单独记录，不影响其他行。
+    """
+    def __init__(self, manager: ProjectManager, settings: Optional[Dict] = None):
+        self.manager = manager
+        self.settings = settings or load_workflow_settings()
+
+    def run(self, file_path: str, dry_run: bool = False,
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """执行批量创建
+        :param dry_run: 只生成计划，不创建文件夹也不写入数据库
+        :param progress_callback: progress_callback(已完成项目数, 总项目数)
+        :return: {"total", "created", "imported", "registered", "rejects", "results"}
+                 rejects 格式与 Excel 导入报告相同，可用 ProjectManager.save_import_rejects 保存
+        """
+        base_path = self.settings.get("project_path")
+        if not base_path:
+            raise ValueError("请先在设置中配置工程路径")
+
+        try:
+            df = read_batch_sheet(file_path)
+        except Exception as e:
+            print(f"[ERROR] 读取批量创建表格失败: {str(e)}")
+            raise Exception(f"读取批量创建表格失败: {str(e)}")
+
+        report = {"total": len(df), "created": 0, "imported": 0, "registered": 0, "rejects": [], "results": []}
+        rows, jobs = self._compile_rows(df, base_path, report["rejects"])
+        print(f"[DEBUG] 批量创建 {len(jobs)} 个项目，共 {len({id(plan) for plan, _, _ in jobs})} 种文件夹计划")
+
+        results = apply_plans(base_path, jobs, dry_run=dry_run, progress_callback=progress_callback)
+        records = []
+        for (row_number, row), result in zip(rows, results):
+            report["results"].append((row_number, result))
+            if not result.ok:
+                path, message = (result.errors or result.template.errors)[0]
+                report["rejects"].append(self._reject(row_number, f"创建文件夹失败: {path}: {message}", row))
+                continue
+            report["created"] += 1
+            records.append((row_number, row, result))
+
+        if dry_run or not records:
+            return report
+
+        # 已登记的路径不重复写入（重复执行同一个表格时）
+        registered = self.manager.find_project_paths([result.root for _, _, result in records])
+        report["registered"] = len(registered)
+        projects = [
+            {
+                'disk_id': row['disk_id'],
+                'project_date': row['project_date'],
+                'project_name': row['project_name'],
+                'backup_status': 0,
+                'notes': row['notes'],
+                'project_path': result.root,
+                'filename': '',
+            }
+            for _, row, result in records if result.root not in registered
+        ]
+        try:
+            report["imported"] = self.manager.add_projects(projects)
+        except Exception as e:
+            # 单个事务失败时全部未写入，文件夹已创建，逐行报告
+            for row_number, row, result in records:
+                if result.root not in registered:
+                    report["rejects"].append(self._reject(row_number, f"登记项目失败: {str(e)}", row))
+        report["rejects"].sort(key=lambda reject: reject["row"])
+        return report
+
+    def _compile_rows(self, df: pd.DataFrame, base_path: str, rejects: List[Dict]):
+        """校验每一行并编译计划
+        :return: ([(行号, 行数据)], [(计划, 项目名称, 日期)])
+        """
+        plans: Dict[Tuple, FolderPlan] = {}
+        roots: Dict[str, int] = {}
+        rows = []
+        jobs = []
+        for index, record in df.iterrows():
+            row_number = int(index) + 2  # 表头占第 1 行
+            row = {key: str(value).strip() for key, value in record.items()}
+            name = row['project_name']
+            if not name:
+                rejects.append(self._reject(row_number, "项目名称为空", row))
+                continue
+            if INVALID_NAME_CHARS.search(name):
+                rejects.append(self._reject(row_number, f"项目名称包含非法字符: {name}", row))
+                continue
+            date_str = parse_date(row['project_date'])
+            if not date_str:
+                rejects.append(self._reject(row_number, f"日期无效: {row['project_date']}", row))
+                continue
+            row['project_date'] = date_str
+            disk_id = row['disk_id'] or '0'
+            if not disk_id.isdigit():
+                rejects.append(self._reject(row_number, f"磁盘编号无效: {disk_id}", row))
+                continue
+            row['disk_id'] = str(int(disk_id))
+
+            root = project_root(base_path, name, date_str)
+            if root in roots:
+                rejects.append(self._reject(row_number, f"与第 {roots[root]} 行的项目重复", row))
+                continue
+
+            key = (row['project_type'], parse_cameras(row['cameras']), row['editing_software'])
+            plan = plans.get(key)
+            if plan is None:
+                try:
+                    plan = plans[key] = compile_plan(
+                        key[0], cameras=key[1], editing_software=key[2] or None, settings=self.settings
+                    )
+                except Exception as e:
+                    rejects.append(self._reject(row_number, str(e), row))
+                    continue
+            roots[root] = row_number
+            rows.append((row_number, row))
+            jobs.append((plan, name, date_str))
+        return rows, jobs
+
+    @staticmethod
+    def _reject(row_number: int, reason: str, row: Dict) -> Dict:
+        return {"row": row_number, "reason": reason, "data": dict(row)}
@@ -2,6 +2,8 @@ import sqlite3
 from typing import List, Dict, Optional
 import os
 from pathlib import Path
+from app.utils.db_pool import get_pool
+from app.utils.db_migrations import ensure_schema
 
 class CameraManager:
     def __init__(self, db_path: str):
@@ -9,20 +11,15 @@ class CameraManager:
         :param db_path: 数据库文件的完整路径
         """
         self.db_path = db_path
+        self.pool = get_pool(db_path)
         print(f"[DEBUG] 初始化相机管理器: {db_path}")
         
         try:
             # 确保数据库目录存在
             os.makedirs(os.path.dirname(db_path), exist_ok=True)
             
-            # 读取 schema 文件
-            schema_path = Path(__file__).parent.parent / 'database' / 'schema.sql'
-            with open(schema_path, 'r', encoding='utf-8') as f:
-                schema = f.read()
-            
-            # 初始化数据库
-            with sqlite3.connect(db_path) as conn:
-                conn.executescript(schema)
+            # 应用数据库迁移
+            ensure_schema(db_path)
                 
         except Exception as e:
             print(f"[ERROR] 数据库初始化失败: {str(e)}")
@@ -31,8 +28,7 @@ class CameraManager:
     def get_all_brands(self) -> List[Dict]:
         """获取所有品牌"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT id, name FROM camera_brands ORDER BY name")
                 return [dict(row) for row in cursor.fetchall()]
@@ -43,7 +39,7 @@ class CameraManager:
     def add_brand(self, name: str) -> int:
         """添加品牌"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO camera_brands (name) VALUES (?)",
@@ -60,8 +56,7 @@ class CameraManager:
     def get_models_by_brand(self, brand_id: int) -> List[Dict]:
         """获取指定品牌的所有型号"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT m.id, m.name, b.name as brand_name
@@ -78,7 +73,7 @@ class CameraManager:
     def add_model(self, brand_id: int, name: str) -> int:
         """添加型号"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO camera_models (brand_id, name) VALUES (?, ?)",
@@ -95,7 +90,7 @@ class CameraManager:
     def update_model(self, model_id: int, name: str) -> bool:
         """更新型号"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE camera_models SET name = ? WHERE id = ?",
@@ -112,7 +107,7 @@ class CameraManager:
     def delete_model(self, model_id: int) -> bool:
         """删除型号"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM camera_models WHERE id = ?", (model_id,))
                 conn.commit()
@@ -124,7 +119,7 @@ class CameraManager:
     def rename_brand(self, brand_id: int, new_name: str) -> bool:
         """重命名品牌"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE camera_brands SET name = ? WHERE id = ?",
@@ -141,7 +136,7 @@ class CameraManager:
     def delete_brand(self, brand_id: int) -> bool:
         """删除品牌及其所有型号"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 # 首先删除该品牌的所有型号
                 cursor.execute("DELETE FROM camera_models WHERE brand_id = ?", (brand_id,))
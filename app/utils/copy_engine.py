@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+import errno
+import os
+import stat
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.utils.io_scheduler import IOScheduler, get_scheduler
+from app.utils.tree_diff import snapshot_tree
+
+try:
+    import fcntl  # 仅 Unix
+except ImportError:
+    fcntl = None
+
+# Linux FICLONE ioctl：在 Btrfs / XFS 等文件系统上创建共享数据块的副本（reflink）
+FICLONE = 0x40049409
+
+# 普通读写回退时的缓冲区大小
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# 小于该大小的文件打包成批次，每个批次一个任务
+SMALL_COPY_SIZE = 256 * 1024
+SMALL_COPY_BATCH = 64
+
+# 这些错误表示当前文件系统/平台不支持该方式，换下一种方式重试
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EBADF,
+    errno.EPERM, getattr(errno, "EOPNOTSUPP", errno.ENOTSUP), errno.ENOTSUP,
+}
+
+
+def available_methods() -> Tuple[str, ...]:
+    """当前平台可用的拷贝方式（按优先顺序）"""
+    methods = []
+    if fcntl and sys.platform.startswith('linux'):
+        methods.append("reflink")
+    if hasattr(os, "copy_file_range"):
+        methods.append("copy_file_range")
+    if hasattr(os, "sendfile") and sys.platform.startswith('linux'):
+        methods.append("sendfile")
+    methods.append("buffer")
+    return tuple(methods)
+
+
+def _copy_data(method: str, src_fd: int, dst_fd: int, size: int):
+    """用指定方式拷贝文件内容，不支持时抛出 OSError"""
+    if method == "reflink":
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    elif method == "copy_file_range":
+        # 由内核在文件之间直接拷贝，部分文件系统会自动使用 reflink 或服务端拷贝
+        while os.copy_file_range(src_fd, dst_fd, max(size, COPY_BUFFER_SIZE)):
+            pass
+    elif method == "sendfile":
+        offset = 0
+        while True:
+            sent = os.sendfile(dst_fd, src_fd, offset, max(size - offset, COPY_BUFFER_SIZE))
+            if not sent:
+                break
+            offset += sent
+    else:
+        while True:
+            data = os.read(src_fd, COPY_BUFFER_SIZE)
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                view = view[os.write(dst_fd, view):]
+
+
+@dataclass
+class CopyResult:
+    """拷贝结果"""
+    source: str
+    destination: str
+    files: int = 0
+    dirs: int = 0
+    bytes: int = 0
+    methods: Dict[str, int] = field(default_factory=dict)  # 拷贝方式 -> 文件数
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class CopyEngine:
+    """目录树拷贝引擎，用于复制工程模板和项目目录
+
+    文件内容优先使用 reflink，其次由内核完成拷贝（copy_file_range / sendfile），
+    都不支持时回退为普通读写；某种方式在一对设备间失败后不再重复尝试。
+    目录按层级并行创建，文件并行拷贝（受 I/O 调度器的设备并发限制），
+    文件权限和时间通过已打开的文件描述符设置，目录元数据在最后统一写入。
+    """
+    def __init__(self, scheduler: Optional[IOScheduler] = None,
+                 max_workers: Optional[int] = None,
+                 preserve_metadata: bool = True):
+        self.scheduler = scheduler or get_scheduler()
+        self.max_workers = max_workers
+        self.preserve_metadata = preserve_metadata
+        self.methods = available_methods()
+        self._unsupported: Dict[Tuple[int, int], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def copy_file(self, src: str, dst: str) -> Tuple[int, str]:
+        """拷贝单个文件及其权限和时间
+        :return: (字节数, 使用的拷贝方式)
+        """
+        with open(src, 'rb', buffering=0) as fsrc, open(dst, 'wb', buffering=0) as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+            st = os.fstat(src_fd)
+            method = self._copy_with_fallback(src_fd, dst_fd, st, os.fstat(dst_fd).st_dev)
+            if self.preserve_metadata:
+                if hasattr(os, "fchmod"):
+                    os.fchmod(dst_fd, stat.S_IMODE(st.st_mode))
+                if os.utime in os.supports_fd:
+                    os.utime(dst_fd, ns=(st.st_atime_ns, st.st_mtime_ns))
+        if self.preserve_metadata and os.utime not in os.supports_fd:
+            os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+            if not hasattr(os, "fchmod"):
+                os.chmod(dst, stat.S_IMODE(st.st_mode))
+        return st.st_size, method
+
+    def _copy_with_fallback(self, src_fd: int, dst_fd: int, st: os.stat_result, dst_dev: int) -> str:
+        key = (st.st_dev, dst_dev)
+        for method in self.methods:
+            if method in self._unsupported.get(key, ()):
+                continue
+            try:
+                _copy_data(method, src_fd, dst_fd, st.st_size)
+                return method
+            except OSError as e:
+                if method == "buffer" or e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                with self._lock:
+                    self._unsupported.setdefault(key, set()).add(method)
+                # 回到起点重新拷贝
+                os.lseek(src_fd, 0, os.SEEK_SET)
+                os.lseek(dst_fd, 0, os.SEEK_SET)
+                os.ftruncate(dst_fd, 0)
+        raise OSError("没有可用的拷贝方式")
+
+    def copy_tree(self, src: str, dst: str,
+                  progress_callback: Optional[Callable[[int, int], None]] = None) -> CopyResult:
+        """将 src 目录的内容拷贝到 dst（dst 已存在时合并，同名文件覆盖）
+        :param progress_callback: progress_callback(已完成文件数, 总文件数)
+        """
+        if not os.path.isdir(src):
+            raise ValueError(f"源文件夹不存在: {src}")
+
+        started = time.monotonic()
+        result = CopyResult(src, dst)
+        # 与 shutil.copytree 相同，符号链接按其目标的内容拷贝
+        snapshot = snapshot_tree(
+            src, self.scheduler, follow_symlinks=True, errors=result.errors
+        )
+        os.makedirs(dst, exist_ok=True)
+
+        workers = self.max_workers or max(
+            self.scheduler.limit_for(self.scheduler.device_of(src)),
+            self.scheduler.limit_for(self.scheduler.device_of(dst)),
+        )
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Copy") as executor:
+            dir_stats = self._make_dirs(src, dst, snapshot, executor, result)
+            self._copy_files(src, dst, snapshot, executor, workers * 4, result, progress_callback)
+
+        if self.preserve_metadata:
+            # 子目录在前，写入文件不会再改变已设置的目录时间
+            for rel_dir, st in sorted(dir_stats.items(), key=lambda item: -item[0].count("/")):
+                path = os.path.join(dst, *rel_dir.split("/")) if rel_dir else dst
+                try:
+                    os.chmod(path, stat.S_IMODE(st.st_mode))
+                    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+                except OSError as e:
+                    result.errors.append((rel_dir or ".", str(e)))
+
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _make_dirs(self, src: str, dst: str, snapshot, executor, result: CopyResult) -> Dict[str, os.stat_result]:
+        """按层级并行创建目录（同一层互不依赖），返回源目录的 stat"""
+        levels: Dict[int, List[str]] = {}
+        for rel_dir in snapshot:
+            if rel_dir:
+                levels.setdefault(rel_dir.count("/"), []).append(rel_dir)
+
+        def make(rel_dir: str):
+            parts = rel_dir.split("/") if rel_dir else []
+            try:
+                st = os.stat(os.path.join(src, *parts))
+                if rel_dir:
+                    try:
+                        os.mkdir(os.path.join(dst, *parts))
+                    except FileExistsError:
+                        pass
+                return rel_dir, st
+            except OSError as e:
+                return rel_dir, e
+
+        dir_stats = {}
+        for rel_dirs in [[""]] + [levels[depth] for depth in sorted(levels)]:
+            for rel_dir, outcome in executor.map(make, rel_dirs):
+                if isinstance(outcome, Exception):
+                    result.errors.append((rel_dir or ".", str(outcome)))
+                    continue
+                dir_stats[rel_dir] = outcome
+                if rel_dir:
+                    result.dirs += 1
+        return dir_stats
+
+    def _copy_files(self, src: str, dst: str, snapshot, executor, max_pending: int,
+                    result: CopyResult, progress_callback):
+        """并行拷贝文件，小文件打包成批次"""
+        total = sum(len(files) for files in snapshot.values())
+        methods = Counter()
+        pending = set()
+        done = 0
+
+        def run(rel_paths: List[str]):
+            outcomes = []
+            # 占用源和目标设备的并发名额
+            with self.scheduler.slot(src, dst):
+                for rel_path in rel_paths:
+                    parts = rel_path.split("/")
+                    try:
+                        outcomes.append((rel_path, self.copy_file(
+                            os.path.join(src, *parts), os.path.join(dst, *parts)
+                        )))
+                    except OSError as e:
+                        outcomes.append((rel_path, e))
+            return outcomes
+
+        def batches():
+            batch = []
+            for rel_dir, files in snapshot.items():
+                for name, (size, _) in files.items():
+                    rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                    if size >= SMALL_COPY_SIZE:
+                        yield [rel_path]
+                        continue
+                    batch.append(rel_path)
+                    if len(batch) >= SMALL_COPY_BATCH:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+
+        queue = batches()
+        while True:
+            for rel_paths in queue:
+                pending.add(executor.submit(run, rel_paths))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for rel_path, outcome in future.result():
+                    if isinstance(outcome, Exception):
+                        result.errors.append((rel_path, str(outcome)))
+                    else:
+                        size, method = outcome
+                        result.files += 1
+                        result.bytes += size
+                        methods[method] += 1
+                    done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+        result.methods = dict(methods)
@@ -3,10 +3,13 @@ import sqlite3
 from typing import List, Dict, Any
 import os
 from pathlib import Path
+from app.utils.db_pool import get_pool
+from app.utils.db_migrations import ensure_schema
 
 class DatabaseManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
         # 获取当前文件所在目录的根目录路径
         self.root_dir = Path(__file__).parent.parent.parent
         self.initialize_db()
@@ -17,14 +20,8 @@ class DatabaseManager:
             # 确保数据库目录存在
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            # 使用 Path 来构建正确的文件路径
-            schema_path = self.root_dir / 'app' / 'database' / 'schema.sql'
-            
-            with open(schema_path, 'r', encoding='utf-8') as schema_file:
-                schema = schema_file.read()
-                
-            with sqlite3.connect(self.db_path) as conn:
-                conn.executescript(schema)
+            # 应用数据库迁移（每个进程只执行一次）
+            ensure_schema(self.db_path)
                 
             # 验证表结构
             self.check_tables()
@@ -35,7 +32,7 @@ class DatabaseManager:
             
     def check_tables(self):
         """检查数据库表结构"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             # 检查表是否存在
@@ -48,8 +45,7 @@ class DatabaseManager:
     
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """执行SQL查询"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             if params:
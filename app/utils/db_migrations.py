@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, List, Set, Tuple, Union
+
+from app.utils.db_pool import get_pool
+
+SCHEMA_PATH = Path(__file__).parent.parent / 'database' / 'schema.sql'
+
+
+def _base_schema(conn: sqlite3.Connection):
+    """基础表结构（原 schema.sql）"""
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        _execute_script(conn, f.read())
+
+
+# 资产设置相关表（原 AssetSettingsManager._init_db 中的 DDL）
+_ASSET_SETTINGS_SQL = """
+CREATE TABLE IF NOT EXISTS asset_types (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,  -- 不区分大小写
+    display_name TEXT NOT NULL COLLATE NOCASE
+);
+
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asset_type_id INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    description TEXT COLLATE NOCASE,
+    sort_order INTEGER DEFAULT 0,
+    FOREIGN KEY (asset_type_id) REFERENCES asset_types (id),
+    UNIQUE (asset_type_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asset_type_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    sort_order INTEGER DEFAULT 0,
+    FOREIGN KEY (asset_type_id) REFERENCES asset_types (id),
+    UNIQUE (asset_type_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS color_marks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asset_type_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    color TEXT NOT NULL,
+    FOREIGN KEY (asset_type_id) REFERENCES asset_types (id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS rating_settings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asset_type_id INTEGER NOT NULL UNIQUE,
+    max_rating INTEGER NOT NULL DEFAULT 5,
+    allow_half_rating BOOLEAN NOT NULL DEFAULT 1,
+    FOREIGN KEY (asset_type_id) REFERENCES asset_types (id)
+);
+
+INSERT OR IGNORE INTO asset_types (name, display_name) VALUES
+    ('ae_template', 'AE模板'),
+    ('video', '视频素材'),
+    ('audio', '音效素材'),
+    ('lut', 'LUT');
+"""
+
+# 项目磁盘编号数值列：纯数字的 disk_id 转为整数，其余排在最后
+_PROJECT_DISK_ORDER_SQL = """
+ALTER TABLE projects ADD COLUMN disk_no INTEGER GENERATED ALWAYS AS (
+    CASE WHEN disk_id <> '' AND disk_id NOT GLOB '*[^0-9]*'
+         THEN CAST(disk_id AS INTEGER)
+         ELSE 9223372036854775807
+    END
+) VIRTUAL;
+
+CREATE INDEX IF NOT EXISTS idx_projects_disk_order
+ON projects(disk_no, project_date DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_projects_disk_id ON projects(disk_id);
+"""
+
+# 项目全文索引：trigram 分词同时支持中文与英文子串匹配
+_PROJECT_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+    project_name, notes, project_path, filename,
+    content='projects', content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN
+    INSERT INTO projects_fts(rowid, project_name, notes, project_path, filename)
+    VALUES (new.id, new.project_name, new.notes, new.project_path, new.filename);
+END;
+
+CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN
+    INSERT INTO projects_fts(projects_fts, rowid, project_name, notes, project_path, filename)
+    VALUES ('delete', old.id, old.project_name, old.notes, old.project_path, old.filename);
+END;
+
+CREATE TRIGGER IF NOT EXISTS projects_fts_au
+AFTER UPDATE OF project_name, notes, project_path, filename ON projects BEGIN
+    INSERT INTO projects_fts(projects_fts, rowid, project_name, notes, project_path, filename)
+    VALUES ('delete', old.id, old.project_name, old.notes, old.project_path, old.filename);
+    INSERT INTO projects_fts(rowid, project_name, notes, project_path, filename)
+    VALUES (new.id, new.project_name, new.notes, new.project_path, new.filename);
+END;
+
+INSERT INTO projects_fts(projects_fts) VALUES ('rebuild');
+"""
+
+
+def _project_fts(conn: sqlite3.Connection):
+    """创建项目全文索引（SQLite 不支持 FTS5/trigram 时跳过，搜索回退为 LIKE）"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError as e:
+        print(f"[WARNING] 当前 SQLite 不支持 FTS5 trigram，跳过全文索引: {str(e)}")
+        return
+    _execute_script(conn, _PROJECT_FTS_SQL)
+
+
+# 拷卡任务日志：记录每个文件的拷贝/校验状态和已落盘的字节数，用于中断后续传
+_OFFLOAD_JOURNAL_SQL = """
+CREATE TABLE IF NOT EXISTS offload_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    destinations TEXT NOT NULL,  -- JSON 数组
+    algorithm TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',  -- running/completed/failed
+    total_files INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_offload_jobs_source ON offload_jobs(source, status);
+
+CREATE TABLE IF NOT EXISTS offload_files (
+    job_id INTEGER NOT NULL,
+    rel_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',  -- pending/copying/copied/verified/failed
+    bytes_done INTEGER NOT NULL DEFAULT 0,
+    source_hash TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, rel_path),
+    FOREIGN KEY (job_id) REFERENCES offload_jobs(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+"""
+
+# 校验历史：每次校验/对比/拷卡一条记录，只保存有问题的文件，
+# 按磁盘编号和项目路径（备份所在路径）建索引，便于查询项目最近一次校验
+_VERIFICATION_HISTORY_SQL = """
+CREATE TABLE IF NOT EXISTS verification_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,  -- verify/diff/offload
+    disk_id TEXT,
+    project_path TEXT NOT NULL,  -- 被校验的备份路径
+    source TEXT NOT NULL,
+    algorithm TEXT,
+    ok INTEGER NOT NULL,
+    total_files INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    mismatched INTEGER NOT NULL DEFAULT 0,
+    missing INTEGER NOT NULL DEFAULT 0,
+    extra INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    elapsed REAL NOT NULL DEFAULT 0,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_verification_runs_disk
+ON verification_runs(disk_id, finished_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_verification_runs_path
+ON verification_runs(project_path, finished_at DESC);
+
+CREATE TABLE IF NOT EXISTS verification_results (
+    run_id INTEGER NOT NULL,
+    rel_path TEXT NOT NULL,
+    status TEXT NOT NULL,  -- mismatched/missing/extra/error
+    detail TEXT,
+    PRIMARY KEY (run_id, rel_path, status),
+    FOREIGN KEY (run_id) REFERENCES verification_runs(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+"""
+
+# 文件夹模板层级闭包表：每对 (祖先, 后代) 一行，节点到自身的深度为 0，
+# 由触发器随 folder_templates 的插入、删除和移动（修改 parent_id）同步维护
+_FOLDER_TEMPLATE_PATHS_SQL = """
+CREATE TABLE IF NOT EXISTS folder_template_paths (
+    ancestor_id INTEGER NOT NULL,
+    descendant_id INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_folder_template_paths_descendant
+ON folder_template_paths(descendant_id, depth);
+
+CREATE TRIGGER IF NOT EXISTS trig_folder_templates_paths_insert
+AFTER INSERT ON folder_templates
+BEGIN
+    INSERT INTO folder_template_paths (ancestor_id, descendant_id, depth)
+    SELECT ancestor_id, NEW.id, depth + 1 FROM folder_template_paths
+    WHERE descendant_id = NEW.parent_id
+    UNION ALL
+    SELECT NEW.id, NEW.id, 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trig_folder_templates_paths_delete
+AFTER DELETE ON folder_templates
+BEGIN
+    DELETE FROM folder_template_paths WHERE descendant_id = OLD.id;
+    DELETE FROM folder_template_paths WHERE ancestor_id = OLD.id;
+END;
+
+-- 不允许移动到自身或自己的子文件夹下
+CREATE TRIGGER IF NOT EXISTS trig_folder_templates_paths_check
+BEFORE UPDATE OF parent_id ON folder_templates
+WHEN NEW.parent_id IS NOT NULL AND EXISTS (
+    SELECT 1 FROM folder_template_paths
+    WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+)
+BEGIN
+    SELECT RAISE(ABORT, '不能移动到自身或子文件夹下');
+END;
+
+-- 移动子树：先断开子树与原祖先的关系，再连接到新父节点的所有祖先
+CREATE TRIGGER IF NOT EXISTS trig_folder_templates_paths_move
+AFTER UPDATE OF parent_id ON folder_templates
+WHEN OLD.parent_id IS NOT NEW.parent_id
+BEGIN
+    DELETE FROM folder_template_paths
+    WHERE descendant_id IN (
+        SELECT descendant_id FROM folder_template_paths WHERE ancestor_id = NEW.id
+    )
+    AND ancestor_id NOT IN (
+        SELECT descendant_id FROM folder_template_paths WHERE ancestor_id = NEW.id
+    );
+    INSERT INTO folder_template_paths (ancestor_id, descendant_id, depth)
+    SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+    FROM folder_template_paths AS above
+    CROSS JOIN folder_template_paths AS below
+    WHERE above.descendant_id = NEW.parent_id AND below.ancestor_id = NEW.id;
+END;
+
+-- 回填已有节点
+INSERT OR IGNORE INTO folder_template_paths (ancestor_id, descendant_id, depth)
+WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM folder_templates
+    UNION ALL
+    SELECT paths.ancestor_id, f.id, paths.depth + 1
+    FROM paths
+    INNER JOIN folder_templates f ON f.parent_id = paths.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM paths;
+"""
+
+def _normalize_project_paths(conn: sqlite3.Connection):
+    """已有项目路径按 os.path.normpath 规范化（与 project_manager.normalize_project_path 一致），
+    校验历史按同样规则保存路径，两者才能直接用 = 关联"""
+    updates = []
+    for project_id, path in conn.execute("SELECT id, project_path FROM projects WHERE project_path <> ''"):
+        normalized = os.path.normpath(path)
+        if normalized != path:
+            updates.append((normalized, project_id))
+    conn.executemany("UPDATE projects SET project_path = ? WHERE id = ?", updates)
+
+
+# 迁移列表：(版本号, 说明, SQL 脚本或接收连接的函数)
+# 只能在末尾追加新版本，已发布的迁移不要修改
+MIGRATIONS: List[Tuple[int, str, Union[str, Callable[[sqlite3.Connection], None]]]] = [
+    (1, "基础表结构", _base_schema),
+    (2, "资产设置表", _ASSET_SETTINGS_SQL),
+    (3, "项目磁盘编号排序列", _PROJECT_DISK_ORDER_SQL),
+    (4, "项目全文索引", _project_fts),
+    (5, "拷卡任务日志", _OFFLOAD_JOURNAL_SQL),
+    (6, "校验历史", _VERIFICATION_HISTORY_SQL),
+    (7, "文件夹模板闭包表", _FOLDER_TEMPLATE_PATHS_SQL),
+    (8, "项目路径规范化", _normalize_project_paths),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_migrated: Set[str] = set()
+_migrate_lock = threading.Lock()
+
+
+def _execute_script(conn: sqlite3.Connection, script: str):
+    """在当前事务中逐条执行脚本（executescript 会隐式提交）"""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """读取数据库的 user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def ensure_schema(db_path: str):
+    """将数据库迁移到最新版本
+
+    每个数据库文件在每个进程中只检查一次；版本已是最新时不做任何改动。
+    """
+    key = os.path.abspath(db_path)
+    if key in _migrated:
+        return
+
+    with _migrate_lock:
+        if key in _migrated:
+            return
+
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        conn = get_pool(key).get()
+
+        if get_schema_version(conn) < LATEST_VERSION:
+            _apply_migrations(conn)
+
+        _migrated.add(key)
+
+
+def _apply_migrations(conn: sqlite3.Connection):
+    """逐个应用未执行的迁移，每个迁移一个事务"""
+    for version, description, migration in MIGRATIONS:
+        # 加写锁后重新读取版本，避免多个进程重复迁移
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            print(f"[DEBUG] 应用数据库迁移 {version}: {description}")
+            if callable(migration):
+                migration(conn)
+            else:
+                _execute_script(conn, migration)
+
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"[ERROR] 数据库迁移 {version} 失败: {str(e)}")
+            raise RuntimeError(f"数据库迁移 {version} 失败: {e}")
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, List
+
+# 每个连接应用一次的 PRAGMA 设置
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000",  # 约 20MB 页缓存
+    "PRAGMA busy_timeout = 5000",
+)
+
+# 预编译语句缓存大小
+STATEMENT_CACHE_SIZE = 256
+
+
+class _ThreadConnection:
+    """线程持有的连接及事务嵌套深度（存放在 threading.local 中）"""
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.depth = 0
+
+
+class ConnectionPool:
+    """SQLite 连接池 - 每个线程持有一个长连接
+
+    线程结束时 threading.local 中的持有对象被回收，
+    通过 weakref.finalize 关闭该线程的连接并从池中移除。
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        # 回收持有对象时可能在已持有锁的线程中触发 _release
+        self._lock = threading.RLock()
+        self._connections: List[sqlite3.Connection] = []
+        self._wal_applied = False
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建并配置新连接"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=5.0,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+
+        # WAL 模式写入数据库文件，只需设置一次
+        with self._lock:
+            if not self._wal_applied:
+                conn.execute("PRAGMA journal_mode = WAL")
+                self._wal_applied = True
+            self._connections.append(conn)
+
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def open_connection(self) -> sqlite3.Connection:
+        """创建不属于任何线程的独立连接（调用方负责串行使用，close_all 时关闭）"""
+        return self._create_connection()
+
+    def _holder(self) -> _ThreadConnection:
+        """获取当前线程的连接持有对象，没有时创建连接"""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            conn = self._create_connection()
+            holder = _ThreadConnection(conn)
+            # 回调不能引用 holder，否则持有对象永远不会被回收
+            weakref.finalize(holder, self._release, conn)
+            self._local.holder = holder
+        return holder
+
+    def _release(self, conn: sqlite3.Connection):
+        """关闭已结束线程的连接"""
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except Exception as e:
+            print(f"[ERROR] 关闭数据库连接失败: {str(e)}")
+
+    def get(self) -> sqlite3.Connection:
+        """获取当前线程的连接"""
+        return self._holder().conn
+
+    @contextmanager
+    def connection(self):
+        """获取当前线程的连接，退出时提交或回滚
+
+        支持嵌套使用，只有最外层负责提交事务。
+        """
+        holder = self._holder()
+        conn = holder.conn
+        holder.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            holder.depth -= 1
+            if holder.depth == 0 and conn.in_transaction:
+                conn.rollback()
+            raise
+        else:
+            holder.depth -= 1
+            if holder.depth == 0 and conn.in_transaction:
+                conn.commit()
+
+    def close_all(self):
+        """关闭池中所有连接"""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception as e:
+                    print(f"[ERROR] 关闭数据库连接失败: {str(e)}")
+            self._connections.clear()
+        # 其他线程的 threading.local 无法直接清理，改为更换容器
+        self._local = threading.local()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """获取指定数据库文件的共享连接池"""
+    key = os.path.abspath(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(key)
+                _pools[key] = pool
+    return pool
+
+
+def close_all_pools():
+    """关闭所有连接池"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
@@ -1,15 +0,0 @@
-import os
-import shutil
-
-def copy_folder_contents(src, dst):
-    """复制文件夹内容"""
-    if not os.path.exists(dst):
-        os.makedirs(dst)
-    
-    for item in os.listdir(src):
-        s = os.path.join(src, item)
-        d = os.path.join(dst, item)
-        if os.path.isdir(s):
-            shutil.copytree(s, d, dirs_exist_ok=True)
-        else:
-            shutil.copy2(s, d) 
\ No newline at end of file
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.utils.copy_engine import CopyEngine, CopyResult
+from app.utils.io_scheduler import IOScheduler, get_scheduler
+
+SETTINGS_PATH = 'config/workflow_settings.json'
+
+# 界面上的项目类型 -> folder_structures 中的键
+PROJECT_TYPES = {
+    "简易项目": "simple",
+    "标准项目": "standard",
+    "大型项目": "large",
+}
+
+# 相机文件夹下按相机创建子文件夹；剪辑模板复制到工程文件夹
+CAMERA_FOLDER = "01_Camera"
+PROJECT_FOLDER = "04_Project"
+
+# 批量创建时同时处理的项目数上限（实际并发受目标设备限制）
+PLAN_WORKERS = 8
+
+_settings_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+_settings_lock = threading.Lock()
+
+
+def load_workflow_settings(path: str = SETTINGS_PATH) -> Dict:
+    """读取 workflow_settings.json，文件未修改时直接返回缓存（调用方不要修改返回值）"""
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _settings_cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with open(key, 'r', encoding='utf-8') as f:
+        settings = json.load(f)
+    with _settings_lock:
+        _settings_cache[key] = (stamp, settings)
+    return settings
+
+
+def project_root(base_path: str, project_name: str, date_str: str) -> str:
+    """项目根目录：<工程路径>/<日期>_<项目名称>"""
+    return os.path.join(base_path, f"{date_str}_{project_name}")
+
+
+@dataclass
+class PlanResult:
+    """执行计划的结果（dry_run 时 created 为将要创建的目录）"""
+    root: str
+    created: List[str] = field(default_factory=list)
+    existing: List[str] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    template: Optional[CopyResult] = None
+    dry_run: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and (self.template is None or self.template.ok)
+
+
+@dataclass(frozen=True)
+class FolderPlan:
+    """编译后的文件夹创建计划
+
+    目录已去重并按父目录在前排序，与项目名称和日期无关，
+    同一个计划可以应用到多个项目；相机子文件夹名称在应用时加上日期前缀。
+    """
+    dirs: Tuple[str, ...]                     # 相对项目根目录，用 / 分隔
+    dated_dirs: Tuple[Tuple[str, str], ...]   # (父目录, 日期之后的名称)
+    template: Optional[str] = None            # 剪辑模板目录
+    template_target: Optional[str] = None     # 模板复制到的相对目录
+
+    def render(self, date_str: str) -> List[str]:
+        """按日期生成完整的相对目录列表"""
+        rendered = list(self.dirs)
+        seen = set(rendered)
+        for parent, suffix in self.dated_dirs:
+            rel_dir = f"{parent}/{date_str}_{suffix}"
+            if rel_dir not in seen:
+                seen.add(rel_dir)
+                rendered.append(rel_dir)
+        return rendered
+
+    def apply(self, root: str, date_str: str, dry_run: bool = False,
+              copy_engine: Optional[CopyEngine] = None) -> PlanResult:
+        """在 root 下创建目录并复制剪辑模板"""
+        result = self._make_dirs(root, date_str, dry_run)
+        if self.template and not dry_run and not result.errors:
+            self._copy_template(root, result, copy_engine or CopyEngine())
+        return result
+
+    def _make_dirs(self, root: str, date_str: str, dry_run: bool) -> PlanResult:
+        """创建目录
+
+        父目录总在子目录之前，因此每个目录只需一次 mkdir，
+        已存在的目录通过 FileExistsError 识别，不做额外的存在性检查。
+        """
+        result = PlanResult(root, dry_run=dry_run)
+        paths = [root] + [os.path.join(root, *rel_dir.split("/")) for rel_dir in self.render(date_str)]
+        if dry_run:
+            for path in paths:
+                (result.existing if os.path.isdir(path) else result.created).append(path)
+            return result
+
+        try:
+            os.makedirs(os.path.dirname(root), exist_ok=True)
+        except OSError as e:
+            result.errors.append((root, str(e)))
+            return result
+        failed = set()
+        for path in paths:
+            if os.path.dirname(path) in failed:
+                failed.add(path)
+                continue
+            try:
+                os.mkdir(path)
+                result.created.append(path)
+            except FileExistsError:
+                result.existing.append(path)
+            except OSError as e:
+                failed.add(path)
+                result.errors.append((path, str(e)))
+        return result
+
+    def _copy_template(self, root: str, result: PlanResult, copy_engine: CopyEngine):
+        target = os.path.join(root, *self.template_target.split("/"))
+        result.template = copy_engine.copy_tree(self.template, target)
+
+    def apply_many(self, base_path: str, projects: Sequence[Tuple[str, str]],
+                   dry_run: bool = False, max_workers: int = PLAN_WORKERS,
+                   scheduler: Optional[IOScheduler] = None) -> List[PlanResult]:
+        """将计划应用到多个项目
+        :param projects: [(项目名称, 日期)]，结果顺序与之相同
+        """
+        return apply_plans(
+            base_path, [(self, name, date_str) for name, date_str in projects],
+            dry_run=dry_run, max_workers=max_workers, scheduler=scheduler,
+        )
+
+
+def apply_plans(base_path: str, jobs: Sequence[Tuple[FolderPlan, str, str]],
+                dry_run: bool = False, max_workers: int = PLAN_WORKERS,
+                scheduler: Optional[IOScheduler] = None,
+                progress_callback: Optional[Callable[[int, int], None]] = None) -> List[PlanResult]:
+    """并行执行多个项目的计划，单个项目失败不影响其他项目
+    :param jobs: [(计划, 项目名称, 日期)]，结果顺序与之相同
+    :param progress_callback: progress_callback(已完成项目数, 总项目数)
+    """
+    scheduler = scheduler or get_scheduler()
+    copy_engine = CopyEngine(scheduler)
+
+    def apply_one(job: Tuple[FolderPlan, str, str]) -> PlanResult:
+        plan, name, date_str = job
+        root = project_root(base_path, name, date_str)
+        try:
+            # 目录创建占用目标设备名额；模板复制由拷贝引擎自行调度
+            with scheduler.slot(base_path):
+                result = plan._make_dirs(root, date_str, dry_run)
+            if plan.template and not dry_run and not result.errors:
+                plan._copy_template(root, result, copy_engine)
+            return result
+        except Exception as e:
+            return PlanResult(root, errors=[(root, str(e))], dry_run=dry_run)
+
+    results: List[Optional[PlanResult]] = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs) or 1))) as executor:
+        futures = {executor.submit(apply_one, job): index for index, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(done, len(jobs))
+    return results
+
+
+def compile_plan(project_type: str, cameras: Iterable[Tuple[str, str]] = (),
+                 language: Optional[str] = None, editing_software: Optional[str] = None,
+                 settings: Optional[Dict] = None,
+                 extra_dirs: Iterable[str] = ()) -> FolderPlan:
+    """将项目类型、语言和相机列表编译为文件夹计划
+    :param project_type: 界面名称（如“标准项目”）或 folder_structures 中的键
+    :param cameras: [(相机型号, 标识)]，型号为空的行忽略
+    :param extra_dirs: 额外的相对目录（用 / 分隔），如来自文件夹模板
+    """
+    settings = settings or load_workflow_settings()
+    structure_key = PROJECT_TYPES.get(project_type, project_type)
+    structures = settings.get("folder_structures", {})
+    if structure_key not in structures:
+        raise ValueError(f"未知的项目类型: {project_type}")
+    language = language or settings.get("folder_language", "english")
+    folder_names = settings.get("folder_names", {}).get(language)
+    if folder_names is None:
+        raise ValueError(f"未配置文件夹语言: {language}")
+
+    dirs: List[str] = []
+    seen = set()
+
+    def add(rel_dir: str):
+        # 逐级补齐父目录，保证父目录在前
+        parts = [part for part in rel_dir.replace("\\", "/").split("/") if part]
+        for depth in range(1, len(parts) + 1):
+            path = "/".join(parts[:depth])
+            if path not in seen:
+                seen.add(path)
+                dirs.append(path)
+
+    for folder in structures[structure_key]:
+        add(folder_names.get(folder, folder))
+
+    dated_dirs: List[Tuple[str, str]] = []
+    if CAMERA_FOLDER in structures[structure_key]:
+        camera_folder = folder_names.get(CAMERA_FOLDER, CAMERA_FOLDER)
+        for model, tag in cameras:
+            model = (model or "").strip()
+            tag = (tag or "").strip()
+            if not model:
+                continue
+            entry = (camera_folder, f"{model}_{tag}" if tag else model)
+            if entry not in dated_dirs:
+                dated_dirs.append(entry)
+
+    for rel_dir in extra_dirs:
+        add(rel_dir)
+
+    template = template_target = None
+    templates_path = settings.get("editing_templates_path")
+    if editing_software and templates_path:
+        software_path = os.path.join(templates_path, editing_software)
+        if os.path.isdir(software_path):
+            template = software_path
+            template_target = folder_names.get(PROJECT_FOLDER, PROJECT_FOLDER)
+            add(template_target)
+
+    return FolderPlan(tuple(dirs), tuple(dated_dirs), template, template_target)
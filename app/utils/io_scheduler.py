@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+SETTINGS_PATH = 'config/workflow_settings.json'
+
+# 各类磁盘的默认并发数：机械盘顺序读写最快，NVMe 需要较深的并发
+DEVICE_PRESETS = {
+    "hdd": 1,
+    "ssd": 4,
+    "nvme": 16,
+}
+
+DEFAULT_SETTINGS = {
+    "default_profile": "ssd",
+    "detect_rotational": True,
+    "profiles": DEVICE_PRESETS,
+    "devices": {},  # 路径 -> 预设名称或并发数
+}
+
+
+def _nearest_existing(path: str) -> str:
+    """返回路径本身或最近的已存在上级目录"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def _is_rotational_linux(dev: int) -> Optional[bool]:
+    """读取块设备的 rotational 标记"""
+    base = f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}"
+    # 分区没有 queue 目录，需要查看所属磁盘
+    for candidate in (base, os.path.join(base, "..")):
+        try:
+            with open(os.path.join(candidate, "queue", "rotational"), 'r') as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def _is_rotational_windows(path: str) -> Optional[bool]:
+    """通过 IOCTL_STORAGE_QUERY_PROPERTY 查询卷所在磁盘是否有寻道开销"""
+    import ctypes
+    from ctypes import wintypes
+
+    class STORAGE_PROPERTY_QUERY(ctypes.Structure):
+        _fields_ = [
+            ("PropertyId", wintypes.DWORD),
+            ("QueryType", wintypes.DWORD),
+            ("AdditionalParameters", wintypes.BYTE * 1),
+        ]
+
+    class DEVICE_SEEK_PENALTY_DESCRIPTOR(ctypes.Structure):
+        _fields_ = [
+            ("Version", wintypes.DWORD),
+            ("Size", wintypes.DWORD),
+            ("IncursSeekPenalty", wintypes.BOOLEAN),
+        ]
+
+    IOCTL_STORAGE_QUERY_PROPERTY = 0x002D1400
+    StorageDeviceSeekPenaltyProperty = 7
+    PropertyStandardQuery = 0
+    FILE_SHARE_READ_WRITE = 0x1 | 0x2
+    OPEN_EXISTING = 3
+    INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    kernel32.CreateFileW.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+        wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE,
+    ]
+    kernel32.DeviceIoControl.restype = wintypes.BOOL
+    kernel32.DeviceIoControl.argtypes = [
+        wintypes.HANDLE, wintypes.DWORD, wintypes.LPVOID, wintypes.DWORD,
+        wintypes.LPVOID, wintypes.DWORD, ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID,
+    ]
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+    # 路径 -> 挂载点（如 D:\）-> 卷名（\\?\Volume{GUID}\），文件夹挂载点也能正确识别
+    mount_point = ctypes.create_unicode_buffer(260)
+    if not kernel32.GetVolumePathNameW(path, mount_point, len(mount_point)):
+        return None
+    volume_name = ctypes.create_unicode_buffer(64)
+    if not kernel32.GetVolumeNameForVolumeMountPointW(
+            mount_point.value, volume_name, len(volume_name)):
+        return None  # 网络驱动器等没有卷名
+
+    # 打开卷设备时去掉末尾的反斜杠；查询属性不需要读写权限
+    handle = kernel32.CreateFileW(
+        volume_name.value.rstrip("\\"), 0, FILE_SHARE_READ_WRITE, None, OPEN_EXISTING, 0, None
+    )
+    if handle in (None, INVALID_HANDLE_VALUE):
+        return None
+    try:
+        query = STORAGE_PROPERTY_QUERY(StorageDeviceSeekPenaltyProperty, PropertyStandardQuery)
+        descriptor = DEVICE_SEEK_PENALTY_DESCRIPTOR()
+        returned = wintypes.DWORD()
+        # 跨多块磁盘的卷（条带、跨区）不支持该查询，返回失败
+        if not kernel32.DeviceIoControl(
+                handle, IOCTL_STORAGE_QUERY_PROPERTY,
+                ctypes.byref(query), ctypes.sizeof(query),
+                ctypes.byref(descriptor), ctypes.sizeof(descriptor),
+                ctypes.byref(returned), None):
+            return None
+        return bool(descriptor.IncursSeekPenalty)
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _is_rotational(dev: int, path: Optional[str] = None) -> Optional[bool]:
+    """判断设备是否为机械盘，无法判断时返回 None
+
+    Linux 按设备号读取 sysfs；Windows 的 st_dev 只是卷序列号，需要用设备上的路径查询。
+    """
+    try:
+        if sys.platform.startswith('linux'):
+            return _is_rotational_linux(dev)
+        if sys.platform == 'win32' and path:
+            return _is_rotational_windows(path)
+    except Exception as e:
+        print(f"[WARNING] 检测磁盘类型失败: {str(e)}")
+    return None
+
+
+class IOScheduler:
+    """按物理设备调度文件 I/O
+
+    路径按所在设备（st_dev）分组，每个设备有独立的并发上限，
+    不同设备之间并行执行。
+    """
+    def __init__(self, settings: Optional[Dict] = None):
+        settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.profiles = {**DEVICE_PRESETS, **settings.get("profiles", {})}
+        self.default_limit = self._resolve_limit(settings.get("default_profile", "ssd"))
+        self.detect_rotational = settings.get("detect_rotational", True)
+        self._overrides = settings.get("devices", {})
+        self._override_devs: Optional[Dict[int, int]] = None
+        self._dev_cache: Dict[str, int] = {}
+        self._dev_paths: Dict[int, str] = {}  # 设备号 -> 设备上的任一已存在路径，用于检测磁盘类型
+        self._limits: Dict[int, int] = {}
+        self._semaphores: Dict[int, threading.BoundedSemaphore] = {}
+        self._executors: Dict[int, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def _resolve_limit(self, value) -> int:
+        if isinstance(value, int):
+            return max(1, value)
+        return self.profiles.get(str(value).lower(), DEVICE_PRESETS["ssd"])
+
+    def device_of(self, path: str) -> int:
+        """返回路径所在设备号（路径不存在时使用最近的上级目录）"""
+        path = os.path.abspath(path)
+        # 按目录缓存，目录本身可能是挂载点，因此不能直接取上级目录
+        directory = path if os.path.isdir(path) else os.path.dirname(path)
+        dev = self._dev_cache.get(directory)
+        if dev is None:
+            existing = _nearest_existing(directory)
+            dev = os.stat(existing).st_dev
+            self._dev_cache[directory] = dev
+            self._dev_paths.setdefault(dev, existing)
+        return dev
+
+    def limit_for(self, dev: int) -> int:
+        """设备的并发上限：配置覆盖 > 自动检测机械盘 > 默认预设"""
+        limit = self._limits.get(dev)
+        if limit is not None:
+            return limit
+        with self._lock:
+            if self._override_devs is None:
+                self._override_devs = {}
+                for path, value in self._overrides.items():
+                    try:
+                        self._override_devs[os.stat(path).st_dev] = self._resolve_limit(value)
+                    except OSError as e:
+                        print(f"[WARNING] I/O 调度配置的路径不可用: {path}: {str(e)}")
+
+            limit = self._override_devs.get(dev)
+            if limit is None and self.detect_rotational and _is_rotational(dev, self._dev_paths.get(dev)):
+                limit = self.profiles["hdd"]
+            if limit is None:
+                limit = self.default_limit
+            self._limits[dev] = limit
+        return limit
+
+    def _semaphore(self, dev: int) -> threading.BoundedSemaphore:
+        semaphore = self._semaphores.get(dev)
+        if semaphore is None:
+            limit = self.limit_for(dev)
+            with self._lock:
+                semaphore = self._semaphores.setdefault(dev, threading.BoundedSemaphore(limit))
+        return semaphore
+
+    @contextmanager
+    def slot(self, *paths: str):
+        """占用路径所在设备的并发名额
+
+        涉及多个设备时按设备号顺序获取，避免相互等待造成死锁。
+        """
+        devs = sorted({self.device_of(path) for path in paths})
+        acquired = []
+        try:
+            for dev in devs:
+                semaphore = self._semaphore(dev)
+                semaphore.acquire()
+                acquired.append(semaphore)
+            yield
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+    def submit(self, path: str, fn: Callable, *args, **kwargs) -> Future:
+        """在路径所在设备的线程池中执行任务"""
+        dev = self.device_of(path)
+        executor = self._executors.get(dev)
+        if executor is None:
+            limit = self.limit_for(dev)
+            with self._lock:
+                executor = self._executors.get(dev)
+                if executor is None:
+                    executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"IO-{dev}")
+                    self._executors[dev] = executor
+        return executor.submit(self._run_in_slot, path, fn, args, kwargs)
+
+    def _run_in_slot(self, path: str, fn: Callable, args, kwargs):
+        # 与 slot() 共用名额，线程池之外的操作也计入设备并发
+        with self.slot(path):
+            return fn(*args, **kwargs)
+
+    def shutdown(self):
+        """关闭所有设备线程池"""
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_scheduler: Optional[IOScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def load_scheduler_settings(path: str = SETTINGS_PATH) -> Dict:
+    """读取 workflow_settings.json 中的 io_scheduler 配置"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("io_scheduler", {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"[ERROR] 读取 I/O 调度配置失败: {str(e)}")
+        return {}
+
+
+def get_scheduler() -> IOScheduler:
+    """获取全局共享的 I/O 调度器"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = IOScheduler(load_scheduler_settings())
+    return _scheduler
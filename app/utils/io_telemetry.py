@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# 遥测日志目录（JSON Lines，每行一个事件）
+TELEMETRY_LOG_DIR = os.path.join('config', 'logs')
+
+# 推送给界面的最小间隔（秒）
+UI_INTERVAL = 0.25
+
+# 速度滑动平均系数，越大越跟随瞬时速度
+EMA_ALPHA = 0.3
+
+MB = 1024 * 1024
+
+
+@dataclass
+class TelemetrySnapshot:
+    """某一时刻的进度统计"""
+    job: str
+    phase: str
+    bytes_done: int
+    total_bytes: int
+    files_done: int
+    total_files: int
+    elapsed: float
+    mb_per_s: float
+    eta_seconds: Optional[float]
+    devices: Dict[str, float] = field(default_factory=dict)  # 设备 -> MB/s
+
+    @property
+    def files_remaining(self) -> int:
+        return max(0, self.total_files - self.files_done)
+
+    @property
+    def fraction(self) -> float:
+        if self.total_bytes:
+            return min(1.0, self.bytes_done / self.total_bytes)
+        if self.total_files:
+            return min(1.0, self.files_done / self.total_files)
+        return 0.0
+
+
+class _Rate:
+    """按采样间隔计算的滑动平均速度"""
+    def __init__(self):
+        self.total = 0
+        self._sampled_total = 0
+        self._sampled_at = time.monotonic()
+        self.ema: Optional[float] = None
+
+    def sample(self, now: float) -> float:
+        interval = now - self._sampled_at
+        if interval > 0:
+            rate = (self.total - self._sampled_total) / interval
+            self.ema = rate if self.ema is None else EMA_ALPHA * rate + (1 - EMA_ALPHA) * self.ema
+            self._sampled_total = self.total
+            self._sampled_at = now
+        return self.ema or 0.0
+
+    def reset(self):
+        self.__init__()
+
+
+class ProgressTelemetry:
+    """长时间 I/O 任务的进度遥测
+
+    工作线程调用 add_bytes / file_done 记录进度（线程安全，开销很小），
+    统计结果按 ui_interval 节流后推送给监听者，同时写入 JSONL 日志，
+    日志中还包含每个文件的耗时，便于事后分析调优。
+    """
+    def __init__(self, job: str, total_bytes: int = 0, total_files: int = 0,
+                 log_path: Optional[str] = None, ui_interval: float = UI_INTERVAL,
+                 write_log: bool = True):
+        self.job = job
+        self.phase = job
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.ui_interval = ui_interval
+        self.files_done = 0
+        self._listeners: List[Callable[[TelemetrySnapshot], None]] = []
+        self._rate = _Rate()
+        self._devices: Dict[str, _Rate] = {}
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+        self._log = None
+        if write_log:
+            self.log_path = log_path or os.path.join(
+                TELEMETRY_LOG_DIR, f"{job}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+            )
+            try:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+            except Exception as e:
+                print(f"[WARNING] 无法创建遥测日志: {str(e)}")
+
+    def add_listener(self, listener: Callable[[TelemetrySnapshot], None]):
+        """添加监听者，在工作线程中调用，需自行处理界面更新"""
+        self._listeners.append(listener)
+
+    def start_phase(self, phase: str, total_bytes: int, total_files: int):
+        """开始新阶段（如拷贝、校验），重置计数和速度"""
+        with self._lock:
+            self.phase = phase
+            self.total_bytes = total_bytes
+            self.total_files = total_files
+            self.files_done = 0
+            self._rate.reset()
+            self._devices.clear()
+        self._write({"event": "phase", "phase": phase, "total_bytes": total_bytes, "total_files": total_files})
+        self._emit(force=True)
+
+    def add_bytes(self, count: int, device: Optional[str] = None):
+        """记录已处理的字节数（计入总进度）"""
+        with self._lock:
+            self._rate.total += count
+            if device is not None:
+                self._device(device).total += count
+        self._emit()
+
+    def add_device_bytes(self, device: str, count: int):
+        """只记录设备吞吐，不计入总进度（如拷贝时各目标的写入量）"""
+        with self._lock:
+            self._device(device).total += count
+
+    def file_done(self, path: str, size: int, seconds: Optional[float] = None,
+                  device: Optional[str] = None, status: str = "ok"):
+        """记录一个文件处理完成"""
+        with self._lock:
+            self.files_done += 1
+        event = {"event": "file", "phase": self.phase, "path": path, "size": size, "status": status}
+        if seconds is not None:
+            event["seconds"] = round(seconds, 4)
+        if device is not None:
+            event["device"] = device
+        self._write(event)
+        self._emit()
+
+    def snapshot(self) -> TelemetrySnapshot:
+        """计算当前统计"""
+        now = time.monotonic()
+        with self._lock:
+            speed = self._rate.sample(now)
+            devices = {name: round(rate.sample(now) / MB, 2) for name, rate in self._devices.items()}
+            bytes_done = self._rate.total
+            remaining = max(0, self.total_bytes - bytes_done)
+            eta = remaining / speed if speed > 0 else None
+            return TelemetrySnapshot(
+                job=self.job,
+                phase=self.phase,
+                bytes_done=bytes_done,
+                total_bytes=self.total_bytes,
+                files_done=self.files_done,
+                total_files=self.total_files,
+                elapsed=now - self._started,
+                mb_per_s=round(speed / MB, 2),
+                eta_seconds=eta,
+                devices=devices,
+            )
+
+    def close(self, **summary):
+        """推送最终统计并关闭日志"""
+        self._emit(force=True)
+        self._write({"event": "finish", "elapsed": round(time.monotonic() - self._started, 3), **summary})
+        with self._lock:
+            if self._log:
+                self._log.close()
+                self._log = None
+
+    def _device(self, device: str) -> _Rate:
+        rate = self._devices.get(device)
+        if rate is None:
+            rate = self._devices[device] = _Rate()
+        return rate
+
+    def _emit(self, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_emit < self.ui_interval:
+                return
+            self._last_emit = now
+        snapshot = self.snapshot()
+        self._write({"event": "progress", **asdict(snapshot)})
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"[ERROR] 推送进度失败: {str(e)}")
+
+    def _write(self, event: Dict):
+        with self._lock:
+            if not self._log:
+                return
+            event["ts"] = round(time.time(), 3)
+            self._log.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """格式化剩余时间"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.db_migrations import ensure_schema
+from app.utils.db_pool import get_pool
+
+# 累计多少条状态变更后提交一次
+JOURNAL_BATCH_SIZE = 500
+
+# 距上次提交超过该秒数时也会提交
+JOURNAL_FLUSH_INTERVAL = 2.0
+
+# 文件状态
+STATE_PENDING = "pending"
+STATE_COPYING = "copying"
+STATE_COPIED = "copied"
+STATE_VERIFIED = "verified"
+STATE_FAILED = "failed"
+
+
+class OffloadJournal:
+    """拷卡任务日志 - 记录每个文件的进度，程序中断后可从断点续传
+
+    状态变更先缓存在内存中，按批次用 executemany 提交，
+    避免大量小文件时每个文件一次事务。日志只会落后于实际进度，
+    因此续传时最多重复处理少量数据，不会跳过未落盘的内容。
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        ensure_schema(db_path)
+        self._pending: Dict[Tuple[int, str], Tuple] = {}
+        self._lock = threading.Lock()
+        # 提交串行执行，保证较早的批次不会覆盖较新的状态
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def find_resumable(self, source: str, destinations: List[str], algorithm: str) -> Optional[int]:
+        """查找同一源和目标的未完成任务"""
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute("""
+                    SELECT id FROM offload_jobs
+                    WHERE source = ? AND destinations = ? AND algorithm = ? AND status = 'running'
+                    ORDER BY id DESC LIMIT 1
+                """, (source, json.dumps(destinations, ensure_ascii=False), algorithm)).fetchone()
+                return row["id"] if row else None
+        except Exception as e:
+            print(f"[ERROR] 查询拷卡任务失败: {str(e)}")
+            raise Exception(f"查询拷卡任务失败: {str(e)}")
+
+    def create_job(self, source: str, destinations: List[str], algorithm: str,
+                   files: Dict[str, Tuple[int, int]]) -> int:
+        """创建任务并登记全部文件"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute("""
+                    INSERT INTO offload_jobs (source, destinations, algorithm, total_files, total_bytes)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    source, json.dumps(destinations, ensure_ascii=False), algorithm,
+                    len(files), sum(size for size, _ in files.values()),
+                ))
+                job_id = cursor.lastrowid
+                conn.executemany("""
+                    INSERT INTO offload_files (job_id, rel_path, size, mtime_ns)
+                    VALUES (?, ?, ?, ?)
+                """, [(job_id, rel_path, size, mtime_ns) for rel_path, (size, mtime_ns) in files.items()])
+                return job_id
+        except Exception as e:
+            print(f"[ERROR] 创建拷卡任务失败: {str(e)}")
+            raise Exception(f"创建拷卡任务失败: {str(e)}")
+
+    def load_files(self, job_id: int) -> Dict[str, Dict]:
+        """读取任务中所有文件的记录"""
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute("""
+                    SELECT rel_path, size, mtime_ns, state, bytes_done, source_hash, error
+                    FROM offload_files WHERE job_id = ?
+                """, (job_id,)).fetchall()
+                return {row["rel_path"]: dict(row) for row in rows}
+        except Exception as e:
+            print(f"[ERROR] 读取拷卡任务文件失败: {str(e)}")
+            raise Exception(f"读取拷卡任务文件失败: {str(e)}")
+
+    def update_file(self, job_id: int, rel_path: str, state: str, bytes_done: int,
+                    source_hash: Optional[str] = None, error: Optional[str] = None):
+        """记录文件状态（缓存，按批次提交）"""
+        with self._lock:
+            # 同一文件只保留最新状态
+            self._pending[(job_id, rel_path)] = (state, bytes_done, source_hash, error, job_id, rel_path)
+            due = (len(self._pending) >= JOURNAL_BATCH_SIZE
+                   or time.monotonic() - self._last_flush >= JOURNAL_FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """提交缓存的状态变更"""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._pending.values())
+                self._pending.clear()
+                self._last_flush = time.monotonic()
+            if not rows:
+                return
+            try:
+                with self.pool.connection() as conn:
+                    conn.executemany("""
+                        UPDATE offload_files
+                        SET state = ?, bytes_done = ?,
+                            source_hash = COALESCE(?, source_hash), error = ?
+                        WHERE job_id = ? AND rel_path = ?
+                    """, rows)
+            except Exception as e:
+                # 放回未提交的记录（期间有更新的状态时保留更新的）
+                with self._lock:
+                    for row in rows:
+                        self._pending.setdefault((row[4], row[5]), row)
+                print(f"[ERROR] 写入拷卡日志失败: {str(e)}")
+                raise Exception(f"写入拷卡日志失败: {str(e)}")
+
+    def finish_job(self, job_id: int, status: str):
+        """提交剩余记录并更新任务状态"""
+        self.flush()
+        try:
+            with self.pool.connection() as conn:
+                conn.execute("""
+                    UPDATE offload_jobs SET status = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (status, job_id))
+        except Exception as e:
+            print(f"[ERROR] 更新拷卡任务状态失败: {str(e)}")
+            raise Exception(f"更新拷卡任务状态失败: {str(e)}")
+
+    def delete_job(self, job_id: int):
+        """删除任务及其文件记录"""
+        try:
+            with self.pool.connection() as conn:
+                conn.execute("DELETE FROM offload_files WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM offload_jobs WHERE id = ?", (job_id,))
+        except Exception as e:
+            print(f"[ERROR] 删除拷卡任务失败: {str(e)}")
+            raise Exception(f"删除拷卡任务失败: {str(e)}")
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.backup_verifier import (
+    DEFAULT_ALGORITHM, HASH_CHUNK_SIZE, HashManifest, hash_file, new_hasher, scan_tree
+)
+from app.utils.io_scheduler import IOScheduler, get_scheduler
+from app.utils.io_telemetry import ProgressTelemetry
+from app.utils.offload_journal import (
+    OffloadJournal, STATE_COPIED, STATE_COPYING, STATE_FAILED, STATE_VERIFIED
+)
+
+# 每个目标写入队列中最多缓存的数据块数
+QUEUE_DEPTH = 8
+
+# 写入中的临时文件后缀，完成后再改名
+PART_SUFFIX = ".lynion_part"
+
+# 大文件每写入这么多字节落盘一次并记录断点
+CHECKPOINT_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class OffloadResult:
+    """拷卡结果"""
+    source: str
+    destinations: List[str]
+    algorithm: str
+    verified: Dict[str, List[str]] = field(default_factory=dict)   # 目标 -> 校验通过的文件
+    mismatched: List[Tuple[str, str]] = field(default_factory=list)  # (目标, 文件)
+    errors: List[Tuple[str, str]] = field(default_factory=list)      # (路径, 错误信息)
+    total_files: int = 0
+    total_bytes: int = 0
+    job_id: Optional[int] = None
+    resumed_files: int = 0  # 从日志中恢复（跳过或断点续传）的文件数
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not (self.mismatched or self.errors)
+
+
+class _DestinationWriter:
+    """单个目标的写入线程，按顺序处理 open / data / sync / close 指令"""
+    def __init__(self, root: str, queue_depth: int, telemetry: Optional[ProgressTelemetry] = None):
+        self.root = root
+        self.telemetry = telemetry
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_depth)
+        self.completed: List[str] = []
+        self.errors: Dict[str, str] = {}
+        # 每个文件处理完后放入 (相对路径, 错误信息或 None)，供读取线程汇总
+        self.finished: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._created_dirs = set()
+        self._thread = threading.Thread(
+            target=self._run, name=f"OffloadWriter-{root}", daemon=True
+        )
+        self._thread.start()
+
+    def join(self):
+        self.queue.put(None)
+        self._thread.join()
+
+    def target_path(self, rel_path: str) -> str:
+        return os.path.join(self.root, *rel_path.split("/"))
+
+    def _open(self, rel_path: str, offset: int):
+        target = self.target_path(rel_path)
+        directory = os.path.dirname(target)
+        if directory not in self._created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._created_dirs.add(directory)
+        if offset:
+            # 续传：丢弃断点之后未确认的数据
+            f = open(target + PART_SUFFIX, 'r+b')
+            f.truncate(offset)
+            f.seek(offset)
+            return f, target
+        return open(target + PART_SUFFIX, 'wb'), target
+
+    def _run(self):
+        f = None
+        rel_path = None
+        target = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            kind = item[0]
+            if kind == "sync":
+                # 无论本文件是否出错都要到达屏障，否则读取线程会一直等待
+                try:
+                    if f:
+                        f.flush()
+                        os.fsync(f.fileno())
+                except Exception as e:
+                    self._fail(rel_path, target, f, e)
+                    f = None
+                finally:
+                    item[1].wait()
+                continue
+            try:
+                if kind == "open":
+                    rel_path = item[1]
+                    f, target = self._open(rel_path, item[2])
+                elif kind == "data":
+                    if f:
+                        f.write(item[1])
+                        if self.telemetry:
+                            self.telemetry.add_device_bytes(self.root, len(item[1]))
+                elif kind == "close":
+                    mtime_ns, source_ok = item[1], item[2]
+                    if f:
+                        self._finish(f, target, mtime_ns, source_ok)
+                        if source_ok:
+                            self.completed.append(rel_path)
+                            self.finished.put((rel_path, None))
+                    f = None
+            except Exception as e:
+                self._fail(rel_path, target, f, e)
+                f = None
+
+    def _fail(self, rel_path: str, target: str, f, error: Exception):
+        self.errors[rel_path] = str(error)
+        self.finished.put((rel_path, str(error)))
+        if f:
+            f.close()
+            self._discard(target)
+
+    def _finish(self, f, target: str, mtime_ns: int, source_ok: bool):
+        """关闭文件，落盘后改名为正式文件"""
+        try:
+            if source_ok:
+                f.flush()
+                os.fsync(f.fileno())
+                # 丢弃页缓存，回读校验时读取的是磁盘上的数据
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            f.close()
+        if not source_ok:
+            self._discard(target)
+            return
+        os.replace(target + PART_SUFFIX, target)
+        os.utime(target, ns=(mtime_ns, mtime_ns))
+
+    @staticmethod
+    def _discard(target: str):
+        try:
+            os.remove(target + PART_SUFFIX)
+        except OSError:
+            pass
+
+
+class OffloadManager:
+    """拷卡引擎 - 源文件只读取一次，同时写入多个目标并计算源哈希
+
+    全部写入完成后并发回读各目标，与源哈希比对。
+    提供 journal 时，每个文件的进度写入数据库，中断后再次执行同一任务会
+    跳过已完成的文件，并从大文件最后一个已落盘的断点继续拷贝。
+    """
+    def __init__(self, algorithm: Optional[str] = None,
+                 chunk_size: int = HASH_CHUNK_SIZE,
+                 queue_depth: int = QUEUE_DEPTH,
+                 scheduler: Optional[IOScheduler] = None,
+                 journal: Optional[OffloadJournal] = None,
+                 checkpoint_bytes: int = CHECKPOINT_BYTES):
+        self.algorithm = algorithm or DEFAULT_ALGORITHM
+        self.chunk_size = chunk_size
+        self.queue_depth = queue_depth
+        self.scheduler = scheduler or get_scheduler()
+        self.journal = journal
+        self.checkpoint_bytes = checkpoint_bytes
+        self._job_id: Optional[int] = None
+        self._telemetry: Optional[ProgressTelemetry] = None
+
+    def offload(self, source: str, destinations: List[str],
+                progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                telemetry: Optional[ProgressTelemetry] = None) -> OffloadResult:
+        """拷贝并校验
+        :param progress_callback: progress_callback(阶段 "copy"/"verify", 已完成字节, 总字节)
+        :param telemetry: 记录吞吐量（含每个目标的写入速度）、剩余时间和每个文件的耗时
+        """
+        if not os.path.isdir(source):
+            raise ValueError(f"源文件夹不存在: {source}")
+        destinations = list(dict.fromkeys(os.path.abspath(d) for d in destinations if d))
+        if not destinations:
+            raise ValueError("至少需要一个目标文件夹")
+        source_abs = os.path.abspath(source)
+        for destination in destinations:
+            if destination == source_abs or destination.startswith(source_abs + os.sep):
+                raise ValueError(f"目标文件夹不能位于源文件夹内: {destination}")
+            os.makedirs(destination, exist_ok=True)
+
+        started = time.monotonic()
+        result = OffloadResult(source, destinations, self.algorithm)
+        files = scan_tree(source)
+        result.total_files = len(files)
+        result.total_bytes = sum(size for size, _ in files.values())
+
+        records = self._open_job(source_abs, destinations, files, result)
+        self._telemetry = telemetry
+        if telemetry:
+            telemetry.start_phase("copy", result.total_bytes, result.total_files)
+        try:
+            writers, source_digests = self._copy(source, destinations, files, records, result, progress_callback)
+            self._verify(writers, files, records, source_digests, result, progress_callback)
+        finally:
+            if self.journal:
+                # 出错或取消时也提交已缓存的状态，续传依赖这些记录
+                self.journal.flush()
+
+        # 未通过时保留任务，下次执行只重试失败的文件
+        if self.journal and result.ok:
+            self.journal.finish_job(self._job_id, "completed")
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _open_job(self, source: str, destinations: List[str],
+                  files: Dict[str, Tuple[int, int]], result: OffloadResult) -> Dict[str, Dict]:
+        """查找可续传的任务，源文件有变化时放弃旧任务重新开始"""
+        self._job_id = None
+        if not self.journal:
+            return {}
+        job_id = self.journal.find_resumable(source, destinations, self.algorithm)
+        records = self.journal.load_files(job_id) if job_id else {}
+        unchanged = records.keys() == files.keys() and all(
+            (record["size"], record["mtime_ns"]) == files[rel_path]
+            for rel_path, record in records.items()
+        )
+        if job_id and not unchanged:
+            print(f"[WARNING] 源文件已变化，放弃未完成的拷卡任务 {job_id}")
+            self.journal.finish_job(job_id, "failed")
+            job_id = None
+        if not job_id:
+            job_id = self.journal.create_job(source, destinations, self.algorithm, files)
+            records = {}
+        self._job_id = job_id
+        result.job_id = job_id
+        return records
+
+    def _record(self, rel_path: str, state: str, bytes_done: int,
+                source_hash: Optional[str] = None, error: Optional[str] = None):
+        if self.journal:
+            self.journal.update_file(self._job_id, rel_path, state, bytes_done, source_hash, error)
+
+    def _resume_offset(self, writers: List[_DestinationWriter], rel_path: str, offset: int) -> int:
+        """所有目标的临时文件都不短于断点时才续传，否则从头拷贝"""
+        if not offset:
+            return 0
+        for writer in writers:
+            try:
+                if os.path.getsize(writer.target_path(rel_path) + PART_SUFFIX) < offset:
+                    return 0
+            except OSError:
+                return 0
+        return offset
+
+    def _copy(self, source: str, destinations: List[str], files: Dict[str, Tuple[int, int]],
+              records: Dict[str, Dict], result: OffloadResult,
+              progress_callback) -> Tuple[List[_DestinationWriter], Dict[str, str]]:
+        """读取源文件一次，分发给所有目标写入线程，返回 (写入线程, 源文件哈希)
+
+        读取占用源设备的调度名额；写入线程由读取节奏驱动，不再单独占用名额，
+        否则同一设备上的两个目标会互相等待队列而死锁。
+        """
+        telemetry = self._telemetry
+        writers = [_DestinationWriter(d, self.queue_depth, telemetry) for d in destinations]
+        digests = {}
+        reports: Dict[str, List[Optional[str]]] = {}
+        done_bytes = 0
+
+        def collect_reports():
+            # 所有目标都写完后记录为已拷贝，任一目标出错记录为失败
+            for writer in writers:
+                while not writer.finished.empty():
+                    rel_path, error = writer.finished.get()
+                    outcome = reports.setdefault(rel_path, [])
+                    outcome.append(error)
+                    if len(outcome) == len(writers):
+                        del reports[rel_path]
+                        errors = [e for e in outcome if e]
+                        if errors:
+                            self._record(rel_path, STATE_FAILED, 0, error=errors[0])
+                        elif rel_path in digests:
+                            self._record(rel_path, STATE_COPIED, files[rel_path][0], digests[rel_path])
+
+        try:
+            for rel_path in sorted(files):
+                size, mtime_ns = files[rel_path]
+                record = records.get(rel_path)
+                if record and record["state"] in (STATE_COPIED, STATE_VERIFIED):
+                    # 上次已完成拷贝
+                    digests[rel_path] = record["source_hash"]
+                    result.resumed_files += 1
+                    done_bytes += size
+                    if telemetry:
+                        telemetry.add_bytes(size)
+                        telemetry.file_done(rel_path, size, status="resumed")
+                    continue
+
+                offset = 0
+                if record and record["state"] == STATE_COPYING:
+                    offset = self._resume_offset(writers, rel_path, record["bytes_done"])
+                    if offset:
+                        result.resumed_files += 1
+                for writer in writers:
+                    writer.queue.put(("open", rel_path, offset))
+                hasher = new_hasher(self.algorithm)
+                source_ok = True
+                file_started = time.monotonic()
+                try:
+                    with self.scheduler.slot(source), \
+                            open(os.path.join(source, rel_path), 'rb', buffering=0) as f:
+                        # 续传时重新读取断点前的源数据以恢复哈希状态，但不再写入
+                        position = 0
+                        while position < offset:
+                            block = f.read(min(self.chunk_size, offset - position))
+                            if not block:
+                                break
+                            hasher.update(block)
+                            position += len(block)
+                        done_bytes += position
+                        if telemetry and position:
+                            telemetry.add_bytes(position)
+                        next_checkpoint = position + self.checkpoint_bytes
+                        while True:
+                            # 每块都是新的 bytes 对象，可安全地交给多个写入线程
+                            block = f.read(self.chunk_size)
+                            if not block:
+                                break
+                            hasher.update(block)
+                            for writer in writers:
+                                writer.queue.put(("data", block))
+                            position += len(block)
+                            done_bytes += len(block)
+                            if telemetry:
+                                telemetry.add_bytes(len(block), source)
+                            if self.journal and position >= next_checkpoint:
+                                self._checkpoint(writers, rel_path, position)
+                                next_checkpoint = position + self.checkpoint_bytes
+                            if progress_callback:
+                                progress_callback("copy", done_bytes, result.total_bytes)
+                    digests[rel_path] = hasher.hexdigest()
+                except Exception as e:
+                    source_ok = False
+                    result.errors.append((os.path.join(source, rel_path), str(e)))
+                    self._record(rel_path, STATE_FAILED, 0, error=str(e))
+                if telemetry:
+                    telemetry.file_done(
+                        rel_path, size, time.monotonic() - file_started, source,
+                        "ok" if source_ok else "error",
+                    )
+                for writer in writers:
+                    writer.queue.put(("close", mtime_ns, source_ok))
+                collect_reports()
+        finally:
+            for writer in writers:
+                writer.join()
+        collect_reports()
+
+        for writer in writers:
+            for rel_path, message in sorted(writer.errors.items()):
+                result.errors.append((os.path.join(writer.root, rel_path), message))
+        return writers, digests
+
+    def _checkpoint(self, writers: List[_DestinationWriter], rel_path: str, position: int):
+        """等待所有目标落盘后记录断点"""
+        barrier = threading.Barrier(len(writers) + 1)
+        for writer in writers:
+            writer.queue.put(("sync", barrier))
+        barrier.wait()
+        if not any(rel_path in writer.errors for writer in writers):
+            self._record(rel_path, STATE_COPYING, position)
+            # 断点很少且代价已由 fsync 承担，立即提交
+            self.journal.flush()
+
+    def _verify(self, writers: List[_DestinationWriter], files: Dict[str, Tuple[int, int]],
+                records: Dict[str, Dict], source_digests: Dict[str, str],
+                result: OffloadResult, progress_callback):
+        """并发回读各目标（按设备调度），与源哈希比对"""
+        # 需要回读的文件：本次写完的文件和上次已拷贝但未校验的文件
+        pending_copied = sorted(
+            rel_path for rel_path, record in records.items() if record["state"] == STATE_COPIED
+        )
+        already_verified = sorted(
+            rel_path for rel_path, record in records.items() if record["state"] == STATE_VERIFIED
+        )
+        targets = {writer.root: writer.completed + pending_copied for writer in writers}
+        total = sum(files[rel][0] for rel_paths in targets.values() for rel in rel_paths)
+        telemetry = self._telemetry
+        if telemetry:
+            telemetry.start_phase("verify", total, sum(len(rel_paths) for rel_paths in targets.values()))
+        done = [0]
+        outcomes: Dict[str, List[bool]] = {}
+        lock = threading.Lock()
+
+        def finish_file(rel_path: str, ok: bool):
+            # 所有目标都校验通过才记录为已校验
+            with lock:
+                outcome = outcomes.setdefault(rel_path, [])
+                outcome.append(ok)
+                complete = len(outcome) == len(writers)
+            if complete:
+                if all(outcome):
+                    self._record(rel_path, STATE_VERIFIED, files[rel_path][0], source_digests[rel_path])
+                else:
+                    self._record(rel_path, STATE_FAILED, 0, error="回读校验未通过")
+
+        def verify_destination(writer: _DestinationWriter):
+            manifest = HashManifest(writer.root, self.algorithm).load()
+            verified, mismatched, errors = [], [], []
+            progress = (lambda count: telemetry.add_bytes(count, writer.root)) if telemetry else None
+            for rel_path in targets[writer.root]:
+                path = writer.target_path(rel_path)
+                ok = False
+                file_started = time.monotonic()
+                try:
+                    digest = hash_file(path, self.algorithm, self.chunk_size, progress)
+                    if digest == source_digests[rel_path]:
+                        ok = True
+                        verified.append(rel_path)
+                        stat = os.stat(path)
+                        manifest.record(rel_path, stat.st_size, stat.st_mtime_ns, digest)
+                    else:
+                        mismatched.append(rel_path)
+                except Exception as e:
+                    errors.append((path, str(e)))
+                finish_file(rel_path, ok)
+                if telemetry:
+                    telemetry.file_done(
+                        rel_path, files[rel_path][0], time.monotonic() - file_started,
+                        writer.root, "ok" if ok else "error",
+                    )
+                with lock:
+                    done[0] += files[rel_path][0]
+                    if progress_callback:
+                        progress_callback("verify", done[0], total)
+            # 记录已校验的哈希，之后 BackupVerifier 可直接复用
+            manifest.save(keep_previous=True)
+            return writer.root, verified, mismatched, errors
+
+        futures = [self.scheduler.submit(writer.root, verify_destination, writer) for writer in writers]
+        for future in futures:
+            root, verified, mismatched, errors = future.result()
+            result.verified[root] = already_verified + verified
+            result.mismatched.extend((root, rel_path) for rel_path in mismatched)
+            result.errors.extend(errors)
@@ -1,90 +1,314 @@
 import sqlite3
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from datetime import datetime
 import os
+import threading
+from collections import OrderedDict
+import csv
+from decimal import Decimal, InvalidOperation
+import json
 import pandas as pd
+from openpyxl import Workbook
+from app.utils.db_pool import get_pool
+from app.utils.db_migrations import ensure_schema
+
+# 项目表的业务字段（不含生成列 disk_no），带表名以便与全文索引联查
+PROJECT_COLUMNS = ", ".join(f"projects.{column}" for column in (
+    "id", "disk_id", "project_date", "project_name", "backup_status",
+    "notes", "project_path", "filename", "created_at", "updated_at",
+))
+
+# 按磁盘编号数值排序，与 idx_projects_disk_order 索引一致
+PROJECT_ORDER = "projects.disk_no ASC, projects.project_date DESC, projects.id DESC"
+
+# 项目最近一次校验：按 disk_id 或备份路径匹配，每行一次索引查找
+LAST_VERIFICATION_JOIN = """
+    LEFT JOIN verification_runs AS last_run ON last_run.id = (
+        SELECT run.id FROM verification_runs AS run
+        WHERE run.disk_id = projects.disk_id OR run.project_path = projects.project_path
+        ORDER BY run.finished_at DESC, run.id DESC LIMIT 1
+    )
+"""
+LAST_VERIFICATION_COLUMNS = (
+    "last_run.ok AS verified_ok, last_run.kind AS verified_kind, "
+    "datetime(last_run.finished_at, 'localtime') AS verified_at"
+)
+
+# trigram 分词的最短可索引长度
+FTS_MIN_TERM_LENGTH = 3
+
+# Excel 列名与数据库字段的对应关系
+EXCEL_COLUMNS = {
+    '磁盘编号': 'disk_id',
+    '项目时间': 'project_date',
+    '项目名称': 'project_name',
+    '备份': 'backup_status',
+    '项目备注': 'notes',
+    '路径': 'project_path',
+    '文件名称': 'filename',
+}
+
+# 导入时每批写入的行数
+IMPORT_CHUNK_SIZE = 5000
+
+# 导出时每批读取的行数及支持的格式
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ("xlsx", "csv", "jsonl")
+
+# 分页查询结果缓存的最大条目数
+RESULT_CACHE_SIZE = 64
+
+
+class ProjectResultCache:
+    """分页查询结果的 LRU 缓存
+
+    每个数据库文件共享一个实例；写操作递增代数并清空缓存，
+    缓存键包含代数，因此旧代数的结果不会被命中。
+    """
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_filters(filters: Optional[Dict]) -> Tuple:
+        """将过滤条件转换为可哈希的规范形式，忽略空值
+
+        False 和 0 仍是有效条件（如 backup_status），保留在键中。
+        """
+        if not filters:
+            return ()
+        items = []
+        for key, value in filters.items():
+            if value is None or value == "" or value == []:
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+                if not value:
+                    continue
+            elif isinstance(value, (list, set, tuple)):
+                value = tuple(sorted(value))
+            items.append((key, value))
+        return tuple(sorted(items))
+
+    def make_key(self, filters: Optional[Dict], *args) -> Tuple:
+        return (self.generation, self.normalize_filters(filters)) + args
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Tuple, result: Dict):
+        with self._lock:
+            # 查询期间发生写操作时结果已过期，不再缓存
+            if key[0] != self.generation:
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """数据变更后递增代数并清空缓存"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "generation": self.generation,
+            }
+
+
+_result_caches: Dict[str, ProjectResultCache] = {}
+_result_caches_lock = threading.Lock()
+
+
+def _get_result_cache(db_path: str) -> ProjectResultCache:
+    """获取数据库文件对应的共享结果缓存"""
+    key = os.path.abspath(db_path)
+    with _result_caches_lock:
+        cache = _result_caches.get(key)
+        if cache is None:
+            cache = _result_caches[key] = ProjectResultCache()
+        return cache
+
+
+def _parse_disk_number(value: str) -> Optional[str]:
+    """非纯数字的磁盘编号按数值精确取整，无法识别时返回 None"""
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return None
+    return str(int(number)) if number.is_finite() else None
+
+
+def normalize_project_path(path: str) -> str:
+    """项目路径统一用 os.path.normpath 保存（去掉末尾分隔符、统一斜杠），空路径保持不变
+
+    校验历史中的备份路径按同样规则保存，最近校验的关联直接比较两者。
+    """
+    return os.path.normpath(path) if path else path
+
+
+def resolve_db_path(settings: Dict) -> str:
+    """历史项目数据库路径：<database_path>/app.db，未设置时使用 <project_path>/database"""
+    db_dir = settings.get("database_path", "")
+    if not db_dir:
+        db_dir = os.path.join(settings.get("project_path", ""), "database")
+    
+    if not db_dir:
+        raise ValueError("数据库路径未设置")
+    
+    return os.path.join(db_dir, "app.db")
+
 
 class ProjectManager:
     def __init__(self, db_path: str):
         """初始化项目管理器"""
         self.db_path = db_path
-        self.conn = None
+        self.pool = get_pool(db_path)
+        self.result_cache = _get_result_cache(db_path)
+        self._fts_enabled = None
         self._init_db()
     
-    def __del__(self):
-        """析构函数"""
-        try:
-            if self.conn:
-                self.conn.close()
-                print("[DEBUG] 数据库连接已关闭")
-        except Exception as e:
-            print(f"[ERROR] 关闭数据库连接失败: {str(e)}")
-    
     def _init_db(self):
         """初始化数据库"""
         try:
             # 确保数据库目录存在
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            # 读取 schema.sql
-            schema_path = os.path.join(os.path.dirname(__file__), "..", "database", "schema.sql")
-            with open(schema_path, "r", encoding="utf-8") as f:
-                schema = f.read()
-            
-            # 执行 schema
-            with sqlite3.connect(self.db_path) as conn:
-                conn.executescript(schema)
-                print("[DEBUG] 数据库初始化成功")
+            # 应用数据库迁移
+            ensure_schema(self.db_path)
                 
         except Exception as e:
             print(f"[ERROR] 数据库初始化失败: {str(e)}")
             raise Exception(f"数据库初始化失败: {str(e)}")
     
+    def _fts_available(self) -> bool:
+        """检查全文索引是否可用"""
+        if self._fts_enabled is None:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+                ).fetchone()
+            self._fts_enabled = row is not None
+        return self._fts_enabled
+
+    def _build_search(self, search_text: str, prefix: bool) -> Tuple[Optional[str], List[str], List]:
+        """将搜索文本拆分为全文索引查询和 LIKE 条件
+        
+        trigram 分词至少需要 3 个字符，较短的词回退为 LIKE。
+        :return: (FTS MATCH 表达式, LIKE 子句列表, LIKE 参数)
+        """
+        fts_terms = []
+        like_clauses = []
+        like_params = []
+        use_fts = self._fts_available()
+        
+        for term in search_text.split():
+            if use_fts and len(term) >= FTS_MIN_TERM_LENGTH:
+                phrase = '"' + term.replace('"', '""') + '"'
+                fts_terms.append("^" + phrase if prefix else phrase)
+            else:
+                pattern = f"{term}%" if prefix else f"%{term}%"
+                like_clauses.append("""(
+                    projects.project_name LIKE ? OR 
+                    projects.notes LIKE ? OR 
+                    projects.project_path LIKE ? OR
+                    projects.filename LIKE ?
+                )""")
+                like_params.extend([pattern] * 4)
+        
+        match = " AND ".join(fts_terms) if fts_terms else None
+        return match, like_clauses, like_params
+
+    def _build_where(self, filters: Optional[Dict]) -> Tuple[str, List[str], List]:
+        """根据过滤条件构建 FROM 和 WHERE 子句
+        
+        支持的搜索选项：
+            search_mode: "contains"（默认）或 "prefix"（匹配字段开头）
+            unverified_days: 只返回最近 N 天内没有通过校验的项目
+            rank: True 时按全文检索相关度排序
+        """
+        from_sql = "projects"
+        where_clauses = []
+        params = []
+        
+        if filters:
+            if filters.get("disk_id"):
+                where_clauses.append("projects.disk_id = ?")
+                params.append(filters["disk_id"])
+            
+            if filters.get("backup_status") is not None:
+                where_clauses.append("projects.backup_status = ?")
+                params.append(filters["backup_status"])
+            
+            if filters.get("date_from"):
+                where_clauses.append("projects.project_date >= ?")
+                params.append(filters["date_from"])
+            
+            if filters.get("date_to"):
+                where_clauses.append("projects.project_date <= ?")
+                params.append(filters["date_to"])
+            
+            if filters.get("unverified_days"):
+                # 最近 N 天内没有通过的校验记录
+                where_clauses.append("""NOT EXISTS (
+                    SELECT 1 FROM verification_runs AS run
+                    WHERE (run.disk_id = projects.disk_id OR run.project_path = projects.project_path)
+                      AND run.ok = 1 AND run.finished_at >= datetime('now', ?)
+                )""")
+                params.append(f"-{int(filters['unverified_days'])} days")
+            
+            if filters.get("search_text") and filters["search_text"].strip():
+                match, like_clauses, like_params = self._build_search(
+                    filters["search_text"],
+                    prefix=filters.get("search_mode") == "prefix",
+                )
+                if match:
+                    from_sql = "projects JOIN projects_fts ON projects_fts.rowid = projects.id"
+                    where_clauses.append("projects_fts MATCH ?")
+                    params.append(match)
+                where_clauses.extend(like_clauses)
+                params.extend(like_params)
+        
+        return from_sql, where_clauses, params
+
+    def _build_order(self, filters: Optional[Dict], from_sql: str) -> str:
+        """构建排序子句，全文检索且要求相关度排序时按 rank 优先"""
+        if filters and filters.get("rank") and "projects_fts" in from_sql:
+            return f"projects_fts.rank, {PROJECT_ORDER}"
+        return PROJECT_ORDER
+
     def get_projects(self, filters: Dict = None) -> List[Dict]:
         """获取项目列表"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
-                query = """
-                    SELECT * FROM projects
+                from_sql, where_clauses, params = self._build_where(filters)
+                query = f"""
+                    SELECT {PROJECT_COLUMNS} FROM {from_sql}
                 """
                 
-                where_clauses = []
-                params = []
-                
-                if filters:
-                    if filters.get("disk_id"):
-                        where_clauses.append("disk_id = ?")
-                        params.append(filters["disk_id"])
-                    
-                    if filters.get("backup_status") is not None:
-                        where_clauses.append("backup_status = ?")
-                        params.append(filters["backup_status"])
-                    
-                    if filters.get("date_from"):
-                        where_clauses.append("project_date >= ?")
-                        params.append(filters["date_from"])
-                    
-                    if filters.get("date_to"):
-                        where_clauses.append("project_date <= ?")
-                        params.append(filters["date_to"])
-                    
-                    if filters.get("search_text"):
-                        search_term = f"%{filters['search_text']}%"
-                        where_clauses.append("""(
-                            project_name LIKE ? OR 
-                            notes LIKE ? OR 
-                            project_path LIKE ? OR
-                            filename LIKE ?
-                        )""")
-                        params.extend([search_term] * 4)
-                
                 if where_clauses:
                     query += " WHERE " + " AND ".join(where_clauses)
                 
-                query += " ORDER BY disk_id ASC, project_date DESC"
+                query += f" ORDER BY {self._build_order(filters, from_sql)}"
                 
                 cursor.execute(query, params)
                 return [dict(row) for row in cursor.fetchall()]
@@ -93,10 +317,102 @@ class ProjectManager:
             print(f"[ERROR] 获取项目列表失败: {str(e)}")
             raise Exception(f"获取项目列表失败: {str(e)}")
 
+    def get_projects_page(self, filters: Dict = None, page: int = 1, page_size: int = 20,
+                          cursor: Optional[Tuple] = None) -> Dict:
+        """分页获取项目列表
+        :param cursor: 上一页最后一行的排序键，提供时使用键集分页代替 OFFSET
+        :return: {"items", "total", "page", "page_size", "total_pages", "next_cursor"}
+        """
+        try:
+            page = max(1, int(page))
+            cache_key = self.result_cache.make_key(
+                filters, page, page_size, tuple(cursor) if cursor else None
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            with self.pool.connection() as conn:
+                from_sql, where_clauses, params = self._build_where(filters)
+                where_sql = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+                order_sql = self._build_order(filters, from_sql)
+                # 按相关度排序时无法使用键集分页
+                keyset = order_sql == PROJECT_ORDER
+                
+                total = conn.execute(
+                    f"SELECT COUNT(*) FROM {from_sql}{where_sql}", params
+                ).fetchone()[0]
+                
+                page_clauses = list(where_clauses)
+                page_params = list(params)
+                if cursor and keyset:
+                    # 排序为 disk_no ASC, project_date DESC, id DESC
+                    disk_no, project_date, project_id = cursor
+                    page_clauses.append("""(
+                        projects.disk_no > ? OR (projects.disk_no = ? AND (
+                            projects.project_date < ? OR
+                            (projects.project_date = ? AND projects.id < ?)
+                        ))
+                    )""")
+                    page_params.extend([disk_no, disk_no, project_date, project_date, project_id])
+                
+                query = (
+                    f"SELECT {PROJECT_COLUMNS}, {LAST_VERIFICATION_COLUMNS}, projects.disk_no "
+                    f"FROM {from_sql}{LAST_VERIFICATION_JOIN}"
+                )
+                if page_clauses:
+                    query += " WHERE " + " AND ".join(page_clauses)
+                query += f" ORDER BY {order_sql} LIMIT ?"
+                page_params.append(page_size)
+                if not (cursor and keyset):
+                    query += " OFFSET ?"
+                    page_params.append((page - 1) * page_size)
+                
+                items = []
+                next_cursor = None
+                for row in conn.execute(query, page_params):
+                    item = dict(row)
+                    next_cursor = (item.pop("disk_no"), item["project_date"], item["id"])
+                    items.append(item)
+                
+                result = {
+                    "items": items,
+                    "total": total,
+                    "page": page,
+                    "page_size": page_size,
+                    "total_pages": (total + page_size - 1) // page_size,
+                    "next_cursor": next_cursor if keyset and len(items) == page_size else None,
+                }
+            
+            self.result_cache.put(cache_key, result)
+            return result
+                
+        except Exception as e:
+            print(f"[ERROR] 分页获取项目列表失败: {str(e)}")
+            raise Exception(f"分页获取项目列表失败: {str(e)}")
+
+    def get_projects_not_verified(self, days: int, filters: Dict = None) -> List[Dict]:
+        """获取最近 N 天内没有通过校验的项目（含最近一次校验结果）"""
+        try:
+            with self.pool.connection() as conn:
+                from_sql, where_clauses, params = self._build_where(
+                    {**(filters or {}), "unverified_days": max(1, int(days))}
+                )
+                query = (
+                    f"SELECT {PROJECT_COLUMNS}, {LAST_VERIFICATION_COLUMNS} "
+                    f"FROM {from_sql}{LAST_VERIFICATION_JOIN}"
+                    f" WHERE {' AND '.join(where_clauses)}"
+                    f" ORDER BY {self._build_order(filters, from_sql)}"
+                )
+                return [dict(row) for row in conn.execute(query, params)]
+        except Exception as e:
+            print(f"[ERROR] 获取未校验项目失败: {str(e)}")
+            raise Exception(f"获取未校验项目失败: {str(e)}")
+
     def add_project(self, project_data: dict) -> None:
         """添加新项目"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO projects (
@@ -109,10 +425,11 @@ class ProjectManager:
                     project_data['project_name'],
                     project_data['backup_status'],
                     project_data['notes'],
-                    project_data['project_path'],
+                    normalize_project_path(project_data['project_path']),
                     project_data['filename']
                 ))
                 conn.commit()
+            self.result_cache.invalidate()
         except Exception as e:
             print(f"[ERROR] 添加项目失败: {str(e)}")
             raise Exception(f"添加项目失败: {str(e)}")
@@ -120,7 +437,7 @@ class ProjectManager:
     def update_project(self, project_id: int, project_data: dict) -> None:
         """更新项目"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE projects SET
@@ -138,11 +455,12 @@ class ProjectManager:
                     project_data['project_name'],
                     project_data['backup_status'],
                     project_data['notes'],
-                    project_data['project_path'],
+                    normalize_project_path(project_data['project_path']),
                     project_data['filename'],
                     project_id
                 ))
                 conn.commit()
+            self.result_cache.invalidate()
         except Exception as e:
             print(f"[ERROR] 更新项目失败: {str(e)}")
             raise Exception(f"更新项目失败: {str(e)}")
@@ -150,167 +468,444 @@ class ProjectManager:
     def delete_project(self, project_id: int) -> None:
         """删除项目"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM projects WHERE id = ?", (project_id,))
                 conn.commit()
+            self.result_cache.invalidate()
                 
         except Exception as e:
             print(f"[ERROR] 删除项目失败: {str(e)}")
             raise Exception(f"删除项目失败: {str(e)}")
 
+    def add_projects(self, projects: List[Dict]) -> int:
+        """批量添加项目（单个事务）
+        :return: 添加的行数
+        """
+        try:
+            with self.pool.connection() as conn:
+                conn.executemany("""
+                    INSERT INTO projects (
+                        disk_id, project_date, project_name,
+                        backup_status, notes, project_path, filename
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        project['disk_id'],
+                        project['project_date'],
+                        project['project_name'],
+                        project['backup_status'],
+                        project['notes'],
+                        normalize_project_path(project['project_path']),
+                        project['filename'],
+                    )
+                    for project in projects
+                ])
+            self.result_cache.invalidate()
+            return len(projects)
+        except Exception as e:
+            print(f"[ERROR] 批量添加项目失败: {str(e)}")
+            raise Exception(f"批量添加项目失败: {str(e)}")
+
+    def find_project_paths(self, paths: List[str]) -> Set[str]:
+        """返回 paths 中已登记的项目路径（按规范化后的路径比较）"""
+        normalized = {}
+        for path in paths:
+            normalized.setdefault(normalize_project_path(path), []).append(path)
+        keys = list(normalized)
+        found = set()
+        try:
+            with self.pool.connection() as conn:
+                # 分批查询，避免超过 SQLite 参数数量上限
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT project_path FROM projects WHERE project_path IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for row in rows:
+                        found.update(normalized[row[0]])
+            return found
+        except Exception as e:
+            print(f"[ERROR] 查询项目路径失败: {str(e)}")
+            raise Exception(f"查询项目路径失败: {str(e)}")
+
+    def set_backup_status(self, project_ids: List[int], backup_status: int) -> int:
+        """批量设置备份状态
+        :return: 更新的行数
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.executemany(
+                    "UPDATE projects SET backup_status = ? WHERE id = ?",
+                    [(backup_status, project_id) for project_id in project_ids]
+                )
+                updated = cursor.rowcount
+            self.result_cache.invalidate()
+            return updated
+        except Exception as e:
+            print(f"[ERROR] 批量更新备份状态失败: {str(e)}")
+            raise Exception(f"批量更新备份状态失败: {str(e)}")
+
+    def set_backup_status_by_disk(self, disk_id: str, backup_status: int) -> int:
+        """设置整个磁盘上所有项目的备份状态
+        :return: 更新的行数
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(
+                    "UPDATE projects SET backup_status = ? WHERE disk_id = ?",
+                    (backup_status, disk_id)
+                )
+                updated = cursor.rowcount
+            self.result_cache.invalidate()
+            return updated
+        except Exception as e:
+            print(f"[ERROR] 更新磁盘备份状态失败: {str(e)}")
+            raise Exception(f"更新磁盘备份状态失败: {str(e)}")
+
+    def delete_projects(self, project_ids: List[int]) -> int:
+        """批量删除项目及其标签关联
+        :return: 删除的行数
+        """
+        try:
+            params = [(project_id,) for project_id in project_ids]
+            with self.pool.connection() as conn:
+                conn.executemany("DELETE FROM project_tag_relations WHERE project_id = ?", params)
+                cursor = conn.executemany("DELETE FROM projects WHERE id = ?", params)
+                deleted = cursor.rowcount
+            self.result_cache.invalidate()
+            return deleted
+        except Exception as e:
+            print(f"[ERROR] 批量删除项目失败: {str(e)}")
+            raise Exception(f"批量删除项目失败: {str(e)}")
+
+    def delete_projects_by_disk(self, disk_id: str) -> int:
+        """删除整个磁盘的项目记录
+        :return: 删除的行数
+        """
+        try:
+            with self.pool.connection() as conn:
+                conn.execute("""
+                    DELETE FROM project_tag_relations
+                    WHERE project_id IN (SELECT id FROM projects WHERE disk_id = ?)
+                """, (disk_id,))
+                cursor = conn.execute("DELETE FROM projects WHERE disk_id = ?", (disk_id,))
+                deleted = cursor.rowcount
+            self.result_cache.invalidate()
+            return deleted
+        except Exception as e:
+            print(f"[ERROR] 删除磁盘项目失败: {str(e)}")
+            raise Exception(f"删除磁盘项目失败: {str(e)}")
+
+    def add_tags(self, project_ids: List[int], tag_names: List[str]) -> int:
+        """为多个项目添加标签，不存在的标签自动创建
+        :return: 新增的关联数
+        """
+        try:
+            names = [name.strip() for name in tag_names if name and name.strip()]
+            if not names or not project_ids:
+                return 0
+            with self.pool.connection() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO project_tags (name) VALUES (?)",
+                    [(name,) for name in names]
+                )
+                placeholders = ", ".join("?" * len(names))
+                tag_ids = [
+                    row[0] for row in conn.execute(
+                        f"SELECT id FROM project_tags WHERE name IN ({placeholders})", names
+                    )
+                ]
+                cursor = conn.executemany(
+                    "INSERT OR IGNORE INTO project_tag_relations (project_id, tag_id) VALUES (?, ?)",
+                    [(project_id, tag_id) for project_id in project_ids for tag_id in tag_ids]
+                )
+                added = cursor.rowcount
+            self.result_cache.invalidate()
+            return added
+        except Exception as e:
+            print(f"[ERROR] 批量添加标签失败: {str(e)}")
+            raise Exception(f"批量添加标签失败: {str(e)}")
+
     def get_disk_ids(self) -> List[str]:
         """获取所有磁盘编号"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT DISTINCT disk_id 
                     FROM projects 
-                    ORDER BY disk_id
+                    ORDER BY disk_no, disk_id
                 """)
                 return [row[0] for row in cursor.fetchall()]
         except Exception as e:
             print(f"[ERROR] 获取磁盘编号列表失败: {str(e)}")
             return []
 
-    def import_from_excel(self, file_path: str) -> None:
-        """从Excel导入数据"""
+    def import_from_excel(self, file_path: str,
+                          progress_callback: Optional[Callable[[int, int], None]] = None,
+                          chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict:
+        """从Excel导入数据
+        :param progress_callback: 每写入一批后调用 progress_callback(已处理行数, 总行数)
+        :return: 导入报告 {"total", "imported", "rejects": [{"row", "reason", "data"}]}
+        """
         try:
             print(f"[DEBUG] 开始导入Excel: {file_path}")
             # 读取Excel时指定列名映射
             df = pd.read_excel(
                 file_path,
-                dtype={
-                    '磁盘编号': str,
-                    '项目时间': str,
-                    '项目名称': str,
-                    '备份': str,
-                    '项目备注': str,
-                    '路径': str,
-                    '文件名称': str
-                }
+                dtype={column: str for column in EXCEL_COLUMNS}
             )
             
             # 删除空行
             df = df.dropna(how='all')
             
-            # 重命名列以匹配数据库字段
-            df = df.rename(columns={
-                '磁盘编号': 'disk_id',
-                '项目时间': 'project_date',
-                '项目名称': 'project_name',
-                '备份': 'backup_status',
-                '项目备注': 'notes',
-                '路径': 'project_path',
-                '文件名称': 'filename'
-            })
+            # 重命名列以匹配数据库字段，缺失的列按空值处理
+            df = df.rename(columns=EXCEL_COLUMNS)
+            df = df.reindex(columns=list(EXCEL_COLUMNS.values()))
             
-            # 数据清理和验证
-            def clean_data(row):
-                # 处理磁盘编号
-                row['disk_id'] = str(int(float(row['disk_id']))) if pd.notnull(row['disk_id']) else '0'
-                
-                # 处理项目时间
-                if pd.isnull(row['project_date']) or row['project_date'] == 'NANO':
-                    row['project_date'] = '未知'
-                else:
-                    row['project_date'] = str(row['project_date']).strip()
-                
-                # 处理项目名称
-                if pd.isnull(row['project_name']):
-                    row['project_name'] = '未命名项目'
-                else:
-                    row['project_name'] = str(row['project_name']).strip()
-                
-                # 处理备份状态
-                row['backup_status'] = 1 if str(row['backup_status']).strip() in ['是', '1', 'True', 'true'] else 0
-                
-                # 处理备注
-                row['notes'] = str(row['notes']).strip() if pd.notnull(row['notes']) else ''
-                
-                # 处理路径
-                row['project_path'] = str(row['project_path']).strip() if pd.notnull(row['project_path']) else ''
-                if row['project_path'] == 'NANO':
-                    row['project_path'] = ''
-                
-                # 处理文件名
-                row['filename'] = str(row['filename']).strip() if pd.notnull(row['filename']) else ''
-                if row['filename'] == 'NANO':
-                    row['filename'] = ''
-                    
-                return row
+            cleaned, rejects = self._clean_import_frame(df)
+            report = {"total": len(df), "imported": 0, "rejects": rejects}
             
-            # 应用数据清理
-            df = df.apply(clean_data, axis=1)
+            records = list(cleaned.itertuples(index=True, name=None))
+            done = len(rejects)
+            if progress_callback:
+                progress_callback(done, report["total"])
             
-            print(f"[DEBUG] 处理后的数据预览:\n{df.head()}")
+            # 单个事务内分批写入
+            with self.pool.connection() as conn:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                for start in range(0, len(records), chunk_size):
+                    chunk = records[start:start + chunk_size]
+                    report["imported"] += self._insert_import_chunk(conn, chunk, rejects)
+                    done += len(chunk)
+                    if progress_callback:
+                        progress_callback(done, report["total"])
+            self.result_cache.invalidate()
             
-            # 批量插入数据
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                for _, row in df.iterrows():
-                    try:
-                        print(f"[DEBUG] 正在处理行: {dict(row)}")
-                        cursor.execute("""
-                            INSERT INTO projects (
-                                disk_id, project_date, project_name,
-                                backup_status, notes, project_path, filename
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            row['disk_id'],
-                            row['project_date'],
-                            row['project_name'],
-                            row['backup_status'],
-                            row['notes'],
-                            row['project_path'],
-                            row['filename']
-                        ))
-                    except Exception as e:
-                        print(f"[WARNING] 跳过无效行: {str(e)}, 数据: {dict(row)}")
-                        continue
-                        
-                conn.commit()
-                print(f"[DEBUG] 导入完成，共处理 {len(df)} 条记录")
+            print(f"[DEBUG] 导入完成，共 {report['total']} 行，"
+                  f"导入 {report['imported']} 行，跳过 {len(rejects)} 行")
+            return report
                 
         except Exception as e:
             print(f"[ERROR] 导入Excel失败: {str(e)}")
             raise Exception(f"导入Excel失败: {str(e)}")
 
+    def _clean_import_frame(self, df: "pd.DataFrame") -> Tuple["pd.DataFrame", List[Dict]]:
+        """按列清理导入数据
+        :return: (可写入的数据, 无效行列表)
+        """
+        def is_blank(series):
+            return series.isna() | (series.fillna('').astype(str).str.strip() == '')
+        
+        def stripped(series):
+            return series.fillna('').astype(str).str.strip()
+        
+        result = pd.DataFrame(index=df.index)
+        
+        # 处理磁盘编号：空值记为 0，纯数字直接去掉前导 0，其他数值（如 12.0、1e3）
+        # 用 Decimal 精确取整，不经过 float64/int64，避免长编号丢失精度或溢出；其余视为无效行
+        disk_text = stripped(df['disk_id'])
+        disk_blank = is_blank(df['disk_id'])
+        disk_digits = disk_text.str.fullmatch(r'\d+')
+        result['disk_id'] = '0'
+        result.loc[disk_digits, 'disk_id'] = disk_text[disk_digits].str.lstrip('0').replace('', '0')
+        disk_other = disk_text[~disk_blank & ~disk_digits].map(_parse_disk_number)
+        result.loc[disk_other.index, 'disk_id'] = disk_other
+        disk_invalid = result['disk_id'].isna()
+        
+        # 处理项目时间
+        project_date = stripped(df['project_date'])
+        result['project_date'] = project_date.where(
+            df['project_date'].notna() & (project_date != 'NANO'), '未知'
+        )
+        
+        # 处理项目名称
+        result['project_name'] = stripped(df['project_name']).where(
+            df['project_name'].notna(), '未命名项目'
+        )
+        
+        # 处理备份状态
+        result['backup_status'] = stripped(df['backup_status']).isin(
+            ['是', '1', 'True', 'true']
+        ).astype(int)
+        
+        # 处理备注、路径、文件名
+        result['notes'] = stripped(df['notes'])
+        for column in ('project_path', 'filename'):
+            values = stripped(df[column])
+            result[column] = values.where(values != 'NANO', '')
+        result['project_path'] = result['project_path'].map(normalize_project_path)
+        
+        rejects = [
+            {
+                "row": int(index) + 2,  # 表头占第 1 行
+                "reason": f"磁盘编号无效: {df.at[index, 'disk_id']}",
+                "data": {k: (None if pd.isna(v) else v) for k, v in df.loc[index].items()},
+            }
+            for index in df.index[disk_invalid]
+        ]
+        return result[~disk_invalid], rejects
+
+    def _insert_import_chunk(self, conn: sqlite3.Connection, chunk: List[Tuple],
+                             rejects: List[Dict]) -> int:
+        """写入一批导入数据，批量失败时逐行重试并记录无效行"""
+        insert_sql = """
+            INSERT INTO projects (
+                disk_id, project_date, project_name,
+                backup_status, notes, project_path, filename
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        conn.execute("SAVEPOINT import_chunk")
+        try:
+            conn.executemany(insert_sql, [record[1:] for record in chunk])
+            conn.execute("RELEASE import_chunk")
+            return len(chunk)
+        except sqlite3.Error:
+            conn.execute("ROLLBACK TO import_chunk")
+        
+        inserted = 0
+        for record in chunk:
+            try:
+                conn.execute(insert_sql, record[1:])
+                inserted += 1
+            except sqlite3.Error as e:
+                rejects.append({
+                    "row": int(record[0]) + 2,
+                    "reason": str(e),
+                    "data": dict(zip(EXCEL_COLUMNS.values(), record[1:])),
+                })
+        conn.execute("RELEASE import_chunk")
+        return inserted
+
+    def save_import_rejects(self, rejects: List[Dict], file_path: str) -> None:
+        """将导入时跳过的行写入 CSV 报告"""
+        headers = ['行号', '原因'] + list(EXCEL_COLUMNS.keys())
+        with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            for reject in rejects:
+                data = reject.get("data", {})
+                writer.writerow(
+                    [reject["row"], reject["reason"]]
+                    + [data.get(column, '') for column in EXCEL_COLUMNS.values()]
+                )
+
     def export_to_excel(self, file_path: str) -> None:
         """导出数据到Excel"""
+        self.export_projects(file_path, file_format="xlsx")
+
+    def export_projects(self, file_path: str, filters: Dict = None,
+                        file_format: Optional[str] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+        """流式导出项目，内存占用与数据量无关
+        :param file_format: xlsx / csv / jsonl，默认根据扩展名判断，不支持的格式抛出 ValueError
+        :param progress_callback: 每写出一批后调用 progress_callback(已导出行数, 总行数)
+        :return: 导出行数
+        """
+        if not file_format:
+            file_format = os.path.splitext(file_path)[1].lstrip('.').lower()
+        if file_format == "ndjson":
+            file_format = "jsonl"
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {file_format or '无扩展名'}，可选 {'/'.join(EXPORT_FORMATS)}")
+        
         try:
-            print(f"[DEBUG] 开始导出Excel: {file_path}")
-            projects = self.get_projects()
-            print(f"[DEBUG] 获取到 {len(projects)} 条记录")
-            
-            df = pd.DataFrame(projects)
+            print(f"[DEBUG] 开始导出 {file_format}: {file_path}")
             
-            # 重命名列为中文
-            df = df.rename(columns={
-                'disk_id': '磁盘编号',
-                'project_date': '项目时间',
-                'project_name': '项目名称',
-                'backup_status': '备份',
-                'notes': '项目备注',
-                'project_path': '路径',
-                'filename': '文件名称'
-            })
-            
-            # 处理备份状态显示
-            df['备份'] = df['备份'].apply(lambda x: '是' if x == 1 else '否')
+            with self.pool.connection() as conn:
+                from_sql, where_clauses, params = self._build_where(filters)
+                where_sql = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+                total = conn.execute(
+                    f"SELECT COUNT(*) FROM {from_sql}{where_sql}", params
+                ).fetchone()[0]
+                
+                cursor = conn.execute(
+                    f"SELECT {PROJECT_COLUMNS} FROM {from_sql}{where_sql} "
+                    f"ORDER BY {self._build_order(filters, from_sql)}",
+                    params
+                )
+                columns = [column[0] for column in cursor.description]
+                
+                def batches():
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield rows
+                
+                writer = getattr(self, f"_export_{file_format}")
+                exported = writer(file_path, columns, batches(), total, progress_callback)
             
-            print(f"[DEBUG] DataFrame预览:\n{df.head()}")
-            df.to_excel(file_path, index=False)
-            print("[DEBUG] 导出完成")
+            print(f"[DEBUG] 导出完成，共 {exported} 条记录")
+            return exported
             
         except Exception as e:
-            print(f"[ERROR] 导出Excel失败: {str(e)}")
-            raise Exception(f"导出Excel失败: {str(e)}")
+            print(f"[ERROR] 导出失败: {str(e)}")
+            raise Exception(f"导出失败: {str(e)}")
+
+    def _export_headers(self, columns: List[str]) -> List[str]:
+        """导出表头，业务字段使用中文列名"""
+        names = {field: name for name, field in EXCEL_COLUMNS.items()}
+        return [names.get(column, column) for column in columns]
+
+    def _export_rows(self, columns: List[str], rows: List[sqlite3.Row]):
+        """转换为表格行，备份状态显示为 是/否"""
+        backup_index = columns.index('backup_status')
+        for row in rows:
+            values = list(row)
+            values[backup_index] = '是' if values[backup_index] == 1 else '否'
+            yield values
+
+    def _export_xlsx(self, file_path, columns, batches, total, progress_callback) -> int:
+        """以只写模式逐行写出 Excel"""
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(self._export_headers(columns))
+        exported = 0
+        for rows in batches:
+            for values in self._export_rows(columns, rows):
+                sheet.append(values)
+            exported += len(rows)
+            if progress_callback:
+                progress_callback(exported, total)
+        workbook.save(file_path)
+        return exported
+
+    def _export_csv(self, file_path, columns, batches, total, progress_callback) -> int:
+        """逐批写出 CSV（带 BOM 以便 Excel 识别中文）"""
+        exported = 0
+        with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self._export_headers(columns))
+            for rows in batches:
+                writer.writerows(self._export_rows(columns, rows))
+                exported += len(rows)
+                if progress_callback:
+                    progress_callback(exported, total)
+        return exported
+
+    def _export_jsonl(self, file_path, columns, batches, total, progress_callback) -> int:
+        """逐行写出 JSON Lines，保留数据库字段名"""
+        exported = 0
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for rows in batches:
+                f.writelines(
+                    json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+                exported += len(rows)
+                if progress_callback:
+                    progress_callback(exported, total)
+        return exported
+
+    def cache_stats(self) -> Dict:
+        """查询结果缓存的命中统计"""
+        return self.result_cache.stats()
 
     def _get_connection(self):
-        """获取数据库连接"""
-        if not self.conn:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row
-        return self.conn
\ No newline at end of file
+        """获取当前线程的数据库连接"""
+        return self.pool.get()
\ No newline at end of file
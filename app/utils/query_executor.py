@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.db_pool import ConnectionPool
+
+# 进度回调的检查间隔（SQLite 虚拟机指令数）
+PROGRESS_HANDLER_STEPS = 1000
+
+
+class _QueryJob:
+    """待执行的查询任务"""
+    def __init__(self, generation: int, query: Callable[[], Any],
+                 on_result: Callable[[Any], None],
+                 on_error: Optional[Callable[[Exception], None]]):
+        self.generation = generation
+        self.query = query
+        self.on_result = on_result
+        self.on_error = on_error
+
+
+class QueryExecutor:
+    """后台查询执行器 - 防抖、中断过期查询，只应用最新结果
+
+    查询在单独的工作线程中执行，使用该线程在连接池中的连接。
+    提交新查询时，正在执行的旧查询会通过 SQLite 进度回调被中断，
+    尚未开始的旧查询直接丢弃。
+    """
+    def __init__(self, pool: ConnectionPool, debounce: float = 0.3):
+        self.pool = pool
+        self.debounce = debounce
+        self._generation = 0
+        self._pending: Optional[_QueryJob] = None
+        self._timer: Optional[threading.Timer] = None
+        self._condition = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(
+            target=self._run, name="QueryExecutor", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, query: Callable[[], Any], on_result: Callable[[Any], None],
+               on_error: Optional[Callable[[Exception], None]] = None,
+               delay: Optional[float] = None):
+        """提交查询，delay 秒内的后续提交会取代本次查询
+        :param delay: 防抖延迟，默认使用 self.debounce
+        """
+        delay = self.debounce if delay is None else delay
+        with self._condition:
+            if self._closed:
+                return
+            self._generation += 1
+            job = _QueryJob(self._generation, query, on_result, on_error)
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+            if delay > 0:
+                self._timer = threading.Timer(delay, self._enqueue, args=(job,))
+                self._timer.daemon = True
+                self._timer.start()
+            else:
+                self._pending = job
+                self._condition.notify()
+
+    def cancel(self):
+        """丢弃所有未完成的查询"""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def close(self):
+        """停止工作线程"""
+        self.cancel()
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _enqueue(self, job: _QueryJob):
+        """防抖结束后放入待执行槽位"""
+        with self._condition:
+            if job.generation == self._generation and not self._closed:
+                self._pending = job
+                self._condition.notify()
+
+    def _is_current(self, job: _QueryJob) -> bool:
+        return job.generation == self._generation and not self._closed
+
+    def _run(self):
+        """工作线程主循环"""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                job = self._pending
+                self._pending = None
+
+            conn = self.pool.get()
+            # 返回非零值时 SQLite 中断当前语句
+            conn.set_progress_handler(
+                lambda: 0 if self._is_current(job) else 1,
+                PROGRESS_HANDLER_STEPS
+            )
+            try:
+                result = job.query()
+            except Exception as e:
+                if self._is_current(job):
+                    print(f"[ERROR] 后台查询失败: {str(e)}")
+                    if job.on_error:
+                        job.on_error(e)
+                continue
+            finally:
+                conn.set_progress_handler(None, 0)
+
+            if self._is_current(job):
+                try:
+                    job.on_result(result)
+                except Exception as e:
+                    print(f"[ERROR] 应用查询结果失败: {str(e)}")
+
+
+_executors: Dict[str, QueryExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_query_executor(pool: ConnectionPool) -> QueryExecutor:
+    """获取连接池共享的后台查询执行器
+
+    视图每次导航都会重建，共享执行器避免每次创建新的工作线程和连接；
+    视图销毁时只需 cancel()，不要 close()。
+    """
+    with _executors_lock:
+        executor = _executors.get(pool.db_path)
+        if executor is None or executor._closed:
+            executor = _executors[pool.db_path] = QueryExecutor(pool)
+        return executor
+
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.backup_verifier import (
+    DEFAULT_ALGORITHM, DEFAULT_WORKERS, SMALL_BATCH_BYTES, SMALL_BATCH_FILES,
+    VerificationResult, new_hasher, scan_tree
+)
+from app.utils.io_scheduler import IOScheduler, get_scheduler
+from app.utils.io_telemetry import ProgressTelemetry
+
+# 抽样块大小，偏移按块对齐（须为 4 KiB 的整数倍）
+SAMPLE_BLOCK_SIZE = 1024 * 1024
+
+# 默认抽样比例（不含必读的首尾块）
+DEFAULT_SAMPLE_FRACTION = 0.01
+
+# 置信度按“该比例的块损坏”计算被发现的概率
+CORRUPTION_RATE = 0.001
+
+# 未发现问题时，损坏比例上限的置信水平
+BOUND_CONFIDENCE = 0.95
+
+
+def sample_offsets(size: int, fraction: float, rng: random.Random,
+                   block_size: int = SAMPLE_BLOCK_SIZE) -> List[int]:
+    """选出要读取的块偏移：首块、尾块，以及按比例随机抽取的其余块（升序）"""
+    if size <= 0:
+        return []
+    blocks = (size + block_size - 1) // block_size
+    if blocks <= 2:
+        return [index * block_size for index in range(blocks)]
+    middle = blocks - 2
+    count = min(middle, math.ceil(middle * fraction))
+    chosen = rng.sample(range(1, blocks - 1), count) if count else []
+    return [0, *sorted(index * block_size for index in chosen), (blocks - 1) * block_size]
+
+
+def hash_blocks(path: str, offsets: List[int], algorithm: str = DEFAULT_ALGORITHM,
+                block_size: int = SAMPLE_BLOCK_SIZE,
+                progress: Optional[Callable[[int], None]] = None) -> List[str]:
+    """按偏移读取并分别计算每个块的哈希"""
+    digests = []
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        for offset in offsets:
+            f.seek(offset)
+            size = f.readinto(buffer)
+            hasher = new_hasher(algorithm)
+            hasher.update(view[:size])
+            digests.append(hasher.hexdigest())
+            if progress:
+                progress(size)
+    return digests
+
+
+def _sample_batch(root: str, items: List[Tuple[str, List[int]]], algorithm: str, block_size: int,
+                  progress: Optional[Callable[[int], None]] = None):
+    """读取一批文件的抽样块，返回 [(相对路径, 块哈希列表或 (错误类型, 错误信息))]"""
+    outcomes = []
+    for rel_path, offsets in items:
+        try:
+            path = os.path.join(root, *rel_path.split("/"))
+            outcomes.append((rel_path, hash_blocks(path, offsets, algorithm, block_size, progress)))
+        except Exception as e:
+            outcomes.append((rel_path, (type(e).__name__, str(e))))
+    return outcomes
+
+
+@dataclass
+class SampleResult(VerificationResult):
+    """抽样校验结果"""
+    fraction: float = DEFAULT_SAMPLE_FRACTION
+    block_size: int = SAMPLE_BLOCK_SIZE
+    seed: int = 0
+    sampled_blocks: int = 0
+    total_blocks: int = 0
+    sampled_bytes: int = 0
+
+    @property
+    def confidence(self) -> float:
+        """若 CORRUPTION_RATE 比例的块损坏，本次抽样至少发现一处的概率"""
+        return 1.0 - (1.0 - CORRUPTION_RATE) ** self.sampled_blocks
+
+    @property
+    def corrupt_rate_bound(self) -> float:
+        """未发现问题时，以 BOUND_CONFIDENCE 置信水平估计的损坏块比例上限"""
+        if not self.sampled_blocks:
+            return 1.0
+        return 1.0 - (1.0 - BOUND_CONFIDENCE) ** (1.0 / self.sampled_blocks)
+
+
+class SampleVerifier:
+    """抽样校验 - 只读取每个文件的首尾块和随机抽取的部分块，快速检查备份盘
+
+    源和备份读取相同偏移的块并逐块比较哈希，抽样块数越多置信度越高；
+    大小不同的文件直接判为不一致。
+    """
+    def __init__(self, fraction: float = DEFAULT_SAMPLE_FRACTION,
+                 algorithm: Optional[str] = None,
+                 block_size: int = SAMPLE_BLOCK_SIZE,
+                 max_workers: int = DEFAULT_WORKERS,
+                 scheduler: Optional[IOScheduler] = None,
+                 seed: Optional[int] = None):
+        if not 0 <= fraction <= 1:
+            raise ValueError(f"抽样比例必须在 0 到 1 之间: {fraction}")
+        if block_size <= 0 or block_size % 4096:
+            raise ValueError(f"抽样块大小必须为 4096 的整数倍: {block_size}")
+        self.fraction = fraction
+        self.algorithm = algorithm or DEFAULT_ALGORITHM
+        self.block_size = block_size
+        self.max_workers = max_workers
+        self.scheduler = scheduler or get_scheduler()
+        self.seed = seed
+
+    def verify(self, source: str, backup: str,
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               telemetry: Optional[ProgressTelemetry] = None) -> SampleResult:
+        """抽样校验备份目录
+        :param progress_callback: progress_callback(已完成文件数, 总文件数)
+        """
+        if not os.path.isdir(source):
+            raise ValueError(f"源文件夹不存在: {source}")
+        if not os.path.isdir(backup):
+            raise ValueError(f"备份文件夹不存在: {backup}")
+
+        started = time.monotonic()
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        result = SampleResult(
+            source, backup, self.algorithm,
+            fraction=self.fraction, block_size=self.block_size, seed=seed,
+        )
+
+        source_future = self.scheduler.submit(source, scan_tree, source)
+        backup_future = self.scheduler.submit(backup, scan_tree, backup)
+        source_files = source_future.result()
+        backup_files = backup_future.result()
+
+        result.missing = sorted(set(source_files) - set(backup_files))
+        result.extra = sorted(set(backup_files) - set(source_files))
+        result.total_files = len(source_files)
+        result.total_bytes = sum(size for size, _ in source_files.values())
+
+        # 偏移在主线程按固定种子生成，源和备份读取相同的块，结果可复现
+        rng = random.Random(seed)
+        plan: Dict[str, List[int]] = {}
+        for rel_path in sorted(set(source_files) & set(backup_files)):
+            size = source_files[rel_path][0]
+            if size != backup_files[rel_path][0]:
+                result.mismatched.append(rel_path)
+                continue
+            offsets = sample_offsets(size, self.fraction, rng, self.block_size)
+            plan[rel_path] = offsets
+            result.total_blocks += (size + self.block_size - 1) // self.block_size
+            result.sampled_blocks += len(offsets)
+            result.sampled_bytes += sum(min(self.block_size, size - offset) for offset in offsets)
+
+        done = result.total_files - len(plan)
+        if progress_callback:
+            progress_callback(done, result.total_files)
+        if telemetry:
+            telemetry.start_phase("sample", result.sampled_bytes * 2, len(plan))
+
+        for rel_path, outcome in self._sample_pairs(source, backup, plan, telemetry):
+            if isinstance(outcome, Exception):
+                result.errors.append((rel_path, str(outcome)))
+                status = "error"
+            elif outcome:
+                result.matched.append(rel_path)
+                status = "ok"
+            else:
+                result.mismatched.append(rel_path)
+                status = "mismatch"
+            if telemetry:
+                telemetry.file_done(rel_path, source_files[rel_path][0], status=status)
+            done += 1
+            if progress_callback:
+                progress_callback(done, result.total_files)
+
+        result.matched.sort()
+        result.mismatched.sort()
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _sample_pairs(self, source: str, backup: str, plan: Dict[str, List[int]],
+                      telemetry: Optional[ProgressTelemetry]):
+        """并发读取源和备份的抽样块，逐个产出 (相对路径, 是否一致或异常)
+
+        每个文件只读少量块，按读取量打包成批次提交，减少调度开销。
+        """
+        max_pending = self.max_workers * 4
+        roots = (source, backup)
+        pending = {}
+        digests: Dict[str, List] = {}
+        batch: List[Tuple[str, List[int]]] = []
+        batch_bytes = 0
+        queue = iter(plan.items())
+
+        def submit(items: List[Tuple[str, List[int]]]):
+            for index, root in enumerate(roots):
+                progress = None
+                if telemetry:
+                    progress = lambda count, root=root: telemetry.add_bytes(count, root)
+                future = self.scheduler.submit(
+                    root, _sample_batch, root, items, self.algorithm, self.block_size, progress
+                )
+                pending[future] = index
+
+        def submit_next() -> bool:
+            nonlocal batch_bytes
+            item = next(queue, None)
+            if item is None:
+                if batch:
+                    submit(batch[:])
+                    batch.clear()
+                return False
+            rel_path, offsets = item
+            digests[rel_path] = [None, None]
+            batch.append(item)
+            batch_bytes += len(offsets) * self.block_size
+            if len(batch) >= SMALL_BATCH_FILES or batch_bytes >= SMALL_BATCH_BYTES:
+                submit(batch[:])
+                batch.clear()
+                batch_bytes = 0
+            return True
+
+        while True:
+            while len(pending) < max_pending and submit_next():
+                pass
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                for rel_path, outcome in future.result():
+                    if isinstance(outcome, tuple):
+                        outcome = OSError(f"{outcome[0]}: {outcome[1]}")
+                    pair = digests[rel_path]
+                    pair[index] = outcome
+                    if pair[1 - index] is None:
+                        continue
+                    del digests[rel_path]
+                    first, second = pair
+                    if isinstance(first, Exception):
+                        yield rel_path, first
+                    elif isinstance(second, Exception):
+                        yield rel_path, second
+                    else:
+                        yield rel_path, first == second
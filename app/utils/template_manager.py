@@ -1,8 +1,12 @@
 import sqlite3
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import os
 from pathlib import Path
+from app.utils.db_pool import ConnectionPool, get_pool
+from app.utils.db_migrations import ensure_schema
 
 @dataclass
 class TemplateNode:
@@ -15,6 +19,192 @@ class TemplateNode:
     meta: dict
     children: List['TemplateNode'] = None
 
+
+class TemplateTreeCache:
+    """按项目类型缓存的模板树
+
+    每个数据库文件共享一个实例。模板的读写都通过缓存持有的独立连接串行执行，
+    该连接自己的提交不会改变 PRAGMA data_version，因此 data_version 变化
+    只说明其他连接（其他进程、FolderManager 等）写过数据库。
+    缓存项的版本戳为 (本进程写入计数, data_version)，与调用线程无关；
+    本进程的修改直接更新缓存中的节点并递增写入计数，不需要重新查询。
+    """
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        # 项目类型 -> (版本戳, 根节点列表, id -> 节点)
+        self._entries: Dict[str, Tuple[Tuple, List[TemplateNode], Dict[int, TemplateNode]]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def connection(self):
+        """独占缓存的连接，退出时提交或回滚"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self.pool.open_connection()
+            try:
+                yield self._conn
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                raise
+            else:
+                if self._conn.in_transaction:
+                    self._conn.commit()
+
+    def _stamp(self) -> Tuple:
+        return self.generation, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get(self, project_type: str) -> Optional[List[TemplateNode]]:
+        """在 connection() 内调用"""
+        with self._lock:
+            entry = self._entries.get(project_type)
+            if entry is None or entry[0] != self._stamp():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, project_type: str, roots: List[TemplateNode], nodes: Dict[int, TemplateNode]):
+        """在 connection() 内调用"""
+        with self._lock:
+            self._entries[project_type] = (self._stamp(), roots, nodes)
+
+    def _update(self, apply: Callable[[str, List[TemplateNode], Dict[int, TemplateNode]], bool]):
+        """本进程提交修改后更新缓存（在 connection() 内调用）
+
+        之后没有其他连接写入的缓存项原地更新，否则丢弃；apply 返回 False 时也丢弃。
+        """
+        with self._lock:
+            current = self._stamp()
+            self.generation += 1
+            fresh = self._stamp()
+            for project_type, (stamp, roots, nodes) in list(self._entries.items()):
+                if stamp == current and apply(project_type, roots, nodes):
+                    self._entries[project_type] = (fresh, roots, nodes)
+                else:
+                    del self._entries[project_type]
+
+    def add_node(self, project_type: str, node: TemplateNode):
+        """新节点的排序号最大，追加到同级末尾"""
+        def apply(entry_type, roots, nodes):
+            if entry_type != project_type:
+                return True
+            if node.parent_id is None:
+                roots.append(node)
+            elif node.parent_id in nodes:
+                nodes[node.parent_id].children.append(node)
+            else:
+                return False
+            nodes[node.id] = node
+            return True
+        self._update(apply)
+
+    def rename_node(self, node_id: int, new_name: str):
+        def apply(entry_type, roots, nodes):
+            if node_id in nodes:
+                nodes[node_id].name = new_name
+            return True
+        self._update(apply)
+
+    def move_node(self, node_id: int, new_parent_id: Optional[int]):
+        """移动节点，追加到新父节点的子节点末尾"""
+        def apply(entry_type, roots, nodes):
+            node = nodes.get(node_id)
+            if node is None:
+                return True
+            if new_parent_id is not None and new_parent_id not in nodes:
+                return False
+            siblings = roots if node.parent_id is None else nodes[node.parent_id].children
+            siblings[:] = [sibling for sibling in siblings if sibling.id != node_id]
+            node.parent_id = new_parent_id
+            (roots if new_parent_id is None else nodes[new_parent_id].children).append(node)
+            return True
+        self._update(apply)
+
+    def remove_node(self, node_id: int):
+        """移除节点及其子树"""
+        def apply(entry_type, roots, nodes):
+            node = nodes.get(node_id)
+            if node is None:
+                return True
+            siblings = roots if node.parent_id is None else nodes[node.parent_id].children
+            siblings[:] = [sibling for sibling in siblings if sibling.id != node_id]
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                nodes.pop(current.id, None)
+                stack.extend(current.children)
+            return True
+        self._update(apply)
+
+    def invalidate(self):
+        """清空缓存"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "generation": self.generation,
+            }
+
+
+def _build_tree(rows, root_id: Optional[int] = None) -> Tuple[List[TemplateNode], Dict[int, TemplateNode]]:
+    """由查询结果构建树
+    :param root_id: 子树根节点 id，不指定时 parent_id 为空的节点作为根节点
+    :return: (根节点列表, id -> 节点)
+    """
+    # 构建节点字典
+    nodes_dict = {}
+    root_nodes = []
+    
+    # 第一遍：创建所有节点
+    for row in rows:
+        node = TemplateNode(
+            id=row['id'],
+            name=row['name'],
+            type='folder',
+            parent_id=row['parent_id'],
+            naming_rule=None,
+            meta={},
+            children=[]
+        )
+        nodes_dict[node.id] = node
+    
+    # 第二遍：构建树结构
+    for node in nodes_dict.values():
+        if node.id == root_id or (root_id is None and node.parent_id is None):
+            root_nodes.append(node)
+        else:
+            parent = nodes_dict.get(node.parent_id)
+            if parent:
+                parent.children.append(node)
+    
+    return root_nodes, nodes_dict
+
+
+_tree_caches: Dict[str, TemplateTreeCache] = {}
+_tree_caches_lock = threading.Lock()
+
+
+def get_tree_cache(db_path: str) -> TemplateTreeCache:
+    """获取数据库文件对应的共享模板树缓存（其他模块直接写 folder_templates 后调用 invalidate）"""
+    key = os.path.abspath(db_path)
+    with _tree_caches_lock:
+        cache = _tree_caches.get(key)
+        if cache is None:
+            cache = _tree_caches[key] = TemplateTreeCache(get_pool(key))
+        return cache
+
+
 class TemplateManager:
     """模板管理器 - 核心业务逻辑"""
     def __init__(self, db_path: str):
@@ -23,6 +213,9 @@ class TemplateManager:
         :param db_path: 数据库文件的完整路径（不是目录）
         """
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        # 模板的读写通过缓存的独立连接执行，修改后原地更新缓存
+        self.tree_cache = get_tree_cache(db_path)
         self._init_database()
         
     def _init_database(self):
@@ -31,23 +224,19 @@ class TemplateManager:
             # 确保数据库目录存在
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            # 读取 schema 文件
-            schema_path = Path(__file__).parent.parent / 'database' / 'schema.sql'
-            with open(schema_path, 'r', encoding='utf-8') as f:
-                schema = f.read()
-            
-            # 初始化数据库
-            with sqlite3.connect(self.db_path) as conn:
-                conn.executescript(schema)
+            # 应用数据库迁移
+            ensure_schema(self.db_path)
                 
         except Exception as e:
             raise RuntimeError(f"数据库初始化失败: {e}")
 
     def get_template_tree(self, project_type: str) -> List[TemplateNode]:
-        """获取完整的模板树结构"""
+        """获取完整的模板树结构（数据未变化时返回缓存，调用方不要修改返回值）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.tree_cache.connection() as conn:
+                cached = self.tree_cache.get(project_type)
+                if cached is not None:
+                    return cached
                 cursor = conn.cursor()
                 
                 # 获取所有节点
@@ -63,34 +252,9 @@ class TemplateManager:
                     ORDER BY f.parent_id NULLS FIRST, f.sort_order, f.name
                 """, (project_type,))
                 
-                rows = cursor.fetchall()
-                
-                # 构建节点字典
-                nodes_dict = {}
-                root_nodes = []
-                
-                # 第一遍：创建所有节点
-                for row in rows:
-                    node = TemplateNode(
-                        id=row['id'],
-                        name=row['name'],
-                        type='folder',
-                        parent_id=row['parent_id'],
-                        naming_rule=None,
-                        meta={},
-                        children=[]
-                    )
-                    nodes_dict[node.id] = node
-                
-                # 第二遍：构建树结构
-                for node in nodes_dict.values():
-                    if node.parent_id is None:
-                        root_nodes.append(node)
-                    else:
-                        parent = nodes_dict.get(node.parent_id)
-                        if parent:
-                            parent.children.append(node)
+                root_nodes, nodes_dict = _build_tree(cursor.fetchall())
                 
+                self.tree_cache.put(project_type, root_nodes, nodes_dict)
                 return root_nodes
                 
         except Exception as e:
@@ -100,7 +264,7 @@ class TemplateManager:
     def create_node(self, project_type: str, name: str, parent_id: Optional[int] = None) -> int:
         """创建新节点"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.tree_cache.connection() as conn:
                 cursor = conn.cursor()
                 
                 # 获取项目类型ID
@@ -140,6 +304,17 @@ class TemplateManager:
                 """, (type_id, parent_id, name, sort_order))
                 
                 new_id = cursor.lastrowid
+                conn.commit()
+                
+                self.tree_cache.add_node(project_type, TemplateNode(
+                    id=new_id,
+                    name=name,
+                    type='folder',
+                    parent_id=parent_id,
+                    naming_rule=None,
+                    meta={},
+                    children=[]
+                ))
                 return new_id
                 
         except Exception as e:
@@ -149,7 +324,7 @@ class TemplateManager:
     def rename_node(self, node_id: int, new_name: str) -> bool:
         """重命名节点"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.tree_cache.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE folder_templates 
@@ -157,7 +332,11 @@ class TemplateManager:
                     WHERE id = ?
                 """, (new_name, node_id))
                 conn.commit()
-                return cursor.rowcount > 0
+                renamed = cursor.rowcount > 0
+                
+                if renamed:
+                    self.tree_cache.rename_node(node_id, new_name)
+                return renamed
                 
         except sqlite3.IntegrityError:
             # 唯一约束违反，说明同名文件夹已存在
@@ -169,27 +348,166 @@ class TemplateManager:
     def delete_node(self, node_id: int) -> bool:
         """删除节点及其所有子节点"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.tree_cache.connection() as conn:
                 cursor = conn.cursor()
                 
-                # 使用递归CTE删除节点及其所有子节点
+                # 通过闭包表一次删除节点及其所有子节点
                 cursor.execute("""
-                    WITH RECURSIVE descendants AS (
-                        -- 起始节点
-                        SELECT id FROM folder_templates WHERE id = ?
-                        UNION ALL
-                        -- 递归查找子节点
-                        SELECT f.id 
-                        FROM folder_templates f
-                        INNER JOIN descendants d ON f.parent_id = d.id
+                    DELETE FROM folder_templates
+                    WHERE id IN (
+                        SELECT descendant_id FROM folder_template_paths
+                        WHERE ancestor_id = ?
                     )
-                    DELETE FROM folder_templates 
-                    WHERE id IN descendants
                 """, (node_id,))
                 
                 conn.commit()
+                
+                self.tree_cache.remove_node(node_id)
                 return True
                 
         except Exception as e:
             print(f"[ERROR] 删除失败: {str(e)}")
-            raise RuntimeError(f"删除失败: {e}") 
\ No newline at end of file
+            raise RuntimeError(f"删除失败: {e}")
+
+    def get_subtree(self, node_id: int) -> Optional[TemplateNode]:
+        """获取节点及其所有子节点"""
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute("""
+                    SELECT f.id, f.name, f.parent_id, f.sort_order
+                    FROM folder_template_paths p
+                    INNER JOIN folder_templates f ON f.id = p.descendant_id
+                    WHERE p.ancestor_id = ?
+                    ORDER BY p.depth, f.sort_order, f.name
+                """, (node_id,)).fetchall()
+            
+            roots, _ = _build_tree(rows, node_id)
+            return roots[0] if roots else None
+            
+        except Exception as e:
+            print(f"[ERROR] 获取子树失败: {str(e)}")
+            raise RuntimeError(f"获取子树失败: {e}")
+
+    def get_depth(self, node_id: int) -> Optional[int]:
+        """节点深度（根节点为 0），节点不存在时返回 None"""
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute("""
+                    SELECT MAX(depth) FROM folder_template_paths
+                    WHERE descendant_id = ?
+                """, (node_id,)).fetchone()
+                return row[0]
+                
+        except Exception as e:
+            print(f"[ERROR] 获取深度失败: {str(e)}")
+            raise RuntimeError(f"获取深度失败: {e}")
+
+    def move_node(self, node_id: int, new_parent_id: Optional[int] = None) -> bool:
+        """移动节点及其子树到新的父节点下（None 为根目录），只能在同一项目类型内移动
+        
+        闭包表由触发器更新，移动到自身或子文件夹下时触发器中止语句。
+        """
+        try:
+            with self.tree_cache.connection() as conn:
+                cursor = conn.execute("""
+                    UPDATE folder_templates
+                    SET parent_id = :parent_id,
+                        sort_order = (
+                            SELECT COALESCE(MAX(siblings.sort_order), 0) + 1
+                            FROM folder_templates siblings
+                            WHERE siblings.project_type_id = folder_templates.project_type_id
+                              AND siblings.parent_id IS :parent_id
+                        )
+                    WHERE id = :id AND (
+                        :parent_id IS NULL OR project_type_id = (
+                            SELECT project_type_id FROM folder_templates WHERE id = :parent_id
+                        )
+                    )
+                """, {"id": node_id, "parent_id": new_parent_id})
+                moved = cursor.rowcount > 0
+                conn.commit()
+                
+                if moved:
+                    self.tree_cache.move_node(node_id, new_parent_id)
+                return moved
+            
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE" in str(e):
+                raise ValueError("同名文件夹已存在")
+            raise ValueError(str(e))
+        except Exception as e:
+            print(f"[ERROR] 移动失败: {str(e)}")
+            raise RuntimeError(f"移动失败: {e}")
+
+    def copy_subtree(self, node_id: int, new_parent_id: Optional[int] = None,
+                     new_name: Optional[str] = None) -> int:
+        """复制节点及其子树到新的父节点下（None 为根目录）
+        :param new_name: 副本根节点的名称，默认与原节点相同
+        :return: 副本根节点 id
+        
+        副本 id 按层级顺序连续分配，父节点先于子节点插入，闭包表由触发器生成；
+        复制到其他项目类型的父节点下时，副本属于该项目类型。
+        """
+        try:
+            with self.tree_cache.connection() as conn:
+                cursor = conn.execute("""
+                    INSERT INTO folder_templates (
+                        id, project_type_id, parent_id, name, description, sort_order
+                    )
+                    WITH subtree AS (
+                        SELECT
+                            p.descendant_id AS old_id,
+                            p.depth,
+                            (SELECT MAX(id) FROM folder_templates)
+                                + ROW_NUMBER() OVER (ORDER BY p.depth, p.descendant_id) AS new_id
+                        FROM folder_template_paths p
+                        WHERE p.ancestor_id = :id
+                    ),
+                    target AS (
+                        SELECT COALESCE(
+                            (SELECT project_type_id FROM folder_templates WHERE id = :parent_id),
+                            (SELECT project_type_id FROM folder_templates WHERE id = :id)
+                        ) AS type_id
+                    )
+                    SELECT
+                        s.new_id,
+                        target.type_id,
+                        CASE WHEN s.depth = 0 THEN :parent_id ELSE parent.new_id END,
+                        CASE WHEN s.depth = 0 THEN COALESCE(:name, f.name) ELSE f.name END,
+                        f.description,
+                        CASE WHEN s.depth = 0 THEN (
+                            SELECT COALESCE(MAX(siblings.sort_order), 0) + 1
+                            FROM folder_templates siblings
+                            WHERE siblings.project_type_id = target.type_id
+                              AND siblings.parent_id IS :parent_id
+                        ) ELSE f.sort_order END
+                    FROM subtree s
+                    CROSS JOIN target
+                    INNER JOIN folder_templates f ON f.id = s.old_id
+                    LEFT JOIN subtree parent ON parent.old_id = f.parent_id
+                    WHERE :parent_id IS NULL
+                       OR EXISTS (SELECT 1 FROM folder_templates WHERE id = :parent_id)
+                    ORDER BY s.new_id
+                """, {"id": node_id, "parent_id": new_parent_id, "name": new_name})
+                if cursor.rowcount <= 0:
+                    raise ValueError("节点或目标文件夹不存在")
+                # 副本 id 连续，最后插入的是最大的 id
+                new_id = cursor.lastrowid - cursor.rowcount + 1
+                conn.commit()
+                
+                self.tree_cache.invalidate()
+                return new_id
+            
+        except ValueError:
+            raise
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE" in str(e):
+                raise ValueError("同名文件夹已存在")
+            raise ValueError(str(e))
+        except Exception as e:
+            print(f"[ERROR] 复制失败: {str(e)}")
+            raise RuntimeError(f"复制失败: {e}")
+
+    def invalidate_cache(self):
+        """清空模板树缓存（直接修改 folder_templates 后调用）"""
+        self.tree_cache.invalidate()
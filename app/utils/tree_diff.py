@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.backup_verifier import (
+    DEFAULT_ALGORITHM, DEFAULT_WORKERS, HASH_CHUNK_SIZE, MANIFEST_FILES, hash_file
+)
+from app.utils.io_scheduler import IOScheduler, get_scheduler
+
+# 目录相对路径 -> {文件名: (大小, 修改时间ns)}
+# 按目录分组保存，文件只保存名称，不为每个文件拼接完整路径
+Snapshot = Dict[str, Dict[str, Tuple[int, int]]]
+
+# 修改时间允许的误差：FAT32 等文件系统的时间精度为 2 秒
+MTIME_TOLERANCE_NS = 2_000_000_000
+
+
+def _join(directory: str, name: str) -> str:
+    return f"{directory}/{name}" if directory else name
+
+
+def _scan_subtree(root: str, start: str, follow_symlinks: bool = False,
+                  errors: Optional[List[Tuple[str, str]]] = None) -> Snapshot:
+    """遍历 root 下的 start 子目录（含自身）"""
+    snapshot: Snapshot = {}
+    stack = [start]
+    visited = set()
+    if follow_symlinks:
+        root_stat = os.stat(root)
+        visited.add((root_stat.st_dev, root_stat.st_ino))
+    while stack:
+        directory = stack.pop()
+        files = {}
+        path = os.path.join(root, *directory.split("/")) if directory else root
+        if follow_symlinks:
+            # 跟随链接时按 (设备, inode) 去重，避免链接指向上级目录时无限循环
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) in visited:
+                if errors is not None:
+                    errors.append((directory, "符号链接形成循环，已跳过"))
+                continue
+            visited.add((st.st_dev, st.st_ino))
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    stack.append(_join(directory, entry.name))
+                elif entry.is_file(follow_symlinks=follow_symlinks):
+                    if entry.name in MANIFEST_FILES:
+                        continue
+                    stat = entry.stat(follow_symlinks=follow_symlinks)
+                    files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                elif follow_symlinks and entry.is_symlink() and errors is not None:
+                    errors.append((_join(directory, entry.name), "符号链接目标不存在"))
+        snapshot[directory] = files
+    return snapshot
+
+
+def snapshot_tree(root: str, scheduler: Optional[IOScheduler] = None,
+                  follow_symlinks: bool = False,
+                  errors: Optional[List[Tuple[str, str]]] = None) -> Snapshot:
+    """按顶层文件夹并行遍历目录，返回按目录分组的文件元数据
+    :param follow_symlinks: 跟随符号链接，按链接目标的内容记录（拷贝时使用）
+    :param errors: 跟随链接时记录无法处理的链接 (相对路径, 原因)
+    """
+    scheduler = scheduler or get_scheduler()
+    top_files = {}
+    futures = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=follow_symlinks):
+                futures.append(scheduler.submit(
+                    root, _scan_subtree, root, entry.name, follow_symlinks, errors
+                ))
+            elif entry.is_file(follow_symlinks=follow_symlinks) and entry.name not in MANIFEST_FILES:
+                stat = entry.stat(follow_symlinks=follow_symlinks)
+                top_files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+            elif follow_symlinks and entry.is_symlink() and errors is not None:
+                errors.append((entry.name, "符号链接目标不存在"))
+
+    snapshot: Snapshot = {"": top_files}
+    for future in futures:
+        snapshot.update(future.result())
+    return snapshot
+
+
+@dataclass
+class TreeDiff:
+    """目录对比结果"""
+    source: str
+    backup: str
+    missing_dirs: List[str] = field(default_factory=list)    # 备份中缺失的目录（只列最上层）
+    extra_dirs: List[str] = field(default_factory=list)      # 备份中多余的目录（只列最上层）
+    missing: List[str] = field(default_factory=list)         # 所在目录存在但文件缺失
+    extra: List[str] = field(default_factory=list)
+    size_mismatch: List[str] = field(default_factory=list)
+    suspect: List[str] = field(default_factory=list)         # 大小相同但修改时间不同
+    content_mismatch: List[str] = field(default_factory=list)  # 可疑文件哈希不同
+    touched: List[str] = field(default_factory=list)          # 可疑文件哈希相同，仅时间不同
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    missing_count: int = 0  # 含缺失目录中的文件
+    extra_count: int = 0
+    total_files: int = 0
+    total_bytes: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing_count or self.size_mismatch or self.content_mismatch or self.errors)
+
+
+class TreeDiffer:
+    """快速对比 - 先比较名称、大小和修改时间，只对可疑文件计算哈希"""
+    def __init__(self, algorithm: Optional[str] = None,
+                 mtime_tolerance_ns: int = MTIME_TOLERANCE_NS,
+                 max_workers: int = DEFAULT_WORKERS,
+                 scheduler: Optional[IOScheduler] = None):
+        self.algorithm = algorithm or DEFAULT_ALGORITHM
+        self.mtime_tolerance_ns = mtime_tolerance_ns
+        self.max_workers = max_workers
+        self.scheduler = scheduler or get_scheduler()
+
+    def diff(self, source: str, backup: str, hash_suspects: bool = True) -> TreeDiff:
+        """对比两个目录
+        :param hash_suspects: 对修改时间不同的文件计算哈希确认内容
+        """
+        if not os.path.isdir(source):
+            raise ValueError(f"源文件夹不存在: {source}")
+        if not os.path.isdir(backup):
+            raise ValueError(f"备份文件夹不存在: {backup}")
+
+        started = time.monotonic()
+        result = TreeDiff(source, backup)
+        # 两个目录同时遍历，各自内部再按顶层文件夹提交到设备队列
+        # （外层不能放进设备队列，否则等待子任务时会占住名额）
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            source_future = executor.submit(snapshot_tree, source, self.scheduler)
+            backup_future = executor.submit(snapshot_tree, backup, self.scheduler)
+            source_snapshot = source_future.result()
+            backup_snapshot = backup_future.result()
+
+        self._compare(source_snapshot, backup_snapshot, result)
+        if hash_suspects and result.suspect:
+            self._hash_suspects(source, backup, result)
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _compare(self, source_snapshot: Snapshot, backup_snapshot: Snapshot, result: TreeDiff):
+        tolerance = self.mtime_tolerance_ns
+        for directory in sorted(source_snapshot):
+            source_files = source_snapshot[directory]
+            result.total_files += len(source_files)
+            result.total_bytes += sum(size for size, _ in source_files.values())
+            backup_files = backup_snapshot.get(directory)
+            if backup_files is None:
+                result.missing_count += len(source_files)
+                parent = directory.rpartition("/")[0]
+                if parent in backup_snapshot:
+                    result.missing_dirs.append(directory)
+                continue
+
+            for name, (size, mtime_ns) in source_files.items():
+                other = backup_files.get(name)
+                if other is None:
+                    result.missing.append(_join(directory, name))
+                    result.missing_count += 1
+                elif other[0] != size:
+                    result.size_mismatch.append(_join(directory, name))
+                elif abs(other[1] - mtime_ns) > tolerance:
+                    result.suspect.append(_join(directory, name))
+            for name in backup_files.keys() - source_files.keys():
+                result.extra.append(_join(directory, name))
+                result.extra_count += 1
+
+        for directory in sorted(backup_snapshot.keys() - source_snapshot.keys()):
+            result.extra_count += len(backup_snapshot[directory])
+            if directory.rpartition("/")[0] in source_snapshot:
+                result.extra_dirs.append(directory)
+
+        result.missing.sort()
+        result.extra.sort()
+
+    def _hash_suspects(self, source: str, backup: str, result: TreeDiff):
+        """对可疑文件计算哈希，区分内容不同和仅时间不同"""
+        max_pending = self.max_workers * 4
+        queue = iter(result.suspect)
+        pending = {}
+        digests: Dict[str, List] = {}
+
+        def submit_next() -> bool:
+            rel_path = next(queue, None)
+            if rel_path is None:
+                return False
+            digests[rel_path] = []
+            for root in (source, backup):
+                path = os.path.join(root, *rel_path.split("/"))
+                future = self.scheduler.submit(root, hash_file, path, self.algorithm, HASH_CHUNK_SIZE)
+                pending[future] = rel_path
+            return True
+
+        while True:
+            while len(pending) < max_pending and submit_next():
+                pass
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                rel_path = pending.pop(future)
+                try:
+                    digests[rel_path].append(future.result())
+                except Exception as e:
+                    digests[rel_path].append(e)
+                if len(digests[rel_path]) < 2:
+                    continue
+                first, second = digests.pop(rel_path)
+                error = first if isinstance(first, Exception) else second
+                if isinstance(error, Exception):
+                    result.errors.append((rel_path, str(error)))
+                elif first == second:
+                    result.touched.append(rel_path)
+                else:
+                    result.content_mismatch.append(rel_path)
+
+        result.touched.sort()
+        result.content_mismatch.sort()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.backup_verifier import VerificationResult
+from app.utils.db_migrations import ensure_schema
+from app.utils.db_pool import get_pool
+from app.utils.offload_manager import OffloadResult
+from app.utils.project_manager import _get_result_cache, normalize_project_path
+from app.utils.sample_verifier import SampleResult
+from app.utils.tree_diff import TreeDiff
+
+# 问题文件状态
+STATUS_MISMATCHED = "mismatched"
+STATUS_MISSING = "missing"
+STATUS_EXTRA = "extra"
+STATUS_ERROR = "error"
+
+
+def _relative(path: str, root: str) -> str:
+    """错误信息中的绝对路径转换为相对路径，不在 root 下时原样返回"""
+    try:
+        rel_path = os.path.relpath(path, root)
+    except ValueError:
+        return path
+    return path if rel_path.startswith("..") else rel_path.replace(os.sep, "/")
+
+
+class VerificationStore:
+    """校验历史 - 记录每次校验的结论和有问题的文件
+
+    以备份路径作为项目路径，与 projects 表按 disk_id 或 project_path 关联，
+    历史记录页据此显示每个项目最近一次的校验结果。
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        ensure_schema(db_path)
+
+    def record_run(self, kind: str, source: str, project_path: str, ok: bool,
+                   disk_id: Optional[str] = None, algorithm: Optional[str] = None,
+                   total_files: int = 0, total_bytes: int = 0, elapsed: float = 0.0,
+                   problems: Iterable[Tuple[str, str, Optional[str]]] = ()) -> int:
+        """记录一次校验
+        :param problems: (相对路径, 状态, 说明) 列表，只需包含有问题的文件
+        :return: 记录 id
+        """
+        problems = list(problems)
+        counts = {status: 0 for status in (STATUS_MISMATCHED, STATUS_MISSING, STATUS_EXTRA, STATUS_ERROR)}
+        for _, status, _ in problems:
+            counts[status] += 1
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute("""
+                    INSERT INTO verification_runs (
+                        kind, disk_id, project_path, source, algorithm, ok,
+                        total_files, total_bytes, mismatched, missing, extra, errors,
+                        elapsed, started_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', ?))
+                """, (
+                    kind, (disk_id or "").strip() or None,
+                    normalize_project_path(project_path), os.path.normpath(source), algorithm, int(bool(ok)),
+                    total_files, total_bytes,
+                    counts[STATUS_MISMATCHED], counts[STATUS_MISSING],
+                    counts[STATUS_EXTRA], counts[STATUS_ERROR],
+                    elapsed, f"-{int(elapsed)} seconds",
+                ))
+                run_id = cursor.lastrowid
+                conn.executemany("""
+                    INSERT OR IGNORE INTO verification_results (run_id, rel_path, status, detail)
+                    VALUES (?, ?, ?, ?)
+                """, [(run_id, rel_path, status, detail) for rel_path, status, detail in problems])
+        except Exception as e:
+            print(f"[ERROR] 记录校验历史失败: {str(e)}")
+            raise Exception(f"记录校验历史失败: {str(e)}")
+
+        # 历史记录页的分页结果包含校验状态，需要失效
+        _get_result_cache(self.db_path).invalidate()
+        return run_id
+
+    def record_verification(self, result: VerificationResult, disk_id: Optional[str] = None) -> int:
+        """记录完整校验或抽样校验结果"""
+        problems = [(path, STATUS_MISMATCHED, None) for path in result.mismatched]
+        problems += [(path, STATUS_MISSING, None) for path in result.missing]
+        problems += [(path, STATUS_EXTRA, None) for path in result.extra]
+        problems += [(path, STATUS_ERROR, message) for path, message in result.errors]
+        return self.record_run(
+            "sample" if isinstance(result, SampleResult) else "verify",
+            result.source, result.backup, result.ok, disk_id=disk_id,
+            algorithm=result.algorithm, total_files=result.total_files,
+            total_bytes=result.total_bytes, elapsed=result.elapsed, problems=problems,
+        )
+
+    def record_diff(self, result: TreeDiff, disk_id: Optional[str] = None) -> int:
+        """记录快速对比结果（缺失目录按目录记录一条）"""
+        problems = [(path, STATUS_MISSING, "目录") for path in result.missing_dirs]
+        problems += [(path, STATUS_MISSING, None) for path in result.missing]
+        problems += [(path, STATUS_MISMATCHED, "大小不同") for path in result.size_mismatch]
+        problems += [(path, STATUS_MISMATCHED, None) for path in result.content_mismatch]
+        problems += [(path, STATUS_EXTRA, "目录") for path in result.extra_dirs]
+        problems += [(path, STATUS_EXTRA, None) for path in result.extra]
+        problems += [(path, STATUS_ERROR, message) for path, message in result.errors]
+        return self.record_run(
+            "diff", result.source, result.backup, result.ok, disk_id=disk_id,
+            total_files=result.total_files, total_bytes=result.total_bytes,
+            elapsed=result.elapsed, problems=problems,
+        )
+
+    def record_offload(self, result: OffloadResult, disk_id: Optional[str] = None) -> List[int]:
+        """记录拷卡结果，每个目标一条记录（源文件错误计入所有目标）"""
+        run_ids = []
+        for destination in result.destinations:
+            problems = [
+                (rel_path, STATUS_MISMATCHED, None)
+                for root, rel_path in result.mismatched if root == destination
+            ]
+            for path, message in result.errors:
+                for root in (destination, result.source):
+                    rel_path = _relative(path, root)
+                    if rel_path != path:
+                        problems.append((rel_path, STATUS_ERROR, message))
+                        break
+            run_ids.append(self.record_run(
+                "offload", result.source, destination, not problems, disk_id=disk_id,
+                algorithm=result.algorithm, total_files=result.total_files,
+                total_bytes=result.total_bytes, elapsed=result.elapsed, problems=problems,
+            ))
+        return run_ids
+
+    def get_last_run(self, disk_id: Optional[str] = None,
+                     project_path: Optional[str] = None) -> Optional[Dict]:
+        """查询磁盘或项目路径最近一次校验"""
+        clauses = []
+        params = []
+        if disk_id:
+            clauses.append("SELECT * FROM verification_runs WHERE disk_id = ?")
+            params.append(disk_id)
+        if project_path:
+            clauses.append("SELECT * FROM verification_runs WHERE project_path = ?")
+            params.append(normalize_project_path(project_path))
+        if not clauses:
+            return None
+        try:
+            with self.pool.connection() as conn:
+                # 拆成 UNION 使两个条件都能使用各自的索引
+                row = conn.execute(
+                    " UNION ".join(clauses) + " ORDER BY finished_at DESC, id DESC LIMIT 1", params
+                ).fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            print(f"[ERROR] 查询校验历史失败: {str(e)}")
+            raise Exception(f"查询校验历史失败: {str(e)}")
+
+    def get_runs(self, disk_id: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """按时间倒序列出校验记录"""
+        try:
+            with self.pool.connection() as conn:
+                if disk_id:
+                    rows = conn.execute("""
+                        SELECT * FROM verification_runs WHERE disk_id = ?
+                        ORDER BY finished_at DESC, id DESC LIMIT ?
+                    """, (disk_id, limit)).fetchall()
+                else:
+                    rows = conn.execute("""
+                        SELECT * FROM verification_runs
+                        ORDER BY finished_at DESC, id DESC LIMIT ?
+                    """, (limit,)).fetchall()
+                return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"[ERROR] 查询校验历史失败: {str(e)}")
+            raise Exception(f"查询校验历史失败: {str(e)}")
+
+    def get_results(self, run_id: int) -> List[Dict]:
+        """读取一次校验中有问题的文件"""
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute("""
+                    SELECT rel_path, status, detail FROM verification_results
+                    WHERE run_id = ? ORDER BY status, rel_path
+                """, (run_id,)).fetchall()
+                return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"[ERROR] 读取校验结果失败: {str(e)}")
+            raise Exception(f"读取校验结果失败: {str(e)}")
@@ -1,34 +1,383 @@
 import flet as ft
+import threading
 from app.utils.db_manager import DatabaseManager
+from app.utils.backup_verifier import BackupVerifier, VerificationResult
+from app.utils.offload_journal import OffloadJournal
+from app.utils.offload_manager import OffloadManager, OffloadResult
+from app.utils.sample_verifier import DEFAULT_SAMPLE_FRACTION, SampleResult, SampleVerifier
+from app.utils.tree_diff import TreeDiff, TreeDiffer
+from app.utils.verification_store import VerificationStore
+from app.utils.folder_plan import load_workflow_settings
+from app.utils.project_manager import resolve_db_path
+from app.utils.io_telemetry import ProgressTelemetry, TelemetrySnapshot, format_eta
+
+# 结果列表中每类问题最多显示的文件数
+MAX_LISTED_FILES = 200
+
+PHASE_TITLES = {
+    "verify": "正在校验",
+    "copy": "正在拷贝",
+    "sample": "正在抽样校验",
+}
 
 class BackupView:
     def __init__(self, page: ft.Page, db: DatabaseManager):
         self.page = page
         self.db = db
-        
+        self.running = False
+
     def build(self):
+        self.source_field = ft.TextField(
+            label="源文件夹",
+            hint_text="选择源文件夹",
+        )
+        self.backup_field = ft.TextField(
+            label="备份文件夹",
+            hint_text="选择备份文件夹",
+        )
+        self.disk_id_field = ft.TextField(
+            label="磁盘编号",
+            hint_text="填写后校验结果会显示在历史记录中",
+            width=200,
+        )
+        self.destinations_field = ft.TextField(
+            label="目标文件夹（每行一个）",
+            hint_text="拷卡时源文件只读取一次，同时写入所有目标",
+            multiline=True,
+            min_lines=2,
+            max_lines=5,
+        )
+        self.full_check = ft.Checkbox(
+            label="完整校验（忽略哈希清单，重新计算全部文件）",
+            value=False,
+        )
+        self.start_button = ft.ElevatedButton(
+            text="开始校验",
+            on_click=self.start_verification
+        )
+        self.diff_button = ft.ElevatedButton(
+            text="快速对比",
+            tooltip="只比较文件名、大小和修改时间，时间不同的文件再计算哈希确认",
+            on_click=self.start_diff
+        )
+        self.sample_field = ft.TextField(
+            label="抽样比例（%）",
+            value=f"{DEFAULT_SAMPLE_FRACTION * 100:g}",
+            width=140,
+        )
+        self.sample_button = ft.ElevatedButton(
+            text="抽样校验",
+            tooltip="只读取每个文件的首尾块和部分随机块，快速检查备份盘",
+            on_click=self.start_sample
+        )
+        self.offload_button = ft.ElevatedButton(
+            text="拷卡并校验",
+            on_click=self.start_offload
+        )
+        self.progress_bar = ft.ProgressBar(value=0, visible=False)
+        self.status_text = ft.Text("")
+        self.speed_text = ft.Text("", size=12, color=ft.colors.GREY)
+        self.result_list = ft.ListView(expand=True, spacing=2)
+
         return ft.Container(
             content=ft.Column(
                 controls=[
                     ft.Text("备份校验", size=32, weight=ft.FontWeight.BOLD),
-                    ft.TextField(
-                        label="源文件夹",
-                        hint_text="选择源文件夹",
-                    ),
-                    ft.TextField(
-                        label="备份文件夹",
-                        hint_text="选择备份文件夹",
-                    ),
-                    ft.ElevatedButton(
-                        text="开始校验",
-                        on_click=self.start_verification
-                    ),
+                    self.source_field,
+                    self.backup_field,
+                    self.disk_id_field,
+                    self.destinations_field,
+                    self.full_check,
+                    ft.Row([
+                        self.start_button, self.diff_button, self.sample_button,
+                        self.sample_field, self.offload_button,
+                    ]),
+                    self.progress_bar,
+                    self.status_text,
+                    self.speed_text,
+                    self.result_list,
                 ],
                 spacing=20,
+                expand=True,
             ),
             padding=20,
+            expand=True,
         )
-        
+
     def start_verification(self, e):
-        # 实现备份校验逻辑
-        pass 
\ No newline at end of file
+        """开始校验（在后台线程执行）"""
+        if self.running:
+            return
+        source = (self.source_field.value or "").strip()
+        backup = (self.backup_field.value or "").strip()
+        if not source or not backup:
+            self.show_error("请填写源文件夹和备份文件夹")
+            return
+
+        self._start_task(self._run_verification, source, backup)
+
+    def start_diff(self, e):
+        """开始快速对比（在后台线程执行）"""
+        if self.running:
+            return
+        source = (self.source_field.value or "").strip()
+        backup = (self.backup_field.value or "").strip()
+        if not source or not backup:
+            self.show_error("请填写源文件夹和备份文件夹")
+            return
+
+        self._start_task(self._run_diff, source, backup)
+
+    def start_sample(self, e):
+        """开始抽样校验（在后台线程执行）"""
+        if self.running:
+            return
+        source = (self.source_field.value or "").strip()
+        backup = (self.backup_field.value or "").strip()
+        if not source or not backup:
+            self.show_error("请填写源文件夹和备份文件夹")
+            return
+        try:
+            fraction = float(self.sample_field.value) / 100
+            if not 0 < fraction <= 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            self.show_error("抽样比例应为 0 到 100 之间的数字")
+            return
+
+        self._start_task(self._run_sample, source, backup, fraction)
+
+    def start_offload(self, e):
+        """开始拷卡（在后台线程执行）"""
+        if self.running:
+            return
+        source = (self.source_field.value or "").strip()
+        destinations = [
+            line.strip() for line in (self.destinations_field.value or "").splitlines()
+            if line.strip()
+        ]
+        if not source or not destinations:
+            self.show_error("请填写源文件夹和至少一个目标文件夹")
+            return
+
+        self._start_task(self._run_offload, source, destinations)
+
+    def _start_task(self, target, *args):
+        """锁定按钮并在后台线程执行任务"""
+        self.running = True
+        self.start_button.disabled = True
+        self.diff_button.disabled = True
+        self.sample_button.disabled = True
+        self.offload_button.disabled = True
+        self.progress_bar.value = 0
+        self.progress_bar.visible = True
+        self.status_text.value = "正在扫描文件..."
+        self.status_text.color = None
+        self.speed_text.value = ""
+        self.result_list.controls.clear()
+        self.page.update()
+
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    def _finish_task(self):
+        self.running = False
+        self.start_button.disabled = False
+        self.diff_button.disabled = False
+        self.sample_button.disabled = False
+        self.offload_button.disabled = False
+        self.progress_bar.visible = False
+        self.page.update()
+
+    def _run_verification(self, source: str, backup: str):
+        """执行校验并显示结果"""
+        telemetry = self._new_telemetry("verify")
+        try:
+            verifier = BackupVerifier()
+            result = verifier.verify(
+                source, backup,
+                use_manifest=not self.full_check.value,
+                telemetry=telemetry,
+            )
+            telemetry.close(ok=result.ok, total_files=result.total_files)
+            self._record(lambda store, disk_id: store.record_verification(result, disk_id))
+            self._show_result(result)
+        except Exception as ex:
+            print(f"[ERROR] 备份校验失败: {str(ex)}")
+            telemetry.close(ok=False, error=str(ex))
+            self.status_text.value = ""
+            self.show_error(f"校验失败：{str(ex)}")
+        finally:
+            self._finish_task()
+
+    def _run_diff(self, source: str, backup: str):
+        """执行快速对比并显示结果"""
+        try:
+            # 对比阶段无法预估进度，显示为不确定进度条
+            self.progress_bar.value = None
+            self.page.update()
+            result = TreeDiffer().diff(source, backup)
+            self._record(lambda store, disk_id: store.record_diff(result, disk_id))
+            self._show_diff_result(result)
+        except Exception as ex:
+            print(f"[ERROR] 快速对比失败: {str(ex)}")
+            self.status_text.value = ""
+            self.show_error(f"对比失败：{str(ex)}")
+        finally:
+            self._finish_task()
+
+    def _run_sample(self, source: str, backup: str, fraction: float):
+        """执行抽样校验并显示结果"""
+        telemetry = self._new_telemetry("sample")
+        try:
+            result = SampleVerifier(fraction).verify(source, backup, telemetry=telemetry)
+            telemetry.close(ok=result.ok, total_files=result.total_files, seed=result.seed)
+            self._record(lambda store, disk_id: store.record_verification(result, disk_id))
+            self._show_result(result)
+        except Exception as ex:
+            print(f"[ERROR] 抽样校验失败: {str(ex)}")
+            telemetry.close(ok=False, error=str(ex))
+            self.status_text.value = ""
+            self.show_error(f"抽样校验失败：{str(ex)}")
+        finally:
+            self._finish_task()
+
+    def _run_offload(self, source: str, destinations):
+        """执行拷卡并显示结果"""
+        telemetry = self._new_telemetry("offload")
+        try:
+            # 任务进度记录在数据库中，中断后再次拷卡会自动续传
+            manager = OffloadManager(journal=OffloadJournal(self._history_db_path()))
+            result = manager.offload(source, destinations, telemetry=telemetry)
+            telemetry.close(ok=result.ok, total_files=result.total_files, job_id=result.job_id)
+            self._record(lambda store, disk_id: store.record_offload(result, disk_id))
+            self._show_offload_result(result)
+        except Exception as ex:
+            print(f"[ERROR] 拷卡失败: {str(ex)}")
+            telemetry.close(ok=False, error=str(ex))
+            self.status_text.value = ""
+            self.show_error(f"拷卡失败：{str(ex)}")
+        finally:
+            self._finish_task()
+
+    @staticmethod
+    def _history_db_path() -> str:
+        """拷卡日志和校验历史都写入历史项目数据库"""
+        return resolve_db_path(load_workflow_settings())
+
+    def _record(self, write):
+        """写入校验历史，失败时只提示，不影响结果显示
+
+        校验历史与历史项目在同一个数据库中，历史记录页才能关联显示。
+        """
+        try:
+            store = VerificationStore(self._history_db_path())
+            write(store, (self.disk_id_field.value or "").strip() or None)
+        except Exception as ex:
+            print(f"[WARNING] 校验历史未保存: {str(ex)}")
+
+    def _new_telemetry(self, job: str) -> ProgressTelemetry:
+        """创建遥测，进度推送已节流，可直接刷新界面"""
+        telemetry = ProgressTelemetry(job)
+        telemetry.add_listener(self._on_telemetry)
+        return telemetry
+
+    def _on_telemetry(self, snapshot: TelemetrySnapshot):
+        """更新进度、速度和剩余时间"""
+        title = PHASE_TITLES.get(snapshot.phase, snapshot.phase)
+        self.progress_bar.value = snapshot.fraction
+        self.status_text.value = (
+            f"{title} {snapshot.files_done} / {snapshot.total_files} 个文件，"
+            f"{snapshot.bytes_done / 1024 ** 2:.0f} / {snapshot.total_bytes / 1024 ** 2:.0f} MB，"
+            f"{snapshot.mb_per_s:.1f} MB/s，剩余 {format_eta(snapshot.eta_seconds)}"
+        )
+        self.speed_text.value = "  ".join(
+            f"{device}: {speed:.1f} MB/s" for device, speed in snapshot.devices.items()
+        )
+        self.page.update()
+
+    def _show_offload_result(self, result: OffloadResult):
+        """显示拷卡结果"""
+        verified = "，".join(
+            f"{destination} {len(result.verified.get(destination, []))}"
+            for destination in result.destinations
+        )
+        self.status_text.value = (
+            f"{'拷卡完成' if result.ok else '拷卡未通过'}："
+            f"共 {result.total_files} 个文件，{result.total_bytes / 1024 ** 3:.2f} GB，"
+            f"校验通过（{verified}），"
+            f"{f'续传 {result.resumed_files} 个文件，' if result.resumed_files else ''}"
+            f"耗时 {result.elapsed:.1f} 秒"
+        )
+        self.status_text.color = ft.colors.GREEN if result.ok else ft.colors.ERROR
+        self.result_list.controls = self._build_sections([
+            ("不一致", [f"{destination}: {path}" for destination, path in result.mismatched], ft.colors.ERROR),
+            ("错误", [f"{path}: {message}" for path, message in result.errors], ft.colors.ERROR),
+        ])
+
+    def _show_diff_result(self, result: TreeDiff):
+        """显示快速对比结果"""
+        self.status_text.value = (
+            f"{'备份完整' if result.ok else '备份不完整'}："
+            f"共 {result.total_files} 个文件，缺失 {result.missing_count}，多余 {result.extra_count}，"
+            f"大小不同 {len(result.size_mismatch)}，内容不同 {len(result.content_mismatch)}，"
+            f"仅时间不同 {len(result.touched)}，耗时 {result.elapsed:.1f} 秒"
+        )
+        self.status_text.color = ft.colors.GREEN if result.ok else ft.colors.ERROR
+        self.result_list.controls = self._build_sections([
+            ("缺失目录", result.missing_dirs, ft.colors.ERROR),
+            ("缺失", result.missing, ft.colors.ERROR),
+            ("大小不同", result.size_mismatch, ft.colors.ERROR),
+            ("内容不同", result.content_mismatch, ft.colors.ERROR),
+            ("错误", [f"{path}: {message}" for path, message in result.errors], ft.colors.ERROR),
+            ("多余目录", result.extra_dirs, ft.colors.ORANGE),
+            ("多余", result.extra, ft.colors.ORANGE),
+            ("仅时间不同", result.touched, ft.colors.ORANGE),
+        ])
+
+    def _show_result(self, result: VerificationResult):
+        """显示校验结果"""
+        self.status_text.value = (
+            f"{'校验通过' if result.ok else '校验未通过'}："
+            f"共 {result.total_files} 个文件，一致 {len(result.matched)}，"
+            f"不一致 {len(result.mismatched)}，缺失 {len(result.missing)}，"
+            f"多余 {len(result.extra)}，错误 {len(result.errors)}，"
+            f"复用清单哈希 {result.reused_hashes}，"
+            f"{'多进程计算，' if result.hash_mode == 'process' else ''}"
+            f"耗时 {result.elapsed:.1f} 秒"
+        )
+        if isinstance(result, SampleResult):
+            self.status_text.value += (
+                f"\n抽样 {result.sampled_blocks} / {result.total_blocks} 块"
+                f"（{result.sampled_bytes / 1024 ** 3:.2f} GB），"
+                f"若 0.1% 的块损坏，发现概率 {result.confidence:.1%}；"
+                f"未发现问题时，有 95% 把握损坏块比例低于 {result.corrupt_rate_bound:.2%}"
+            )
+        self.status_text.color = ft.colors.GREEN if result.ok else ft.colors.ERROR
+
+        self.result_list.controls = self._build_sections([
+            ("不一致", result.mismatched, ft.colors.ERROR),
+            ("缺失", result.missing, ft.colors.ERROR),
+            ("多余", result.extra, ft.colors.ORANGE),
+            ("错误", [f"{path}: {message}" for path, message in result.errors], ft.colors.ERROR),
+        ])
+
+    def _build_sections(self, sections):
+        """按类别生成问题文件列表"""
+        controls = []
+        for title, paths, color in sections:
+            if not paths:
+                continue
+            controls.append(ft.Text(f"{title}（{len(paths)}）", weight=ft.FontWeight.BOLD, color=color))
+            controls.extend(ft.Text(path, size=12, selectable=True) for path in paths[:MAX_LISTED_FILES])
+            if len(paths) > MAX_LISTED_FILES:
+                controls.append(ft.Text(f"... 另有 {len(paths) - MAX_LISTED_FILES} 个", size=12))
+        return controls
+
+    def show_error(self, message):
+        """显示错误提示"""
+        self.page.show_snack_bar(
+            ft.SnackBar(
+                content=ft.Text(message),
+                bgcolor=ft.colors.ERROR
+            )
+        )
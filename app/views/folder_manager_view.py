@@ -8,8 +8,10 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from app.utils.template_manager import TemplateManager, TemplateNode
+from app.utils.template_manager import TemplateManager, TemplateNode, get_tree_cache
 from app.views.base_view import BaseView
+from app.utils.db_pool import get_pool
+from app.utils.db_migrations import ensure_schema
 
 @dataclass
 class TemplateNode:
@@ -26,22 +28,18 @@ class FolderManager:
     """文件夹管理器 - 数据操作类"""
     def __init__(self, db_path: str):
         self.db_path = os.path.join(db_path, "app.db")
+        self.pool = get_pool(self.db_path)
+        # 与 TemplateManager 共享模板树缓存，修改后需要失效
+        self.tree_cache = get_tree_cache(self.db_path)
         self._init_database()
     
     def _init_database(self):
         """初始化数据库"""
         try:
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            conn = self._get_connection()
-            cursor = conn.cursor()
             
-            # 读取并执行schema.sql文件
-            schema_path = Path(__file__).parent.parent / 'database' / 'schema.sql'
-            with open(schema_path, 'r', encoding='utf-8') as f:
-                cursor.executescript(f.read())
-            
-            conn.commit()
-            conn.close()
+            # 应用数据库迁移
+            ensure_schema(self.db_path)
             
         except Exception as e:
             print(f"[ERROR] 数据库初始化失败: {str(e)}")
@@ -57,26 +55,24 @@ class FolderManager:
         return False
 
     def _get_connection(self):
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+        """获取当前线程的数据库连接"""
+        return self.pool.get()
     
     def _execute(self, sql: str, params: tuple = None, fetch: bool = False):
         """执行SQL语句"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            if params:
-                cursor.execute(sql, params)
-            else:
-                cursor.execute(sql)
-                
-            result = None
-            if fetch:
-                result = cursor.fetchall()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 
-            conn.commit()
-            conn.close()
+                if params:
+                    cursor.execute(sql, params)
+                else:
+                    cursor.execute(sql)
+                    
+                result = None
+                if fetch:
+                    result = cursor.fetchall()
+                    
             return result
             
         except Exception as e:
@@ -140,42 +136,40 @@ class FolderManager:
     def create_folder(self, project_type: str, name: str, parent_id: int = None) -> bool:
         """创建文件夹"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 获取项目类型ID
-            cursor.execute(
-                "SELECT id FROM project_types WHERE name = ?",
-                (project_type,)
-            )
-            type_id = cursor.fetchone()[0]
-            
-            # 检查同级目录下是否存在同名文件夹
-            cursor.execute("""
-                SELECT COUNT(*) FROM folder_templates 
-                WHERE project_type_id = ? AND parent_id IS ? AND name = ?
-            """, (type_id, parent_id, name))
-            
-            if cursor.fetchone()[0] > 0:
-                raise ValueError("同名文件夹已存在")
-            
-            # 获取排序顺序
-            cursor.execute("""
-                SELECT COALESCE(MAX(sort_order), 0) + 1
-                FROM folder_templates 
-                WHERE project_type_id = ? AND parent_id IS ?
-            """, (type_id, parent_id))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
             
-            sort_order = cursor.fetchone()[0]
-            
-            # 创建文件夹记录
-            cursor.execute("""
-                INSERT INTO folder_templates (project_type_id, parent_id, name, sort_order)
-                VALUES (?, ?, ?, ?)
-            """, (type_id, parent_id, name, sort_order))
-            
-            conn.commit()
-            conn.close()
+                # 获取项目类型ID
+                cursor.execute(
+                    "SELECT id FROM project_types WHERE name = ?",
+                    (project_type,)
+                )
+                type_id = cursor.fetchone()[0]
+            
+                # 检查同级目录下是否存在同名文件夹
+                cursor.execute("""
+                    SELECT COUNT(*) FROM folder_templates 
+                    WHERE project_type_id = ? AND parent_id IS ? AND name = ?
+                """, (type_id, parent_id, name))
+            
+                if cursor.fetchone()[0] > 0:
+                    raise ValueError("同名文件夹已存在")
+            
+                # 获取排序顺序
+                cursor.execute("""
+                    SELECT COALESCE(MAX(sort_order), 0) + 1
+                    FROM folder_templates 
+                    WHERE project_type_id = ? AND parent_id IS ?
+                """, (type_id, parent_id))
+            
+                sort_order = cursor.fetchone()[0]
+            
+                # 创建文件夹记录
+                cursor.execute("""
+                    INSERT INTO folder_templates (project_type_id, parent_id, name, sort_order)
+                    VALUES (?, ?, ?, ?)
+                """, (type_id, parent_id, name, sort_order))
+            self.tree_cache.invalidate()
             return True
             
         except Exception as e:
@@ -185,34 +179,32 @@ class FolderManager:
     def rename_folder(self, folder_id: int, new_name: str) -> bool:
         """重命名文件夹"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 检查同级目录下是否存在同名文件夹
-            cursor.execute("""
-                SELECT parent_id, project_type_id 
-                FROM folder_templates 
-                WHERE id = ?
-            """, (folder_id,))
-            parent_id, type_id = cursor.fetchone()
-            
-            cursor.execute("""
-                SELECT COUNT(*) FROM folder_templates 
-                WHERE project_type_id = ? AND parent_id IS ? AND name = ? AND id != ?
-            """, (type_id, parent_id, new_name, folder_id))
-            
-            if cursor.fetchone()[0] > 0:
-                raise ValueError("同名文件夹已存在")
-            
-            # 更新文件夹名称
-            cursor.execute("""
-                UPDATE folder_templates 
-                SET name = ? 
-                WHERE id = ?
-            """, (new_name, folder_id))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+            
+                # 检查同级目录下是否存在同名文件夹
+                cursor.execute("""
+                    SELECT parent_id, project_type_id 
+                    FROM folder_templates 
+                    WHERE id = ?
+                """, (folder_id,))
+                parent_id, type_id = cursor.fetchone()
+            
+                cursor.execute("""
+                    SELECT COUNT(*) FROM folder_templates 
+                    WHERE project_type_id = ? AND parent_id IS ? AND name = ? AND id != ?
+                """, (type_id, parent_id, new_name, folder_id))
+            
+                if cursor.fetchone()[0] > 0:
+                    raise ValueError("同名文件夹已存在")
+            
+                # 更新文件夹名称
+                cursor.execute("""
+                    UPDATE folder_templates 
+                    SET name = ? 
+                    WHERE id = ?
+                """, (new_name, folder_id))
+            self.tree_cache.invalidate()
             return True
             
         except Exception as e:
@@ -222,27 +214,18 @@ class FolderManager:
     def delete_folder(self, folder_id: int) -> bool:
         """删除文件夹及其子文件夹"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            def delete_recursive(fid):
-                # 递归删除子文件夹
-                cursor.execute(
-                    "SELECT id FROM folder_templates WHERE parent_id = ?",
-                    (fid,)
-                )
-                for (child_id,) in cursor.fetchall():
-                    delete_recursive(child_id)
-                    
-                # 删除当前文件夹
-                cursor.execute(
-                    "DELETE FROM folder_templates WHERE id = ?",
-                    (fid,)
-                )
-            
-            delete_recursive(folder_id)
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+            
+                # 闭包表中包含节点自身及所有子孙节点
+                cursor.execute("""
+                    DELETE FROM folder_templates
+                    WHERE id IN (
+                        SELECT descendant_id FROM folder_template_paths
+                        WHERE ancestor_id = ?
+                    )
+                """, (folder_id,))
+            self.tree_cache.invalidate()
             return True
             
         except Exception as e:
@@ -497,6 +480,65 @@ class FolderManagerView(BaseView):
         form.visible = True
         self.page.update()
 
+    def _show_move_form(self, project_type: str, node: TemplateNode):
+        """显示移动表单（目标不包含自身及子文件夹）"""
+        form = self.operation_forms.get(project_type)
+        if not form:
+            return
+
+        options = [ft.dropdown.Option(key="root", text="（根目录）")]
+
+        def add_options(nodes: List[TemplateNode], level: int = 0):
+            for item in nodes:
+                if item.id == node.id:
+                    continue
+                options.append(ft.dropdown.Option(key=str(item.id), text="    " * level + item.name))
+                add_options(item.children or [], level + 1)
+
+        add_options(self.manager.get_template_tree(project_type))
+
+        target_field = ft.Dropdown(
+            label="目标文件夹",
+            options=options,
+            value=str(node.parent_id) if node.parent_id else "root",
+            width=300,
+        )
+
+        def handle_submit(e):
+            parent_id = None if target_field.value in (None, "root") else int(target_field.value)
+            try:
+                if self.manager.move_node(node.id, parent_id):
+                    self._hide_form(project_type)
+                    self.refresh_folders()
+                    self.show_success(f"已移动 '{node.name}'")
+                else:
+                    self.show_error("移动失败")
+            except Exception as ex:
+                print(f"[ERROR] 移动失败: {str(ex)}")
+                self.show_error(str(ex))
+
+        form.content = ft.Column([
+            ft.Text(f"移动文件夹 '{node.name}'", size=16),
+            target_field,
+            ft.Row([
+                ft.TextButton("取消", on_click=lambda _: self._hide_form(project_type)),
+                ft.FilledButton("移动", on_click=handle_submit),
+            ], alignment=ft.MainAxisAlignment.END),
+        ], tight=True)
+        
+        form.visible = True
+        self.page.update()
+
+    def _copy_folder(self, node: TemplateNode):
+        """在同一位置复制文件夹及其子文件夹"""
+        try:
+            self.manager.copy_subtree(node.id, node.parent_id, f"{node.name} 副本")
+            self.refresh_folders()
+            self.show_success(f"已复制 '{node.name}'")
+        except Exception as ex:
+            print(f"[ERROR] 复制失败: {str(ex)}")
+            self.show_error(str(ex))
+
     def _hide_form(self, project_type: str):
         """隐藏表单"""
         form = self.operation_forms.get(project_type)
@@ -530,6 +572,16 @@ class FolderManagerView(BaseView):
                                 icon=ft.icons.DRIVE_FILE_RENAME_OUTLINE,
                                 on_click=lambda e: self._show_rename_form(self.current_type, node)
                             ),
+                            ft.PopupMenuItem(
+                                text="移动到...",
+                                icon=ft.icons.DRIVE_FILE_MOVE_OUTLINE,
+                                on_click=lambda e: self._show_move_form(self.current_type, node)
+                            ),
+                            ft.PopupMenuItem(
+                                text="复制",
+                                icon=ft.icons.CONTENT_COPY,
+                                on_click=lambda e: self._copy_folder(node)
+                            ),
                             ft.PopupMenuItem(
                                 text="删除",
                                 icon=ft.icons.DELETE_FOREVER,
@@ -6,27 +6,35 @@ from typing import Optional, List, Dict
 import pandas as pd
 from pathlib import Path
 import platform
-from app.utils.project_manager import ProjectManager
+from app.utils.project_manager import EXPORT_FORMATS, ProjectManager, resolve_db_path
+from app.utils.query_executor import get_query_executor
+
+# 校验状态过滤：选项 -> 天数
+UNVERIFIED_OPTIONS = {
+    "7天内未校验": 7,
+    "30天内未校验": 30,
+    "90天内未校验": 90,
+}
+
+VERIFICATION_KINDS = {
+    "verify": "完整校验",
+    "diff": "快速对比",
+    "sample": "抽样校验",
+    "offload": "拷卡校验",
+}
 
 class HistoryView:
     def __init__(self, page: ft.Page, settings: dict):
         self.page = page
         self.manager = None
+        self.query_executor = None
         
         # 添加析构标记
         self._destroyed = False
         
         try:
-            # 从 settings 中获取数据库路径
-            db_dir = settings.get("database_path", "")
-            if not db_dir:
-                db_dir = os.path.join(settings.get("project_path", ""), "database")
-            
-            if not db_dir:
-                raise ValueError("数据库路径未设置")
-            
-            # 构建数据库文件完整路径
-            db_path = os.path.join(db_dir, "app.db")
+            # 从 settings 中获取数据库文件完整路径
+            db_path = resolve_db_path(settings)
             
             # 确保数据库目录存在
             os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -35,6 +43,9 @@ class HistoryView:
             self.manager = ProjectManager(db_path)
             print(f"[DEBUG] 项目管理器初始化成功: {db_path}")
             
+            # 过滤与搜索在后台线程查询，避免阻塞界面（执行器按数据库共享）
+            self.query_executor = get_query_executor(self.manager.pool)
+            
         except Exception as e:
             print(f"[ERROR] 初始化项目管理器失败: {str(e)}")
             self.show_error(f"初始化失败: {str(e)}")
@@ -53,7 +64,8 @@ class HistoryView:
             "date_from": None,
             "date_to": None,
             "tags": [],
-            "search_text": ""
+            "search_text": "",
+            "unverified_days": None,
         }
         
         # 选中的项目
@@ -82,12 +94,17 @@ class HistoryView:
         # 分页相关
         self.page_size = 20  # 每页显示数量设置为10
         self.current_page = 1  # 当前页码
+        self._page_cursors = {}  # 页码 -> 键集分页游标
         
         # 同时修改分页控件的初始化
         self.pagination_row = ft.Row(
             [ft.Text("")],  # 初始为空的分页控件
             alignment=ft.MainAxisAlignment.CENTER,
         )
+        self._pagination_controls = None
+        
+        # 项目 id -> 表格行，刷新时复用
+        self._row_cache = {}
         
     def build(self):
         """构建界面"""
@@ -115,8 +132,8 @@ class HistoryView:
                                 ),
                                 ft.IconButton(
                                     icon=ft.icons.DOWNLOAD,
-                                    tooltip="导出Excel",
-                                    on_click=self._export_excel
+                                    tooltip="导出项目",
+                                    on_click=self._export_projects
                                 ),
                                 ft.IconButton(
                                     icon=ft.icons.REFRESH,
@@ -170,6 +187,15 @@ class HistoryView:
                                     width=150,
                                     on_change=self._handle_filter_change,
                                 ),
+                                ft.Dropdown(
+                                    label="校验状态",
+                                    options=[
+                                        ft.dropdown.Option("全部"),
+                                        *[ft.dropdown.Option(label) for label in UNVERIFIED_OPTIONS],
+                                    ],
+                                    width=150,
+                                    on_change=self._handle_filter_change,
+                                ),
                                 ft.Container(
                                     content=ft.Column([
                                         ft.TextField(
@@ -218,6 +244,29 @@ class HistoryView:
             border_radius=8,
         )
 
+        # 批量操作栏（有选中项时显示）
+        self.selection_text = ft.Text("")
+        self.selection_bar = ft.Container(
+            content=ft.Row(
+                [
+                    self.selection_text,
+                    ft.TextButton("标记已备份", icon=ft.icons.CHECK_CIRCLE,
+                                  on_click=lambda _: self._batch_set_backup(1)),
+                    ft.TextButton("标记未备份", icon=ft.icons.CANCEL,
+                                  on_click=lambda _: self._batch_set_backup(0)),
+                    ft.TextButton("添加标签", icon=ft.icons.LABEL,
+                                  on_click=self._show_batch_tag_dialog),
+                    ft.TextButton("删除", icon=ft.icons.DELETE,
+                                  on_click=self._batch_delete),
+                    ft.TextButton("取消选择", on_click=self._clear_selection),
+                ],
+                spacing=10,
+            ),
+            visible=False,
+            padding=ft.padding.only(left=10, right=10),
+            margin=ft.margin.only(left=18, right=18),
+        )
+
         # 数据表格
         self.data_table = ft.DataTable(
             columns=[
@@ -225,6 +274,7 @@ class HistoryView:
                 ft.DataColumn(ft.Text("日期")),
                 ft.DataColumn(ft.Text("项目名称")),
                 ft.DataColumn(ft.Text("备份")),
+                ft.DataColumn(ft.Text("最近校验")),
                 ft.DataColumn(ft.Text("操作")),
             ],
             rows=[],
@@ -237,6 +287,8 @@ class HistoryView:
             heading_row_height=40,
             data_row_min_height=40,
             width=1180, 
+            show_checkbox_column=True,
+            on_select_all=self._on_select_all,
         )
 
         # 初始加载数据
@@ -246,6 +298,7 @@ class HistoryView:
             [
                 toolbar,
                 filter_bar,
+                self.selection_bar,
                 ft.Container(
                     content=ft.Column(
                         [
@@ -265,81 +318,272 @@ class HistoryView:
     def refresh_data(self, e=None):
         """刷新数据显示"""
         try:
-            # 获取总数据
-            all_projects = self.manager.get_projects(self.filters)
-            
-            # 按照磁盘编号排序
-            all_projects.sort(key=lambda x: int(x['disk_id']) if x['disk_id'].isdigit() else float('inf'))
-            
-            # 计算总页数
-            total_pages = (len(all_projects) + self.page_size - 1) // self.page_size
-            
-            # 分页处理
-            start_idx = (self.current_page - 1) * self.page_size
-            end_idx = start_idx + self.page_size
+            self._render_page(self._build_page_query()())
+        except Exception as e:
+            print(f"[ERROR] 刷新数据显示失败: {str(e)}")
+            self.show_error(f"刷新数据显示失败: {str(e)}")
+
+    def _request_refresh(self, delay: Optional[float] = None):
+        """在后台刷新数据，连续的输入只执行最后一次查询"""
+        if not self.query_executor:
+            self.refresh_data()
+            return
+        self.query_executor.submit(
+            self._build_page_query(),
+            self._render_page,
+            on_error=lambda ex: self.show_error(f"刷新数据显示失败: {str(ex)}"),
+            delay=delay,
+        )
+
+    def _build_page_query(self):
+        """按当前过滤条件和页码生成查询函数（参数在调用时固定）"""
+        filters = dict(self.filters)
+        page = self.current_page
+        cursor = self._page_cursors.get(page)
+        
+        def query():
+            # 排序与分页在数据库中完成
+            return self.manager.get_projects_page(
+                filters,
+                page=page,
+                page_size=self.page_size,
+                cursor=cursor,
+            )
+        return query
+
+    def _render_page(self, result: Dict):
+        """将查询结果渲染到表格，复用已有行只更新变化的单元格"""
+        if self._destroyed or not self.data_table:
+            return
+        try:
+            if result["page"] != self.current_page:
+                return
+            self._page_cursors[result["page"] + 1] = result["next_cursor"]
             
-            current_projects = all_projects[start_idx:end_idx]
+            total_pages = result["total_pages"]
+            current_projects = result["items"]
             
-            # 更新表格数据
+            # 按项目 id 对齐行，只为新出现的项目创建控件
+            row_cache = {}
             rows = []
             for project in current_projects:
-                row = ft.DataRow(
-                    cells=[
-                        ft.DataCell(ft.Text(project['disk_id'])),
-                        ft.DataCell(ft.Text(project['project_date'])),
-                        ft.DataCell(ft.Text(project['project_name'])),
-                        ft.DataCell(ft.Icon(
-                            ft.icons.CHECK_CIRCLE if project['backup_status'] else ft.icons.CANCEL,
-                            color=ft.colors.GREEN if project['backup_status'] else ft.colors.RED,
-                            size=20,
-                        )),
-                        ft.DataCell(
-                            ft.Row(
-                                [
-                                    ft.IconButton(
-                                        icon=ft.icons.EDIT,
-                                        tooltip="编辑",
-                                        data=project,
-                                        on_click=lambda e: self._show_edit_dialog(e.control.data),
-                                        icon_size=20,
-                                    ),
-                                    ft.IconButton(
-                                        icon=ft.icons.DELETE,
-                                        tooltip="删除",
-                                        data=project,
-                                        on_click=lambda e: self._delete_project(e.control.data['id']),
-                                        icon_size=20,
-                                    ),
-                                    ft.IconButton(
-                                        icon=ft.icons.FOLDER_OPEN,
-                                        tooltip="打开路径",
-                                        data=project,
-                                        on_click=lambda e: self._open_project_path(e.control.data),
-                                        icon_size=20,
-                                    ),
-                                    ft.IconButton(
-                                        icon=ft.icons.INFO,
-                                        tooltip="详情",
-                                        data=project,
-                                        on_click=lambda e: self._show_detail_dialog(e.control.data),
-                                        icon_size=20,
-                                    ),
-                                ],
-                                spacing=5,
-                            )
-                        ),
-                    ]
-                )
+                row = self._row_cache.get(project['id'])
+                if row is None:
+                    row = self._build_row(project)
+                else:
+                    self._patch_row(row, project)
+                    row.selected = project['id'] in self.selected_items
+                row_cache[project['id']] = row
                 rows.append(row)
-
-            self.data_table.rows = rows
+            self._row_cache = row_cache
+            
+            if [id(r) for r in rows] != [id(r) for r in self.data_table.rows]:
+                self.data_table.rows = rows
             self._update_pagination(total_pages)  # 更新分页控件
+            self._update_selection_bar()
             
-            self.page.update()
+            # 只向客户端发送表格和分页控件的差异
+            if self.data_table.page:
+                self.page.update(self.data_table, self.pagination_row, self.selection_bar)
+            else:
+                self.page.update()
         except Exception as e:
-            print(f"[ERROR] 刷新数据显示失败: {str(e)}")
+            print(f"[ERROR] 渲染数据失败: {str(e)}")
             self.show_error(f"刷新数据显示失败: {str(e)}")
 
+    def _build_row(self, project: Dict) -> ft.DataRow:
+        """创建表格行"""
+        buttons = [
+            ft.IconButton(
+                icon=ft.icons.EDIT,
+                tooltip="编辑",
+                data=project,
+                on_click=self._on_edit_click,
+                icon_size=20,
+            ),
+            ft.IconButton(
+                icon=ft.icons.DELETE,
+                tooltip="删除",
+                data=project,
+                on_click=self._on_delete_click,
+                icon_size=20,
+            ),
+            ft.IconButton(
+                icon=ft.icons.FOLDER_OPEN,
+                tooltip="打开路径",
+                data=project,
+                on_click=self._on_open_path_click,
+                icon_size=20,
+            ),
+            ft.IconButton(
+                icon=ft.icons.INFO,
+                tooltip="详情",
+                data=project,
+                on_click=self._on_detail_click,
+                icon_size=20,
+            ),
+        ]
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(project['disk_id'])),
+                ft.DataCell(ft.Text(project['project_date'])),
+                ft.DataCell(ft.Text(project['project_name'])),
+                ft.DataCell(ft.Icon(
+                    ft.icons.CHECK_CIRCLE if project['backup_status'] else ft.icons.CANCEL,
+                    color=ft.colors.GREEN if project['backup_status'] else ft.colors.RED,
+                    size=20,
+                )),
+                ft.DataCell(self._verification_text(project)),
+                ft.DataCell(ft.Row(buttons, spacing=5)),
+            ],
+            data=project,
+            selected=project['id'] in self.selected_items,
+            on_select_changed=self._on_row_select_changed,
+        )
+
+    def _patch_row(self, row: ft.DataRow, project: Dict) -> bool:
+        """将项目数据的变化写入已有行
+        :return: 是否有单元格发生变化
+        """
+        old = row.data
+        if old == project:
+            return False
+        
+        cells = row.cells
+        for index, key in enumerate(('disk_id', 'project_date', 'project_name')):
+            if old[key] != project[key]:
+                cells[index].content.value = project[key]
+        if bool(old['backup_status']) != bool(project['backup_status']):
+            icon = cells[3].content
+            icon.name = ft.icons.CHECK_CIRCLE if project['backup_status'] else ft.icons.CANCEL
+            icon.color = ft.colors.GREEN if project['backup_status'] else ft.colors.RED
+        if (old.get('verified_ok'), old.get('verified_at')) != (project.get('verified_ok'), project.get('verified_at')):
+            cells[4].content = self._verification_text(project)
+        
+        # 操作按钮引用最新的项目数据
+        row.data = project
+        for button in cells[5].content.controls:
+            button.data = project
+        return True
+
+    def _verification_text(self, project: Dict) -> ft.Text:
+        """最近一次校验的时间和结果"""
+        if project.get('verified_at') is None:
+            return ft.Text("未校验", color=ft.colors.GREY)
+        ok = bool(project['verified_ok'])
+        return ft.Text(
+            f"{'通过' if ok else '未通过'} {project['verified_at'][:10]}",
+            color=ft.colors.GREEN if ok else ft.colors.RED,
+            tooltip=f"{VERIFICATION_KINDS.get(project.get('verified_kind'), '')} {project['verified_at']}",
+        )
+
+    def _on_row_select_changed(self, e):
+        """处理行勾选"""
+        row = e.control
+        row.selected = e.data == "true"
+        if row.selected:
+            self.selected_items.add(row.data['id'])
+        else:
+            self.selected_items.discard(row.data['id'])
+        self._update_selection_bar()
+        self.page.update(row, self.selection_bar)
+
+    def _on_select_all(self, e):
+        """勾选或取消当前页全部行"""
+        selected = e.data == "true"
+        for row in self.data_table.rows:
+            row.selected = selected
+            if selected:
+                self.selected_items.add(row.data['id'])
+            else:
+                self.selected_items.discard(row.data['id'])
+        self._update_selection_bar()
+        self.page.update(self.data_table, self.selection_bar)
+
+    def _clear_selection(self, e=None):
+        """清除所有选中项"""
+        self.selected_items.clear()
+        for row in self.data_table.rows:
+            row.selected = False
+        self._update_selection_bar()
+        self.page.update(self.data_table, self.selection_bar)
+
+    def _update_selection_bar(self):
+        """根据选中数量显示批量操作栏"""
+        self.selection_bar.visible = bool(self.selected_items)
+        self.selection_text.value = f"已选 {len(self.selected_items)} 项"
+
+    def _batch_set_backup(self, backup_status: int):
+        """批量设置选中项目的备份状态"""
+        try:
+            updated = self.manager.set_backup_status(list(self.selected_items), backup_status)
+            self._request_refresh(delay=0)
+            self.show_success(f"已更新 {updated} 个项目")
+        except Exception as e:
+            self.show_error(f"批量更新失败: {str(e)}")
+
+    def _batch_delete(self, e=None):
+        """批量删除选中项目"""
+        def confirm_delete(_):
+            try:
+                deleted = self.manager.delete_projects(list(self.selected_items))
+                self.selected_items.clear()
+                self.page.close(delete_dlg)
+                self._request_refresh(delay=0)
+                self.show_success(f"已删除 {deleted} 个项目")
+            except Exception as ex:
+                self.show_error(f"批量删除失败: {str(ex)}")
+
+        delete_dlg = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("确认删除"),
+            content=ft.Text(f"确定要删除选中的 {len(self.selected_items)} 个项目吗？"),
+            actions=[
+                ft.TextButton("取消", on_click=lambda e: self.page.close(delete_dlg)),
+                ft.TextButton("删除", on_click=confirm_delete),
+            ],
+        )
+        self.page.dialog = delete_dlg
+        self.page.open(delete_dlg)
+
+    def _show_batch_tag_dialog(self, e=None):
+        """为选中项目添加标签"""
+        tags_field = ft.TextField(label="标签", hint_text="多个标签用逗号分隔")
+
+        def save_tags(_):
+            try:
+                names = tags_field.value.replace("，", ",").split(",")
+                added = self.manager.add_tags(list(self.selected_items), names)
+                self.page.close(tag_dlg)
+                self.show_success(f"已添加 {added} 个标签关联")
+            except Exception as ex:
+                self.show_error(f"添加标签失败: {str(ex)}")
+
+        tag_dlg = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(f"为 {len(self.selected_items)} 个项目添加标签"),
+            content=tags_field,
+            actions=[
+                ft.TextButton("取消", on_click=lambda e: self.page.close(tag_dlg)),
+                ft.FilledButton("保存", on_click=save_tags),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        self.page.dialog = tag_dlg
+        self.page.open(tag_dlg)
+
+    def _on_edit_click(self, e):
+        self._show_edit_dialog(e.control.data)
+
+    def _on_delete_click(self, e):
+        self._delete_project(e.control.data['id'])
+
+    def _on_open_path_click(self, e):
+        self._open_project_path(e.control.data)
+
+    def _on_detail_click(self, e):
+        self._show_detail_dialog(e.control.data)
+
     def _handle_row_select(self, project):
         """处理行选择"""
         if project:
@@ -400,7 +644,7 @@ class HistoryView:
                         'filename': filename.value,
                     })
                     add_dlg.open = False  # 关闭对话框
-                    self.refresh_data()  # 刷新数据
+                    self._request_refresh(delay=0)  # 刷新数据
                     self.show_success("添加成功")
                 except Exception as e:
                     self.show_error(f"添加失败: {str(e)}")
@@ -509,7 +753,7 @@ class HistoryView:
                         'filename': filename.value,
                     })
                     edit_dlg.open = False  # 关闭对话框
-                    self.refresh_data()  # 刷新数据
+                    self._request_refresh(delay=0)  # 刷新数据
                     self.show_success("更新成功")
                 except Exception as e:
                     self.show_error(f"更新失败: {str(e)}")
@@ -591,7 +835,7 @@ class HistoryView:
             try:
                 self.manager.delete_project(project_id)
                 delete_dlg.open = False  # 关闭对话框
-                self.refresh_data()  # 刷新数据
+                self._request_refresh(delay=0)  # 刷新数据
                 self.show_success("删除成功")
             except Exception as e:
                 self.show_error(f"删除失败: {str(e)}")
@@ -730,6 +974,7 @@ class HistoryView:
             print("[DEBUG] 正在清理历史工程视图...")
             # 停止自动保存定时器
             self._stop_auto_save()
+            self._close_query_executor()
             # 清理其他资源
             if hasattr(self, 'manager'):
                 self.manager = None
@@ -745,6 +990,7 @@ class HistoryView:
             if not self._destroyed:
                 print("[DEBUG] 开始清理历史工程视图资源...")
                 self._stop_auto_save()
+                self._close_query_executor()
                 
                 # 移除 FilePicker
                 if hasattr(self, 'import_picker'):
@@ -760,50 +1006,88 @@ class HistoryView:
         except Exception as e:
             print(f"[ERROR] 清理资源失败: {str(e)}")
 
+    def _close_query_executor(self):
+        """丢弃本视图未完成的查询（执行器共享，不停止工作线程）"""
+        if self.query_executor:
+            self.query_executor.cancel()
+            self.query_executor = None
+
     def _handle_import_result(self, e: ft.FilePickerResultEvent):
         """处理导入结果"""
         try:
             if e.files:
                 file_path = e.files[0].path
                 # 显示进度对话框
+                progress_bar = ft.ProgressBar(width=400, value=0)
+                progress_text = ft.Text("")
                 progress_dialog = ft.AlertDialog(
                     title=ft.Text("导入中..."),
-                    content=ft.ProgressBar(width=400),
+                    content=ft.Column([progress_bar, progress_text], tight=True),
                 )
                 self.page.dialog = progress_dialog
                 progress_dialog.open = True
                 self.page.update()
                 
+                def on_progress(done, total):
+                    progress_bar.value = done / total if total else 1
+                    progress_text.value = f"{done} / {total}"
+                    self.page.update()
+                
                 # 导入数据
-                self.manager.import_from_excel(file_path)
+                report = self.manager.import_from_excel(file_path, progress_callback=on_progress)
                 
                 progress_dialog.open = False
-                self.refresh_data()
-                self.show_success("Excel导入成功")
+                self._reset_paging()
+                self._request_refresh(delay=0)
+                
+                rejects = report["rejects"]
+                if rejects:
+                    # 跳过的行写入源文件旁的报告
+                    rejects_path = os.path.splitext(file_path)[0] + "_rejects.csv"
+                    self.manager.save_import_rejects(rejects, rejects_path)
+                    self.show_error(
+                        f"已导入 {report['imported']} 条，跳过 {len(rejects)} 条，"
+                        f"详见 {rejects_path}"
+                    )
+                else:
+                    self.show_success(f"Excel导入成功，共 {report['imported']} 条")
                 self.page.update()
         except Exception as ex:
             self.show_error(f"导入失败: {str(ex)}")
 
     def _handle_export_result(self, e: ft.FilePickerResultEvent):
         """处理导出结果"""
+        progress_dialog = None
         try:
             if e.path:
+                # 未输入扩展名时按 xlsx 导出
+                file_path = e.path if os.path.splitext(e.path)[1] else e.path + ".xlsx"
+                
                 # 显示进度对话框
+                progress_bar = ft.ProgressBar(width=400, value=0)
+                progress_text = ft.Text("")
                 progress_dialog = ft.AlertDialog(
                     title=ft.Text("导出中..."),
-                    content=ft.ProgressBar(width=400),
+                    content=ft.Column([progress_bar, progress_text], tight=True),
                 )
                 self.page.dialog = progress_dialog
                 progress_dialog.open = True
                 self.page.update()
                 
-                # 导出数据
-                self.manager.export_to_excel(e.path)
+                def on_progress(done, total):
+                    progress_bar.value = done / total if total else 1
+                    progress_text.value = f"{done} / {total}"
+                    self.page.update()
+                
+                # 流式导出全部数据
+                exported = self.manager.export_projects(file_path, progress_callback=on_progress)
                 
                 progress_dialog.open = False
-                self.show_success("Excel导出成功")
+                self.show_success(f"导出成功，共 {exported} 条")
                 self.page.update()
         except Exception as ex:
+            if progress_dialog:
+                progress_dialog.open = False
             self.show_error(f"导出失败: {str(ex)}")
 
     def _import_excel(self, e=None):
@@ -815,15 +1099,15 @@ class HistoryView:
             print(f"[ERROR] 导入Excel失败: {str(e)}")
             self.show_error(str(e))
 
-    def _export_excel(self, e=None):
-        """导出Excel数据"""
+    def _export_projects(self, e=None):
+        """导出项目（xlsx / csv / jsonl）"""
         try:
-            self.export_picker.allowed_extensions = ["xlsx"]
-            self.export_picker.dialog_title = "保存Excel文件"
-            self.export_picker.file_name = "项目列表.xlsx"
+            self.export_picker.allowed_extensions = list(EXPORT_FORMATS)
+            self.export_picker.dialog_title = "导出项目"
+            self.export_picker.file_name = "项目列表"
             self.export_picker.save_file()
         except Exception as e:
-            print(f"[ERROR] 导出Excel失败: {str(e)}")
+            print(f"[ERROR] 导出项目失败: {str(e)}")
             self.show_error(str(e))
 
     def _handle_filter_change(self, e):
@@ -840,6 +1124,8 @@ class HistoryView:
                         self.filters["backup_status"] = 1
                     else:
                         self.filters["backup_status"] = 0
+                elif e.control.label == "校验状态":
+                    self.filters["unverified_days"] = UNVERIFIED_OPTIONS.get(e.control.value)
             elif isinstance(e.control, ft.TextField):
                 # 通过父容器的文本来判断是哪个日期输入框
                 label = e.control.parent.controls[0].value
@@ -849,7 +1135,8 @@ class HistoryView:
                     self.filters["date_to"] = e.control.value
 
             # 刷新数据显示
-            self.refresh_data()
+            self._reset_paging()
+            self._request_refresh(delay=0)
         except Exception as e:
             print(f"[ERROR] 处理过滤条件变化失败: {str(e)}")
             self.show_error(str(e))
@@ -858,7 +1145,8 @@ class HistoryView:
         """处理搜索"""
         try:
             self.filters["search_text"] = e.control.value
-            self.refresh_data()
+            self._reset_paging()
+            self._request_refresh()
         except Exception as e:
             print(f"[ERROR] 处理搜索失败: {str(e)}")
             self.show_error(str(e))
@@ -884,30 +1172,39 @@ class HistoryView:
             self.show_error(f"打开路径失败: {str(e)}")
 
     def _update_pagination(self, total_pages):
-        """更新分页控件"""
-        pagination = ft.Row(
-            [
-                ft.IconButton(
-                    icon=ft.icons.ARROW_BACK,
-                    on_click=lambda _: self._change_page(self.current_page - 1),
-                    disabled=self.current_page <= 1,
-                ),
-                ft.Text(f"第 {self.current_page} 页 / 共 {total_pages} 页"),
-                ft.IconButton(
-                    icon=ft.icons.ARROW_FORWARD,
-                    on_click=lambda _: self._change_page(self.current_page + 1),
-                    disabled=self.current_page >= total_pages,
-                ),
-            ],
-            alignment=ft.MainAxisAlignment.CENTER,
-        )
-        # 更新分页控件
-        self.pagination_row.controls = [pagination]
+        """更新分页控件（首次创建，之后只修改状态）"""
+        if not self._pagination_controls:
+            prev_button = ft.IconButton(
+                icon=ft.icons.ARROW_BACK,
+                on_click=lambda _: self._change_page(self.current_page - 1),
+            )
+            page_text = ft.Text("")
+            next_button = ft.IconButton(
+                icon=ft.icons.ARROW_FORWARD,
+                on_click=lambda _: self._change_page(self.current_page + 1),
+            )
+            self._pagination_controls = (prev_button, page_text, next_button)
+            self.pagination_row.controls = [
+                ft.Row(
+                    list(self._pagination_controls),
+                    alignment=ft.MainAxisAlignment.CENTER,
+                )
+            ]
+        
+        prev_button, page_text, next_button = self._pagination_controls
+        prev_button.disabled = self.current_page <= 1
+        page_text.value = f"第 {self.current_page} 页 / 共 {total_pages} 页"
+        next_button.disabled = self.current_page >= total_pages
 
     def _change_page(self, new_page):
         """切换页码"""
         self.current_page = new_page
-        self.refresh_data()
+        self._request_refresh(delay=0)
+
+    def _reset_paging(self):
+        """过滤条件变化后回到第一页"""
+        self.current_page = 1
+        self._page_cursors = {}
 
     def _handle_date_input(self, e, date_type):
         """处理日期输入变化"""
@@ -917,4 +1214,5 @@ class HistoryView:
             self.filters["date_to"] = e.control.value
         
         # 刷新数据显示
-        self.refresh_data()
\ No newline at end of file
+        self._reset_paging()
+        self._request_refresh()
\ No newline at end of file
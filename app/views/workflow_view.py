@@ -1,8 +1,11 @@
 import flet as ft
 from app.utils.db_manager import DatabaseManager
+from app.utils.folder_plan import compile_plan, load_workflow_settings, project_root
+from app.utils.batch_workflow import BatchWorkflow
+from app.utils.project_manager import ProjectManager, resolve_db_path
 from datetime import datetime, timedelta
 import os
-import json
+import threading
 
 class WorkflowView:
     def __init__(self, page: ft.Page, db: DatabaseManager):
@@ -10,6 +13,15 @@ class WorkflowView:
         self.db = db
         self.camera_rows = []  # 存储相机输入行
         
+        # 批量创建使用的表格选择器：视图每次导航都会重建，选择器只添加一次，
+        # 之后复用并改为回调当前视图
+        self.batch_picker = getattr(self.page, "workflow_batch_picker", None)
+        if self.batch_picker is None:
+            self.batch_picker = ft.FilePicker()
+            self.page.overlay.append(self.batch_picker)
+            self.page.workflow_batch_picker = self.batch_picker
+        self.batch_picker.on_result = self._handle_batch_result
+        
     def build(self):
         # 项目类型下拉框
         self.project_type = ft.Dropdown(
@@ -80,11 +92,26 @@ class WorkflowView:
                         on_click=lambda _: self.add_camera_row()
                     ),
                     ft.Divider(),
-                    ft.ElevatedButton(
-                        text="创建工作流文件夹",
-                        icon=ft.icons.CREATE_NEW_FOLDER,
-                        on_click=self.create_workflow
-                    ),
+                    ft.Row([
+                        ft.ElevatedButton(
+                            text="创建工作流文件夹",
+                            icon=ft.icons.CREATE_NEW_FOLDER,
+                            on_click=self.create_workflow
+                        ),
+                        ft.OutlinedButton(
+                            text="预览",
+                            icon=ft.icons.PREVIEW,
+                            on_click=self.preview_workflow
+                        ),
+                        ft.OutlinedButton(
+                            text="从表格批量创建",
+                            icon=ft.icons.TABLE_VIEW,
+                            tooltip="表格列：项目名称、日期、类型、相机、磁盘（可选：剪辑软件、备注）",
+                            on_click=lambda _: self.batch_picker.pick_files(
+                                allowed_extensions=["xlsx", "xls", "csv"]
+                            )
+                        ),
+                    ]),
                 ],
                 spacing=20,
             ),
@@ -148,85 +175,156 @@ class WorkflowView:
         date_dialog.open = True
         self.page.update()
     
+    def _compile_plan(self):
+        """根据界面输入编译文件夹计划
+        :return: (计划, 项目根目录, 日期)，输入不完整时返回 None
+        """
+        # 加载设置（文件未修改时使用缓存）
+        settings = load_workflow_settings()
+        
+        # 验证必要的设置和输入
+        if not settings["project_path"]:
+            self.show_error("请先在设置中配置工程路径")
+            return None
+        
+        if not self.project_name.value:
+            self.show_error("请输入项目名称")
+            return None
+        
+        if not self.project_type.value:
+            self.show_error("请选择项目类型")
+            return None
+        
+        # 获取日期
+        if self.date_type.value == "当天日期":
+            date_str = datetime.now().strftime("%Y%m%d")
+        else:
+            # TODO: 处理交付日期
+            date_str = datetime.now().strftime("%Y%m%d")
+        
+        plan = compile_plan(
+            self.project_type.value,
+            cameras=[(row.controls[0].value, row.controls[1].value) for row in self.camera_rows],
+            editing_software=self.editing_software.value,
+            settings=settings,
+        )
+        root = project_root(settings["project_path"], self.project_name.value, date_str)
+        return plan, root, date_str
+    
     def create_workflow(self, e):
         """创建工作流文件夹"""
         try:
-            # 加载设置
-            with open('config/workflow_settings.json', 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-            
-            # 验证必要的设置和输入
-            if not settings["project_path"]:
-                self.show_error("请先在设置中配置工程路径")
+            compiled = self._compile_plan()
+            if not compiled:
                 return
+            plan, root, date_str = compiled
             
-            if not self.project_name.value:
-                self.show_error("请输入项目名称")
+            # 创建文件夹结构并复制剪辑软件模板
+            result = plan.apply(root, date_str)
+            if result.errors:
+                path, message = result.errors[0]
+                self.show_error(f"创建失败：{path}: {message}")
                 return
+            if result.template:
+                template = result.template
+                print(
+                    f"[DEBUG] 复制剪辑模板 {template.files} 个文件，"
+                    f"{template.bytes / 1024 ** 2:.0f} MB，耗时 {template.elapsed:.2f} 秒，方式 {template.methods}"
+                )
+                if not template.ok:
+                    path, message = template.errors[0]
+                    self.show_error(f"剪辑模板有 {len(template.errors)} 个文件复制失败：{path}: {message}")
+                    return
+                    
+            self.show_success("工作流文件夹创建成功！")
             
-            if not self.project_type.value:
-                self.show_error("请选择项目类型")
+        except Exception as ex:
+            self.show_error(f"创建失败：{str(ex)}")
+
+    def preview_workflow(self, e):
+        """预览将要创建的文件夹（不写入磁盘）"""
+        try:
+            compiled = self._compile_plan()
+            if not compiled:
                 return
+            plan, root, date_str = compiled
+            result = plan.apply(root, date_str, dry_run=True)
             
-            # 获取日期
-            if self.date_type.value == "当天日期":
-                date_str = datetime.now().strftime("%Y%m%d")
-            else:
-                # TODO: 处理交付日期
-                date_str = datetime.now().strftime("%Y%m%d")
-            
-            # 创建项目根目录
-            project_folder = os.path.join(
-                settings["project_path"],
-                f"{date_str}_{self.project_name.value}"
-            )
-            os.makedirs(project_folder, exist_ok=True)
+            lines = [ft.Text(path, size=12, selectable=True) for path in result.created]
+            lines += [
+                ft.Text(f"{path}（已存在）", size=12, color=ft.colors.GREY, selectable=True)
+                for path in result.existing
+            ]
+            if plan.template:
+                lines.append(ft.Text(f"复制剪辑模板：{plan.template}", size=12))
             
-            # 获取文件夹结构
-            structure_type = self.project_type.value
-            if structure_type == "简易项目":
-                structure = settings["folder_structures"]["simple"]
-            elif structure_type == "标准项目":
-                structure = settings["folder_structures"]["standard"]
-            else:
-                structure = settings["folder_structures"]["large"]
+            def close_dialog(_):
+                dialog.open = False
+                self.page.update()
             
-            # 创建文件夹结构
-            language = settings["folder_language"]
-            folder_names = settings["folder_names"][language]
-            
-            for folder in structure:
-                folder_path = os.path.join(project_folder, folder_names[folder])
-                os.makedirs(folder_path, exist_ok=True)
-                
-                # 如果是相机文件夹，创建相机子文件夹
-                if folder == "01_Camera":
-                    for row in self.camera_rows:
-                        camera_model = row.controls[0].value
-                        camera_tag = row.controls[1].value
-                        if camera_model:
-                            camera_folder = f"{date_str}_{camera_model}"
-                            if camera_tag:
-                                camera_folder += f"_{camera_tag}"
-                            os.makedirs(os.path.join(folder_path, camera_folder), exist_ok=True)
-            
-            # 复制剪辑软件模板
-            if self.editing_software.value and settings["editing_templates_path"]:
-                software_path = os.path.join(
-                    settings["editing_templates_path"],
-                    self.editing_software.value
-                )
-                if os.path.exists(software_path):
-                    project_folder = os.path.join(
-                        project_folder,
-                        folder_names["04_Project"]
-                    )
-                    # TODO: 实现文件夹复制功能
-                    
-            self.show_success("工作流文件夹创建成功！")
+            dialog = ft.AlertDialog(
+                title=ft.Text(f"将创建 {len(result.created)} 个文件夹"),
+                content=ft.Container(
+                    content=ft.Column(lines, scroll=ft.ScrollMode.AUTO, spacing=2),
+                    width=600,
+                    height=400,
+                ),
+                actions=[ft.TextButton("关闭", on_click=close_dialog)],
+            )
+            self.page.dialog = dialog
+            dialog.open = True
+            self.page.update()
             
         except Exception as ex:
-            self.show_error(f"创建失败：{str(ex)}")
+            self.show_error(f"预览失败：{str(ex)}")
+
+    def _handle_batch_result(self, e: ft.FilePickerResultEvent):
+        """选择表格后在后台批量创建"""
+        if not e.files:
+            return
+        file_path = e.files[0].path
+        
+        progress_bar = ft.ProgressBar(width=400, value=0)
+        progress_text = ft.Text("正在读取表格...")
+        progress_dialog = ft.AlertDialog(
+            title=ft.Text("批量创建中..."),
+            content=ft.Column([progress_bar, progress_text], tight=True),
+            modal=True,
+        )
+        self.page.dialog = progress_dialog
+        progress_dialog.open = True
+        self.page.update()
+        
+        def on_progress(done, total):
+            progress_bar.value = done / total if total else 1
+            progress_text.value = f"{done} / {total}"
+            self.page.update()
+        
+        def run():
+            try:
+                settings = load_workflow_settings()
+                manager = ProjectManager(resolve_db_path(settings))
+                report = BatchWorkflow(manager, settings).run(file_path, progress_callback=on_progress)
+                progress_dialog.open = False
+                
+                rejects = report["rejects"]
+                summary = f"已创建 {report['created']} 个项目，登记 {report['imported']} 个"
+                if report["registered"]:
+                    summary += f"（{report['registered']} 个已登记过）"
+                if rejects:
+                    # 失败的行写入表格旁的报告
+                    rejects_path = os.path.splitext(file_path)[0] + "_rejects.csv"
+                    manager.save_import_rejects(rejects, rejects_path)
+                    self.show_error(f"{summary}，失败 {len(rejects)} 行，详见 {rejects_path}")
+                else:
+                    self.show_success(summary)
+            except Exception as ex:
+                progress_dialog.open = False
+                self.show_error(f"批量创建失败：{str(ex)}")
+            finally:
+                self.page.update()
+        
+        threading.Thread(target=run, daemon=True).start()
 
     def show_error(self, message):
         """显示错误提示"""
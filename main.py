@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import flet as ft
+import multiprocessing
 import platform  # 系统检测模块
 from app.controllers.main_controller import MainController
 from app.utils.db_manager import DatabaseManager
@@ -85,4 +86,6 @@ def main():
     )
 
 if __name__ == "__main__":
+    # 打包后备份校验的进程池需要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file